@@ -0,0 +1,55 @@
+"""
+Recall vs latency of the FAISS ANN index types on synthetic embeddings.
+
+Usage:
+    python benchmarks/ann_recall.py --n 200000 --type hnsw
+    python benchmarks/ann_recall.py --n 200000 --type ivf_pq --nlist 1024
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from autogen_app.faiss_index import build_index, evaluate_index
+
+SWEEPS = {
+    "flat": [{}],
+    "hnsw": [{"efSearch": ef} for ef in (8, 16, 32, 64, 128, 256)],
+    "ivf_flat": [{"nprobe": p} for p in (1, 4, 8, 16, 32, 64)],
+    "ivf_pq": [{"nprobe": p} for p in (1, 4, 8, 16, 32, 64)],
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=100000, help="database vectors")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--type", choices=sorted(SWEEPS), default="hnsw")
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--M", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Clustered data is closer to real embeddings than uniform noise
+    centers = rng.normal(size=(256, args.dimensions)).astype("float32")
+    database = centers[rng.integers(0, 256, args.n)] + 0.3 * rng.normal(size=(args.n, args.dimensions)).astype("float32")
+    queries = centers[rng.integers(0, 256, args.queries)] + 0.3 * rng.normal(size=(args.queries, args.dimensions)).astype("float32")
+
+    start = time.perf_counter()
+    index = build_index({"type": args.type, "nlist": args.nlist, "M": args.M}, database)
+    index.add(database)
+    print(f"Built {args.type} over {args.n} vectors in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'params':<20}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for row in evaluate_index(index, database, queries, k=args.k, sweep=SWEEPS[args.type]):
+        params = ", ".join(f"{k}={v}" for k, v in row.items() if k not in ("recall", "p50_ms", "p95_ms"))
+        print(f"{params or 'exact':<20}{row['recall']:>10.3f}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}")
+
+if __name__ == "__main__":
+    main()
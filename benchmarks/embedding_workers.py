@@ -0,0 +1,57 @@
+"""
+Embedding throughput (docs/sec) for 1..N worker processes.
+
+Usage:
+    python benchmarks/embedding_workers.py --max-workers 8 --docs 4000
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from autogen_app.embedding_workers import ProcessPoolEmbeddings
+
+def synthetic_docs(count: int):
+    words = ("user order payment schema table column service request response "
+             "identifier created status amount graph query mutation type field").split()
+    return [
+        " ".join(words[(i * 7 + j) % len(words)] for j in range(120)) + f" #{i}"
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    docs = synthetic_docs(args.docs)
+    print(f"{'workers':>8}{'docs/s':>10}{'speedup':>10}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        embeddings = ProcessPoolEmbeddings(
+            args.model,
+            processes=workers,
+            threads_per_worker=args.threads_per_worker,
+            batch_size=args.batch_size
+        )
+        try:
+            # Warm up so model loading is not part of the measurement
+            embeddings.embed_documents(docs[:workers])
+            start = time.perf_counter()
+            embeddings.embed_documents(docs)
+            rate = len(docs) / (time.perf_counter() - start)
+        finally:
+            embeddings.close()
+        baseline = baseline or rate
+        print(f"{workers:>8}{rate:>10.1f}{rate / baseline:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+LLM scheduler against a local fake endpoint that enforces a requests/tokens-per-minute quota.
+
+The endpoint answers like a chat completion API and returns 429 with
+Retry-After once the quota is spent. The same mixed interactive/batch load is
+sent without and with the scheduler.
+
+Usage:
+    python benchmarks/llm_scheduler.py --requests 300 --threads 32 --rpm 600 --tpm 60000
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from autogen_app.llm_scheduler import LLMScheduler, TokenBucket, estimate_tokens, llm_priority
+
+def fake_endpoint(rpm: float, tpm: float, latency: float) -> ThreadingHTTPServer:
+    # Providers enforce quotas over short windows; two seconds' worth of burst
+    requests = TokenBucket(rpm, burst_seconds=2)
+    tokens = TokenBucket(tpm, burst_seconds=2)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            cost = estimate_tokens(body)
+            wait = max(requests.reserve(1), tokens.reserve(cost))
+            if wait > 0:
+                # Rejected requests do not use quota
+                requests.refund(1)
+                tokens.refund(cost)
+                self.server.throttled += 1
+                self.send_response(429)
+                self.send_header("Retry-After", f"{wait:.2f}")
+                self.end_headers()
+                return
+            time.sleep(latency)
+            payload = json.dumps({"choices": [{"message": {"content": "ok"}}], "usage": {"total_tokens": cost}})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(payload.encode("utf-8"))
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.throttled = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def complete(url: str, params: dict) -> SimpleNamespace:
+    request = urllib.request.Request(url, json.dumps(params).encode("utf-8"), {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        body = json.loads(response.read())
+    return SimpleNamespace(choices=body["choices"], usage=SimpleNamespace(**body["usage"]))
+
+def run(url: str, scheduler, args) -> dict:
+    latencies = {"interactive": [], "batch": []}
+    failed = []
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+
+    def worker():
+        for i in counter:
+            priority = "interactive" if i % 4 == 0 else "batch"
+            params = {"messages": [{"role": "user", "content": "x" * (args.prompt_tokens * 4)}], "max_tokens": 50}
+            start = time.perf_counter()
+            try:
+                if scheduler is None:
+                    complete(url, params)
+                else:
+                    with llm_priority(priority):
+                        scheduler.call(lambda: complete(url, params), estimate_tokens(params))
+            except urllib.error.HTTPError as e:
+                with lock:
+                    failed.append(e.code)
+                continue
+            with lock:
+                latencies[priority].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done = sum(len(values) for values in latencies.values())
+    return {"ok": done, "failed": len(failed), "rate": done / elapsed, "latencies": latencies}
+
+def p95(values):
+    return statistics.quantiles(values, n=20)[-1] if len(values) >= 2 else (values[0] if values else float("nan"))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--rpm", type=float, default=600, help="fake endpoint requests/min quota")
+    parser.add_argument("--tpm", type=float, default=60000, help="fake endpoint tokens/min quota")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake endpoint seconds per request")
+    parser.add_argument("--prompt-tokens", type=int, default=50)
+    parser.add_argument("--headroom", type=float, default=0.95, help="scheduler limits as a fraction of the quota")
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'ok':>6}{'failed':>8}{'429s':>7}{'req/s':>8}{'p95 inter':>11}{'p95 batch':>11}{'limit':>7}")
+    for mode in ("unscheduled", "scheduled"):
+        server = fake_endpoint(args.rpm, args.tpm, args.latency)
+        url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+        scheduler = None if mode == "unscheduled" else LLMScheduler(
+            name="fake",
+            requests_per_minute=args.rpm * args.headroom,
+            tokens_per_minute=args.tpm * args.headroom,
+            burst_seconds=2,
+            initial_concurrency=4,
+            max_concurrency=args.threads,
+            backoff_base=0.2
+        )
+        try:
+            result = run(url, scheduler, args)
+        finally:
+            server.shutdown()
+        print(
+            f"{mode:<14}{result['ok']:>6}{result['failed']:>8}{server.throttled:>7}{result['rate']:>8.1f}"
+            f"{p95(result['latencies']['interactive']):>11.2f}{p95(result['latencies']['batch']):>11.2f}"
+            f"{scheduler.limit.limit if scheduler else '-':>7}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Startup cost: import time per module and time to first retrieval/answer, each in a fresh process.
+
+Usage:
+    python benchmarks/startup.py --runs 5
+    ENV=local python benchmarks/startup.py --answer --query "What is our refund policy?"
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = str(Path(__file__).parent.parent / "src")
+
+MODULES = [
+    "autogen_app",
+    "autogen_app.vector_store",
+    "autogen_app.llm_provider",
+    "autogen_app.maintenance",
+    "autogen_app.agents",
+    "autogen_app.runner",
+]
+
+# Dependencies that should only be loaded by the code paths that need them
+HEAVY = ["autogen", "faiss", "boto3", "google.generativeai", "sentence_transformers", "torch", "langchain_community"]
+
+IMPORT_PROGRAM = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+READY_PROGRAM = """
+import json, time
+phases = {{}}
+start = last = time.perf_counter()
+def mark(phase):
+    global last
+    now = time.perf_counter()
+    phases[phase] = now - last
+    last = now
+from autogen_app.agents import create_agents
+from autogen_app.registry import get_registry
+from autogen_app.runner import SupervisorRunner
+mark("import")
+agents = create_agents()
+mark("create_agents")
+runner = SupervisorRunner(agents, get_registry().get_config())
+mark("runner")
+agents["supervisor"].tool_executor.function_map["retrieve_knowledge"]({query!r})
+mark("first_retrieval")
+if {answer!r}:
+    runner.run({query!r})
+    mark("first_answer")
+phases["total"] = time.perf_counter() - start
+print(json.dumps(phases))
+"""
+
+def run_child(program: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", program],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parent.parent,
+        # Child processes import from the source tree like the other benchmarks
+        env={**os.environ, "PYTHONPATH": SRC}
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per measurement (median reported)")
+    parser.add_argument("--query", default="What is our refund policy?")
+    parser.add_argument("--answer", action="store_true", help="also time the first full answer (calls the LLM)")
+    parser.add_argument("--skip-ready", action="store_true", help="only measure imports")
+    args = parser.parse_args()
+
+    print(f"{'module':<28}{'import s':>10}  heavy dependencies loaded")
+    for module in MODULES:
+        results = [run_child(IMPORT_PROGRAM.format(module=module, heavy=HEAVY)) for _ in range(args.runs)]
+        seconds = statistics.median(r["seconds"] for r in results)
+        print(f"{module:<28}{seconds:>10.3f}  {', '.join(results[-1]['loaded']) or '-'}")
+
+    if args.skip_ready:
+        return
+    results = [run_child(READY_PROGRAM.format(query=args.query, answer=args.answer)) for _ in range(args.runs)]
+    print()
+    print(f"{'phase':<28}{'seconds':>10}")
+    for phase in results[0]:
+        print(f"{phase:<28}{statistics.median(r[phase] for r in results):>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -8,4 +8,4 @@ if ! grep -q "$PATH" /home/user/.bashrc; then
   echo 'export PATH="$HOME/.local/bin:$PATH"' >> /home/user/.bashrc
 fi
 
-python -m flask --app src/main run --debug
\ No newline at end of file
+uvicorn --app-dir src autogen_app.server:create_app --factory --reload
\ No newline at end of file
@@ -15,6 +15,7 @@ if src_path not in sys.path:
 try:
     import autogen
     from autogen_app.agents import create_agents
+    from autogen_app.runner import SupervisorRunner
     from autogen_app.vector_store import get_vector_store, load_config
 except ImportError as e:
     print(f"Error importing modules: {e}")
@@ -37,7 +38,6 @@ def main():
     
     # Create agents
     agents = create_agents(vector_stores)
-    supervisor = agents['supervisor']
     
     # Create a user proxy agent
     user_proxy = autogen.UserProxyAgent(
@@ -51,6 +51,9 @@ def main():
         },
     )
     
+    # Runs queries through the supervisor, with the semantic answer cache in front
+    runner = SupervisorRunner(agents, config, user_proxy=user_proxy)
+    
     # Test queries
     test_queries = [
         "What is the user data structure in our system?",
@@ -68,14 +71,11 @@ def main():
         
         try:
             # Create a chat between user proxy and supervisor
-            chat = user_proxy.initiate_chat(
-                recipient=supervisor,
-                message=query
-            )
+            result = runner.run(query)
             
             # Print the response
-            print("Response:")
-            print(chat.last_message()["content"])
+            print("Response (semantic cache hit):" if result.cached else "Response:")
+            print(result.answer)
             print("\n")
         except Exception as e:
             print(f"Error processing query '{query}': {e}")
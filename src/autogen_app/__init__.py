@@ -2,14 +2,6 @@
 AutoGen App - A multi-agent application using AutoGen
 """
 
-from .agents import (
-    create_agents,
-    KnowledgeRetrieverAgent,
-    SQLGeneratorAgent,
-    GraphQLGeneratorAgent,
-    CodeGeneratorAgent
-)
-
 __version__ = "0.1.0"
 __all__ = [
     'create_agents',
@@ -17,4 +9,15 @@ __all__ = [
     'SQLGeneratorAgent',
     'GraphQLGeneratorAgent',
     'CodeGeneratorAgent'
-] 
\ No newline at end of file
+]
+
+def __getattr__(name: str):
+    # Loaded on first access: importing the package (or a submodule such as
+    # ``autogen_app.maintenance``) must not pull in autogen and the agents
+    if name in __all__:
+        from . import agents
+        return getattr(agents, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
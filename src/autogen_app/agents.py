@@ -2,10 +2,17 @@
 Specialized agents for the multi-agent system.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import autogen
-from .vector_store import get_vector_store, load_config, VectorStore
-from .llm_provider import get_llm_provider
+from .vector_store import get_vector_store, similarity_search_many, VectorStore
+from .llm_provider import llm_settings
+from .registry import get_registry
+from .tools import ParallelToolExecutor
+from .context import ContextAssembler
+from .history import HistoryManager, history_settings
+from .prefetch import prefetched, serve_prefetched
+from .schema_catalog import SchemaCatalog
+from .tracing import configure_tracing, trace_client
 from langchain.schema import Document
 import logging
 
@@ -13,6 +20,59 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Collection and specialist agent behind each supervisor tool
+TOOL_COLLECTIONS = {
+    "retrieve_knowledge": "knowledge_base",
+    "get_sql_schema": "databricks_schema",
+    "get_graphql_schema": "graphql_schema"
+}
+TOOL_AGENTS = {
+    "retrieve_knowledge": "knowledge_retriever",
+    "get_sql_schema": "sql_generator",
+    "get_graphql_schema": "graphql_generator"
+}
+
+def tool_top_k(config: Dict[str, Any], tool: str) -> int:
+    """Number of documents a retrieval tool returns (``tools.top_k``)."""
+    return config.get('tools', {}).get('top_k', {}).get(tool, 4)
+
+def schema_catalog(store_config: Dict[str, Any], vector_store: VectorStore) -> Optional[SchemaCatalog]:
+    """Shared schema catalog for a store's ``schema_catalog`` section, if configured."""
+    if not store_config.get('schema_catalog'):
+        return None
+    catalog = get_registry().get_schema_catalog(store_config['schema_catalog'])
+    catalog.watch(vector_store)
+    return catalog
+
+def catalog_documents(catalog: Optional[SchemaCatalog], query: str) -> Tuple[List[Document], bool]:
+    """Exact catalog definitions for ``query`` (with related tables/types), if any,
+    and whether they match well enough to skip vector search."""
+    match = catalog.lookup(query) if catalog is not None else None
+    if match is None:
+        return [], False
+    return [Document(page_content=match.text, metadata={"source": "schema_catalog"})], match.strong
+
+def schema_context(agent: autogen.ConversableAgent, query: str) -> List[Document]:
+    """Catalog definitions for ``query``, with vector search results unless they match strongly."""
+    results, strong = catalog_documents(agent.catalog, query)
+    if strong:
+        logger.info("Answered from the schema catalog")
+        return results
+    results = results + agent.vector_store.similarity_search(query, k=agent.top_k)
+    logger.info("Retrieved %d documents", len(results))
+    return results
+
+def context_assembler(config: Dict[str, Any], agent: str) -> ContextAssembler:
+    """Assembler packing an agent's retrieved documents into its ``context_tokens`` budget."""
+    agent_config = config['agents'][agent]
+    return ContextAssembler.from_config(
+        config.get('context', {}),
+        max_tokens=agent_config.get('context_tokens', agent_config.get('max_tokens', 1500)),
+        name=agent,
+        # Only DDL/SDL is whitespace-compacted; documentation may hold indented code
+        compact=agent in ('sql_generator', 'graphql_generator')
+    )
+
 class KnowledgeRetrieverAgent(autogen.AssistantAgent):
     """Agent for retrieving information from knowledge bases."""
     
@@ -20,16 +80,18 @@ class KnowledgeRetrieverAgent(autogen.AssistantAgent):
         super().__init__(
             name="knowledge_retriever",
             system_message=config['agents']['knowledge_retriever']['system_prompt'],
-            llm_config=get_llm_provider(config['llm']).get_config()
+            llm_config=get_registry().get_llm_provider(llm_settings(config)).get_config()
         )
         logger.info("Initializing KnowledgeRetrieverAgent with config: %s", config)
         self.vector_store = vector_store or get_vector_store(config['vector_stores']['knowledge_base'])
+        self.top_k = tool_top_k(config, 'retrieve_knowledge')
+        self.context = context_assembler(config, 'knowledge_retriever')
         logger.info("Vector store initialized: %s", self.vector_store)
     
     def retrieve_knowledge(self, query: str) -> List[Document]:
         """Retrieve relevant knowledge from the vector store."""
         logger.info("Retrieving knowledge for query: %s", query)
-        results = self.vector_store.similarity_search(query)
+        results = self.vector_store.similarity_search(query, k=self.top_k)
         logger.info("Retrieved %d documents", len(results))
         return results
 
@@ -40,18 +102,19 @@ class SQLGeneratorAgent(autogen.AssistantAgent):
         super().__init__(
             name="sql_generator",
             system_message=config['agents']['sql_generator']['system_prompt'],
-            llm_config=get_llm_provider(config['llm']).get_config()
+            llm_config=get_registry().get_llm_provider(llm_settings(config)).get_config()
         )
         logger.info("Initializing SQLGeneratorAgent with config: %s", config)
         self.vector_store = vector_store or get_vector_store(config['vector_stores']['databricks_schema'])
+        self.top_k = tool_top_k(config, 'get_sql_schema')
+        self.context = context_assembler(config, 'sql_generator')
+        self.catalog = schema_catalog(config['vector_stores']['databricks_schema'], self.vector_store)
         logger.info("Vector store initialized: %s", self.vector_store)
     
     def get_schema_context(self, query: str) -> List[Document]:
         """Retrieve relevant schema information."""
         logger.info("Retrieving SQL schema for query: %s", query)
-        results = self.vector_store.similarity_search(query)
-        logger.info("Retrieved %d documents", len(results))
-        return results
+        return schema_context(self, query)
 
 class GraphQLGeneratorAgent(autogen.AssistantAgent):
     """Agent for generating GraphQL queries."""
@@ -60,18 +123,19 @@ class GraphQLGeneratorAgent(autogen.AssistantAgent):
         super().__init__(
             name="graphql_generator",
             system_message=config['agents']['graphql_generator']['system_prompt'],
-            llm_config=get_llm_provider(config['llm']).get_config()
+            llm_config=get_registry().get_llm_provider(llm_settings(config)).get_config()
         )
         logger.info("Initializing GraphQLGeneratorAgent with config: %s", config)
         self.vector_store = vector_store or get_vector_store(config['vector_stores']['graphql_schema'])
+        self.top_k = tool_top_k(config, 'get_graphql_schema')
+        self.context = context_assembler(config, 'graphql_generator')
+        self.catalog = schema_catalog(config['vector_stores']['graphql_schema'], self.vector_store)
         logger.info("Vector store initialized: %s", self.vector_store)
     
     def get_schema_context(self, query: str) -> List[Document]:
         """Retrieve relevant schema information."""
         logger.info("Retrieving GraphQL schema for query: %s", query)
-        results = self.vector_store.similarity_search(query)
-        logger.info("Retrieved %d documents", len(results))
-        return results
+        return schema_context(self, query)
 
 class CodeGeneratorAgent(autogen.AssistantAgent):
     """Agent for generating code and architecture."""
@@ -80,12 +144,13 @@ class CodeGeneratorAgent(autogen.AssistantAgent):
         super().__init__(
             name="code_generator",
             system_message=config['agents']['code_generator']['system_prompt'],
-            llm_config=get_llm_provider(config['llm']).get_config()
+            llm_config=get_registry().get_llm_provider(llm_settings(config)).get_config()
         )
 
 def create_agents(vector_stores: Dict[str, VectorStore] = None) -> Dict[str, autogen.AssistantAgent]:
     """Create all agents with their configurations."""
-    config = load_config()
+    config = get_registry().get_config()
+    configure_tracing(config.get('tracing'))
     vector_stores = vector_stores or {}
     
     # Create specialized agents
@@ -113,8 +178,7 @@ def create_agents(vector_stores: Dict[str, VectorStore] = None) -> Dict[str, aut
         Returns:
             str: The retrieved knowledge in a formatted string.
         """
-        results = knowledge_retriever.retrieve_knowledge(query)
-        return "\n\n".join([doc.page_content for doc in results])
+        return knowledge_retriever.context.assemble(knowledge_retriever.retrieve_knowledge(query)).text
     
     def get_sql_schema(query: str) -> str:
         """Get relevant SQL schema information.
@@ -125,8 +189,7 @@ def create_agents(vector_stores: Dict[str, VectorStore] = None) -> Dict[str, aut
         Returns:
             str: The retrieved schema information in a formatted string.
         """
-        results = sql_generator.get_schema_context(query)
-        return "\n\n".join([doc.page_content for doc in results])
+        return sql_generator.context.assemble(sql_generator.get_schema_context(query)).text
     
     def get_graphql_schema(query: str) -> str:
         """Get relevant GraphQL schema information.
@@ -137,8 +200,45 @@ def create_agents(vector_stores: Dict[str, VectorStore] = None) -> Dict[str, aut
         Returns:
             str: The retrieved schema information in a formatted string.
         """
-        results = graphql_generator.get_schema_context(query)
-        return "\n\n".join([doc.page_content for doc in results])
+        return graphql_generator.context.assemble(graphql_generator.get_schema_context(query)).text
+    
+    tool_agents = {
+        "retrieve_knowledge": knowledge_retriever,
+        "get_sql_schema": sql_generator,
+        "get_graphql_schema": graphql_generator
+    }
+    
+    def search_together(calls: List[Tuple[str, Dict[str, Any]]]) -> Dict[int, str]:
+        """Answer a turn's retrieval calls on batchable stores (pgvector) in one round trip."""
+        results = {}
+        searches = []
+        # Catalog matches too weak to answer alone go in front of the search results
+        weak: Dict[int, List[Document]] = {}
+        for i, (name, arguments) in enumerate(calls):
+            if name not in tool_agents or set(arguments) != {"query"}:
+                continue
+            cached = prefetched(name, arguments["query"])
+            agent = tool_agents[name]
+            catalogued, strong = catalog_documents(getattr(agent, "catalog", None), arguments["query"])
+            if cached is not None:
+                results[i] = cached
+            elif strong:
+                results[i] = agent.context.assemble(catalogued).text
+            elif agent.vector_store.batch_key() is not None:
+                searches.append((i, (agent.vector_store, arguments["query"], agent.top_k)))
+                weak[i] = catalogued
+        if len(searches) > 1:
+            documents = similarity_search_many([search for _, search in searches])
+            for (i, _), docs in zip(searches, documents):
+                results[i] = tool_agents[calls[i][0]].context.assemble(weak[i] + docs).text
+        return results
+    
+    # Tools answer from the request's speculative prefetch when one is active
+    function_map = serve_prefetched({
+        "retrieve_knowledge": retrieve_knowledge,
+        "get_sql_schema": get_sql_schema,
+        "get_graphql_schema": get_graphql_schema
+    })
     
     # Create supervisor agent with tool calling capabilities
     supervisor = autogen.AssistantAgent(
@@ -161,67 +261,91 @@ def create_agents(vector_stores: Dict[str, VectorStore] = None) -> Dict[str, aut
         2. Then call the tool with the appropriate query
         3. Finally, analyze the results and decide if you need more information
         
+        When a question needs several tools, call them together in the same turn so they run in parallel.
+        
         Example:
         User: "What is the user data structure in our system?"
         Assistant: "I'll help you understand the user data structure. First, I'll check our documentation for any relevant information about the user model."
         Assistant: [Calls retrieve_knowledge with query "user data structure model"]
         Assistant: "Based on the documentation, I see that we need to understand both the database schema and GraphQL interface. Let me check those."
-        Assistant: [Calls get_sql_schema with query "user table schema"]
-        Assistant: [Calls get_graphql_schema with query "user type definition"]
+        Assistant: [Calls get_sql_schema with query "user table schema" and get_graphql_schema with query "user type definition" in the same turn]
         Assistant: "Now I can provide a complete picture of the user data structure..." """,
         llm_config={
-            **get_llm_provider(config['llm']).get_config(),
-            "functions": [
+            **get_registry().get_llm_provider(llm_settings(config)).get_config(),
+            "tools": [
                 {
-                    "name": "retrieve_knowledge",
-                    "description": "Retrieve relevant knowledge from the knowledge base",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "The search query to find relevant information"
-                            }
-                        },
-                        "required": ["query"]
+                    "type": "function",
+                    "function": {
+                        "name": "retrieve_knowledge",
+                        "description": "Retrieve relevant knowledge from the knowledge base",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "query": {
+                                    "type": "string",
+                                    "description": "The search query to find relevant information"
+                                }
+                            },
+                            "required": ["query"]
+                        }
                     }
                 },
                 {
-                    "name": "get_sql_schema",
-                    "description": "Get relevant SQL schema information",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "The search query to find relevant schema information"
-                            }
-                        },
-                        "required": ["query"]
+                    "type": "function",
+                    "function": {
+                        "name": "get_sql_schema",
+                        "description": "Get relevant SQL schema information",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "query": {
+                                    "type": "string",
+                                    "description": "The search query to find relevant schema information"
+                                }
+                            },
+                            "required": ["query"]
+                        }
                     }
                 },
                 {
-                    "name": "get_graphql_schema",
-                    "description": "Get relevant GraphQL schema information",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "The search query to find relevant schema information"
-                            }
-                        },
-                        "required": ["query"]
+                    "type": "function",
+                    "function": {
+                        "name": "get_graphql_schema",
+                        "description": "Get relevant GraphQL schema information",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "query": {
+                                    "type": "string",
+                                    "description": "The search query to find relevant schema information"
+                                }
+                            },
+                            "required": ["query"]
+                        }
                     }
                 }
             ]
         },
-        function_map={
-            "retrieve_knowledge": retrieve_knowledge,
-            "get_sql_schema": get_sql_schema,
-            "get_graphql_schema": get_graphql_schema
-        }
+        function_map=function_map
+    )
+    
+    # Send each LLM call a bounded window of the conversation
+    history = HistoryManager.from_config(history_settings(config))
+    for agent in (knowledge_retriever, sql_generator, graphql_generator, code_generator, supervisor):
+        history.attach(agent)
+    
+    # Rate-limit, retry and prioritise every agent's requests to the model,
+    # balancing them across endpoints when several are configured
+    supervisor.llm_provider = get_registry().get_llm_provider(llm_settings(config))
+    for agent in (knowledge_retriever, sql_generator, graphql_generator, code_generator, supervisor):
+        supervisor.llm_provider.attach(agent)
+        trace_client(getattr(agent, "client", None), agent.name)
+    
+    # Execute tool calls from the same turn concurrently
+    supervisor.tool_executor = ParallelToolExecutor.from_config(
+        function_map, config.get('tools', {}), batch=search_together
     )
+    supervisor.tool_executor.register(supervisor)
     
     return {
         "knowledge_retriever": knowledge_retriever,
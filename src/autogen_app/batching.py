@@ -0,0 +1,107 @@
+"""
+Micro-batching of concurrent calls (e.g. query embeddings from parallel requests) into one model invocation.
+"""
+
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+import logging
+import threading
+import time
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Collects items submitted from many threads and processes them together.
+
+    A background thread waits for the first item, gathers more for up to
+    ``max_wait_ms`` (or until ``max_batch`` are queued) and calls
+    ``func(items)`` once; each caller blocks until its own result is ready.
+    Under low load a call waits at most ``max_wait_ms`` extra.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[List[Any]], List[Any]],
+        max_batch: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher"
+    ):
+        self.func = func
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self.stats = {"batches": 0, "items": 0}
+        self._pending: List[Tuple[Any, Future]] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, item: Any) -> Any:
+        """Process ``item`` as part of the next batch and return its result."""
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._pending.append((item, future))
+            self._condition.notify()
+        return future.result()
+
+    def _take_batch(self) -> List[Tuple[Any, Future]]:
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            try:
+                results = self.func([item for item, _ in batch])
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            self.stats["batches"] += 1
+            self.stats["items"] += len(batch)
+
+    def close(self) -> None:
+        """Finish the queued items and stop the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+class BatchingEmbeddings(Embeddings):
+    """Embeddings whose ``embed_query`` calls from concurrent requests are
+    computed together in one ``embed_documents`` call."""
+
+    def __init__(self, embeddings: Embeddings, max_batch: int = 32, max_wait_ms: float = 5.0):
+        self.embeddings = embeddings
+        self.batcher = MicroBatcher(
+            embeddings.embed_documents, max_batch=max_batch, max_wait_ms=max_wait_ms, name="embedding-batcher"
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.submit(text)
+
+    def close(self) -> None:
+        self.batcher.close()
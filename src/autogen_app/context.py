@@ -0,0 +1,200 @@
+"""
+Token-budgeted assembly of retrieved documents into tool output.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Set, Tuple
+import logging
+import re
+import threading
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AssembledContext:
+    """Tool output built from retrieved documents, and what it cost."""
+    text: str
+    tokens: int
+    used: int
+    dropped: int = 0
+    duplicates: int = 0
+    truncated: bool = False
+
+def compact_whitespace(text: str) -> str:
+    """Collapse runs of spaces, cap indentation at two spaces and drop blank lines.
+
+    DDL and SDL exports are often padded with alignment whitespace that costs
+    tokens without carrying meaning. Not for text where indentation matters
+    (Python, YAML).
+    """
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        indent = "  " if line[:1] in (" ", "\t") else ""
+        lines.append(indent + re.sub(r"[ \t]+", " ", stripped))
+    return "\n".join(lines)
+
+def _shingles(text: str, size: int = 5) -> Set[Tuple[str, ...]]:
+    words = text.lower().split()
+    return {tuple(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+def _overlap(previous: str, current: str, min_chars: int = 32, max_chars: int = 500) -> int:
+    """Length of the longest prefix of ``current`` that ends ``previous`` (chunk overlap)."""
+    for size in range(min(len(previous), len(current), max_chars), min_chars - 1, -1):
+        if previous.endswith(current[:size]):
+            return size
+    return 0
+
+class ContextAssembler:
+    """Packs retrieved documents, best first, into a token budget.
+
+    With ``compact`` (schema collections) documents are whitespace-compacted
+    first. Documents are dropped if they repeat an earlier one (contained in
+    it, or with word-shingle Jaccard similarity of at least
+    ``dedup_threshold``), after the overlap a chunk shares with the
+    neighbouring chunks of its source is cut. Documents are added in rank
+    order until ``max_tokens`` is reached; the first one that does not fit is
+    truncated if at least ``min_tokens`` remain. Tokens are counted locally
+    with tiktoken, loaded on first use.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 1500,
+        encoding: str = "cl100k_base",
+        dedup_threshold: float = 0.85,
+        min_tokens: int = 64,
+        separator: str = "\n\n",
+        name: str = "context",
+        compact: bool = False
+    ):
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self.min_tokens = min_tokens
+        self.separator = separator
+        self.name = name
+        self.compact = compact
+        self._encoding_name = encoding
+        self._encoding = None
+        self._separator_tokens: Optional[int] = None
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "tokens": 0, "documents": 0, "dropped": 0, "duplicates": 0}
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        max_tokens: int,
+        name: str = "context",
+        compact: bool = False
+    ) -> "ContextAssembler":
+        """Create an assembler from the ``context`` config section with an agent's budget."""
+        return cls(
+            max_tokens=max_tokens,
+            encoding=config.get("encoding", "cl100k_base"),
+            dedup_threshold=config.get("dedup_threshold", 0.85),
+            min_tokens=config.get("min_tokens", 64),
+            name=name,
+            compact=compact
+        )
+
+    @property
+    def encoding(self):
+        """The tiktoken encoding, loaded (and, the first time, downloaded) on first use."""
+        if self._encoding is None:
+            # tiktoken ships with autogen, which uses it for its own token counts
+            import tiktoken
+            with self._lock:
+                if self._encoding is None:
+                    self._encoding = tiktoken.get_encoding(self._encoding_name)
+        return self._encoding
+
+    @property
+    def separator_tokens(self) -> int:
+        if self._separator_tokens is None:
+            self._separator_tokens = self.count_tokens(self.separator)
+        return self._separator_tokens
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def _deduplicate(self, documents: List[Document]) -> Tuple[List[str], int]:
+        texts: List[str] = []
+        kept: List[Tuple[str, Set[Tuple[str, ...]]]] = []
+        # (source, chunk number) -> untrimmed text of the chunks kept so far
+        chunks: Dict[Tuple[Any, int], str] = {}
+        duplicates = 0
+        for document in documents:
+            full = compact_whitespace(document.page_content) if self.compact else document.page_content.strip()
+            source = document.metadata.get("source_id") or document.metadata.get("source")
+            chunk = document.metadata.get("chunk")
+            adjacent = source is not None and isinstance(chunk, int)
+            text_ = full
+            if adjacent:
+                # Cut the overlap shared with the neighbouring chunks of the source
+                previous = chunks.get((source, chunk - 1))
+                if previous is not None:
+                    text_ = text_[_overlap(previous, text_):].lstrip()
+                following = chunks.get((source, chunk + 1))
+                if following is not None:
+                    text_ = text_[:len(text_) - _overlap(text_, following)].rstrip()
+            shingles = _shingles(text_)
+            duplicate = not text_ or any(
+                text_ in previous or (
+                    len(shingles | previous_shingles)
+                    and len(shingles & previous_shingles) / len(shingles | previous_shingles) >= self.dedup_threshold
+                )
+                for previous, previous_shingles in kept
+            )
+            if duplicate:
+                duplicates += 1
+                continue
+            kept.append((text_, shingles))
+            if adjacent:
+                chunks[(source, chunk)] = full
+            texts.append(text_)
+        return texts, duplicates
+
+    def assemble(self, documents: List[Document], max_tokens: Optional[int] = None) -> AssembledContext:
+        """Build tool output from ``documents`` (best first) within the token budget."""
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        texts, duplicates = self._deduplicate(documents)
+        parts: List[str] = []
+        used_tokens = 0
+        truncated = False
+        for text_ in texts:
+            cost = self.count_tokens(text_) + (self.separator_tokens if parts else 0)
+            if used_tokens + cost <= budget:
+                parts.append(text_)
+                used_tokens += cost
+                continue
+            remaining = budget - used_tokens - (self.separator_tokens if parts else 0)
+            if remaining >= self.min_tokens:
+                tokens = self.encoding.encode(text_)[:remaining - 1]
+                parts.append(self.encoding.decode(tokens) + "…")
+                used_tokens = budget
+                truncated = True
+            break
+        result = AssembledContext(
+            text=self.separator.join(parts),
+            tokens=used_tokens,
+            used=len(parts),
+            dropped=len(texts) - len(parts),
+            duplicates=duplicates,
+            truncated=truncated
+        )
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["tokens"] += result.tokens
+            self.stats["documents"] += result.used
+            self.stats["dropped"] += result.dropped
+            self.stats["duplicates"] += result.duplicates
+        logger.info(
+            "%s: injected %d/%d tokens from %d of %d documents (%d duplicates, %d over budget%s)",
+            self.name, result.tokens, budget, result.used, len(documents),
+            result.duplicates, result.dropped, ", truncated" if truncated else ""
+        )
+        return result
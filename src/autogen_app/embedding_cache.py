@@ -0,0 +1,133 @@
+"""
+Two-tier embedding cache (in-process LRU backed by SQLite) keyed by content hash.
+"""
+
+from typing import List, Dict, Optional, Iterable, Tuple
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import logging
+import sqlite3
+import threading
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only changes share a cache entry."""
+    return " ".join(text.split())
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """Bounded LRU of embeddings with an optional on-disk SQLite tier.
+
+    Entries are keyed by (model name, content hash). Lookups that miss the
+    LRU fall through to SQLite and are promoted; writes go to both tiers.
+    """
+
+    def __init__(self, max_entries: int = 10000, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, hash))"
+            )
+            self._db.commit()
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for whichever ``hashes`` are present."""
+        found: Dict[str, List[float]] = {}
+        missing = []
+        with self._lock:
+            for h in hashes:
+                vector = self._lru.get((model, h))
+                if vector is None:
+                    missing.append(h)
+                else:
+                    self._lru.move_to_end((model, h))
+                    found[h] = vector
+            if missing and self._db is not None:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT hash, vector FROM embeddings WHERE model = ? "
+                        f"AND hash IN ({','.join('?' * len(chunk))})",
+                        [model, *chunk]
+                    ).fetchall()
+                    for h, blob in rows:
+                        vector = array("f", blob).tolist()
+                        found[h] = vector
+                        self._put_lru(model, h, vector)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        """Store vectors in both tiers."""
+        with self._lock:
+            for h, vector in items.items():
+                self._put_lru(model, h, vector)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+                    [(model, h, array("f", vector).tobytes()) for h, vector in items.items()]
+                )
+                self._db.commit()
+
+    def _put_lru(self, model: str, h: str, vector: List[float]) -> None:
+        self._lru[(model, h)] = vector
+        self._lru.move_to_end((model, h))
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def close(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only computes vectors for text it has not seen.
+
+    Texts are keyed by their normalized content hash, but the model is given
+    the original text, so formatting-only variants share the vector of
+    whichever variant was embedded first.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [content_hash(t) for t in texts]
+        found = self.cache.get_many(self.model_name, set(hashes))
+        misses = {}
+        for h, t in zip(hashes, texts):
+            if h not in found and h not in misses:
+                misses[h] = t
+        if misses:
+            logger.debug("Embedding %d of %d texts (cache misses)", len(misses), len(texts))
+            vectors = self.embeddings.embed_documents(list(misses.values()))
+            computed = dict(zip(misses.keys(), vectors))
+            self.cache.put_many(self.model_name, computed)
+            found.update(computed)
+        return [found[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        h = content_hash(text)
+        found = self.cache.get_many(self.model_name, [h])
+        if h not in found:
+            found[h] = self.embeddings.embed_query(text)
+            self.cache.put_many(self.model_name, {h: found[h]})
+        return found[h]
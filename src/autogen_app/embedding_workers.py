@@ -0,0 +1,87 @@
+"""
+Process-pool embedding executor for large ingestion jobs.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import logging
+import multiprocessing
+import os
+import threading
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+_worker_embeddings = None
+
+def _init_worker(model_name: str, threads_per_worker: int) -> None:
+    """Load one model copy per worker, pinned to ``threads_per_worker`` threads."""
+    global _worker_embeddings
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads_per_worker)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    import torch
+    torch.set_num_threads(threads_per_worker)
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    _worker_embeddings = HuggingFaceEmbeddings(model_name=model_name)
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    return _worker_embeddings.embed_documents(texts)
+
+class ProcessPoolEmbeddings(Embeddings):
+    """Embeddings computed across a pool of worker processes.
+
+    Texts are split into batches of at most ``batch_size`` that are embedded
+    in parallel and reassembled in input order. The pool starts on first use,
+    so building the object is cheap in processes that never embed documents.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        processes: Optional[int] = None,
+        threads_per_worker: int = 1,
+        batch_size: int = 64
+    ):
+        self.model_name = model_name
+        self.processes = processes or max(1, (os.cpu_count() or 1) // threads_per_worker)
+        self.threads_per_worker = threads_per_worker
+        self.batch_size = batch_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    logger.info(
+                        "Starting %d embedding workers (%d threads each)",
+                        self.processes, self.threads_per_worker
+                    )
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.processes,
+                        # spawn: forking a process with torch threads running can deadlock
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self.model_name, self.threads_per_worker)
+                    )
+        return self._pool
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Spread even small calls across every worker, up to batch_size per task
+        size = max(1, min(self.batch_size, -(-len(texts) // self.processes)))
+        batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+        vectors: List[List[float]] = []
+        for batch_vectors in self.pool.map(_embed_batch, batches):
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
@@ -0,0 +1,253 @@
+"""
+FAISS index helpers: ANN index construction and versioned on-disk snapshots.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+from pathlib import Path
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+import time
+import faiss
+import numpy as np
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+CURRENT_FILE = "CURRENT"
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.jsonl"
+MANIFEST_FILE = "manifest.json"
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+def index_type(config: Optional[Dict[str, Any]]) -> str:
+    """Index type named by a store's ``index`` config section."""
+    kind = (config or {}).get("type", "flat")
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unsupported FAISS index type: {kind}")
+    return kind
+
+def training_points(config: Optional[Dict[str, Any]]) -> int:
+    """Vectors to collect before building an index of this config: FAISS's
+    advice of 39 per IVF list, and 2**pq_nbits for the PQ codebooks (capped
+    by ``train_size``); none for flat and HNSW, which need no training."""
+    config = config or {}
+    kind = index_type(config)
+    if kind in ("flat", "hnsw"):
+        return 0
+    needed = config.get("nlist", 1024) * 39
+    if kind == "ivf_pq":
+        needed = max(needed, 2 ** config.get("pq_nbits", 8))
+    if config.get("train_size"):
+        needed = min(needed, config["train_size"])
+    return needed
+
+def build_index(config: Optional[Dict[str, Any]], vectors: np.ndarray) -> "faiss.Index":
+    """Build (and train, for IVF) an empty index for ``vectors``' dimensionality.
+
+    ``vectors`` is the training sample; IVF indexes need at least ``nlist``
+    of them, so ``nlist`` is lowered to ``sqrt(n)`` for small corpora.
+    """
+    config = config or {}
+    kind = index_type(config)
+    n, d = vectors.shape
+    if kind == "flat":
+        return faiss.IndexFlatL2(d)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(d, config.get("M", 32))
+        index.hnsw.efConstruction = config.get("ef_construction", 200)
+        apply_search_params(index, config)
+        return index
+
+    nlist = config.get("nlist", 1024)
+    if n < nlist:
+        reduced = max(1, int(math.sqrt(n)))
+        logger.warning("Only %d training vectors for nlist=%d; using nlist=%d", n, nlist, reduced)
+        nlist = reduced
+    if kind == "ivf_flat":
+        description = f"IVF{nlist},Flat"
+    else:
+        description = f"IVF{nlist},PQ{config.get('pq_m', 16)}x{config.get('pq_nbits', 8)}"
+    index = faiss.index_factory(d, description)
+    train_size = config.get("train_size")
+    sample = vectors
+    if train_size and n > train_size:
+        sample = vectors[np.random.default_rng(0).choice(n, train_size, replace=False)]
+    start = time.perf_counter()
+    index.train(np.ascontiguousarray(sample, dtype="float32"))
+    logger.info("Trained %s on %d vectors in %.2fs", description, len(sample), time.perf_counter() - start)
+    apply_search_params(index, config)
+    return index
+
+def apply_search_params(index: "faiss.Index", config: Optional[Dict[str, Any]]) -> None:
+    """Set search-time parameters (``ef_search``, ``nprobe``) on an index."""
+    config = config or {}
+    params = faiss.ParameterSpace()
+    kind = index_type(config)
+    if kind == "hnsw" and "ef_search" in config:
+        params.set_index_parameter(index, "efSearch", config["ef_search"])
+    elif kind in ("ivf_flat", "ivf_pq") and "nprobe" in config:
+        params.set_index_parameter(index, "nprobe", config["nprobe"])
+
+def evaluate_index(
+    index: "faiss.Index",
+    database: np.ndarray,
+    queries: np.ndarray,
+    k: int = 4,
+    sweep: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """Measure recall@k and per-query latency of ``index`` against exact search.
+
+    ``database`` must hold the vectors that were added to ``index``. Each
+    entry of ``sweep`` is a set of search parameters (e.g. ``{"efSearch": 64}``)
+    to apply before measuring; the index is left with the last one applied.
+    """
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    exact = faiss.IndexFlatL2(database.shape[1])
+    exact.add(np.ascontiguousarray(database, dtype="float32"))
+    _, truth = exact.search(queries, k)
+
+    params = faiss.ParameterSpace()
+    report = []
+    for setting in sweep or [{}]:
+        for name, value in setting.items():
+            params.set_index_parameter(index, name, value)
+        latencies = []
+        found = []
+        for query in queries:
+            start = time.perf_counter()
+            _, ids = index.search(query.reshape(1, -1), k)
+            latencies.append(time.perf_counter() - start)
+            found.append(ids[0])
+        hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+        latencies.sort()
+        report.append({
+            **setting,
+            "recall": hits / (len(queries) * k),
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+        })
+    return report
+
+def _versions(directory: Path) -> List[int]:
+    return sorted(
+        int(p.name[1:]) for p in directory.glob("v*")
+        if p.is_dir() and p.name[1:].isdigit()
+    )
+
+def current_version(directory: Path) -> Optional[str]:
+    """Name of the snapshot version ``CURRENT`` points at, if any."""
+    current = Path(directory) / CURRENT_FILE
+    if not current.exists():
+        return None
+    return current.read_text().strip() or None
+
+def write_snapshot(
+    directory: Path,
+    index: "faiss.Index",
+    documents: Dict[str, Document],
+    index_to_docstore_id: Dict[int, str],
+    manifest: Dict[str, Any],
+    keep: int = 3
+) -> str:
+    """Write a new snapshot version and atomically make it current.
+
+    Returns the new version name. Only the newest ``keep`` versions are kept.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    existing = _versions(directory)
+    version = f"v{(existing[-1] + 1) if existing else 1}"
+
+    staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=directory))
+    try:
+        faiss.write_index(index, str(staging / INDEX_FILE))
+        with open(staging / DOCSTORE_FILE, "w") as f:
+            for position in range(len(index_to_docstore_id)):
+                doc_id = index_to_docstore_id[position]
+                doc = documents[doc_id]
+                f.write(json.dumps({
+                    "id": doc_id,
+                    "page_content": doc.page_content,
+                    "metadata": doc.metadata
+                }) + "\n")
+        with open(staging / MANIFEST_FILE, "w") as f:
+            json.dump({
+                **manifest,
+                "format": SNAPSHOT_FORMAT,
+                "version": version,
+                "count": len(index_to_docstore_id),
+                "created_at": time.time()
+            }, f, indent=2)
+        os.rename(staging, directory / version)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = directory / f".{CURRENT_FILE}.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, directory / CURRENT_FILE)
+    logger.info("Wrote FAISS snapshot %s/%s", directory, version)
+
+    for old in _versions(directory)[:-keep] if keep > 0 else []:
+        shutil.rmtree(directory / f"v{old}", ignore_errors=True)
+    return version
+
+def _mmap_flags(kind: Optional[str]) -> int:
+    """``read_index`` flags that leave an index of this type's vectors in the
+    page cache: IVF inverted lists are mapped by ``IO_FLAG_MMAP``, the codes
+    of flat and HNSW indexes only by ``IO_FLAG_MMAP_IFC`` (the two cannot be
+    combined)."""
+    if kind in ("flat", "hnsw"):
+        return faiss.IO_FLAG_MMAP_IFC
+    return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+def read_index(
+    directory: Path,
+    version: Optional[str] = None,
+    mmap: bool = True
+) -> Tuple["faiss.Index", Dict[str, Any]]:
+    """Read the index and manifest of a snapshot (the current one by default).
+
+    With ``mmap`` the index is opened memory-mapped and read-only, so every
+    process loading the same snapshot shares one copy of its pages; such an
+    index can be searched but not written to, or cloned.
+    """
+    directory = Path(directory)
+    version = version or current_version(directory)
+    if version is None:
+        raise FileNotFoundError(f"No FAISS snapshot in {directory}")
+    path = directory / version
+
+    with open(path / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+
+    flags = _mmap_flags(manifest.get("index_type")) if mmap else 0
+    return faiss.read_index(str(path / INDEX_FILE), flags), manifest
+
+def read_snapshot(
+    directory: Path,
+    version: Optional[str] = None,
+    mmap: bool = True
+) -> Tuple["faiss.Index", Dict[str, Document], Dict[int, str], Dict[str, Any]]:
+    """Read a snapshot (the current one by default); see ``read_index``."""
+    index, manifest = read_index(directory, version, mmap)
+    path = Path(directory) / manifest["version"]
+
+    documents: Dict[str, Document] = {}
+    index_to_docstore_id: Dict[int, str] = {}
+    with open(path / DOCSTORE_FILE) as f:
+        for position, line in enumerate(f):
+            record = json.loads(line)
+            documents[record["id"]] = Document(
+                page_content=record["page_content"], metadata=record["metadata"]
+            )
+            index_to_docstore_id[position] = record["id"]
+    return index, documents, index_to_docstore_id, manifest
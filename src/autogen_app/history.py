@@ -0,0 +1,154 @@
+"""
+Conversation history windowing: recent turns verbatim, older ones as a rolling summary.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Any, List
+import hashlib
+import logging
+import threading
+import autogen
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_HEADER = "Summary of earlier conversation turns:"
+
+def history_settings(config: Dict[str, Any]) -> Dict[str, Any]:
+    """The ``conversation_config`` section, with ``history_length`` defaulting
+    to ``app_config.app.MAX_HISTORY_LENGTH``."""
+    settings = dict(config.get('conversation_config') or {})
+    max_history = config.get('app_config', {}).get('app', {}).get('MAX_HISTORY_LENGTH')
+    if 'history_length' not in settings and max_history:
+        settings['history_length'] = max_history
+    return settings
+
+def _text(message: Dict[str, Any]) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return " ".join(str(content or "").split())
+
+def _shorten(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + f"… [{len(text) - limit} more chars]"
+
+def _prefix_keys(messages: List[Dict[str, Any]]) -> List[str]:
+    """Key of ``messages[:i + 1]`` for every ``i``, chained so each is cheap."""
+    digest = hashlib.sha256()
+    keys = []
+    for message in messages:
+        calls = ",".join(call.get("id", "") for call in message.get("tool_calls") or [])
+        digest.update(f"{message.get('role')}|{message.get('name')}|{calls}|{_text(message)}\0".encode("utf-8"))
+        keys.append(digest.hexdigest())
+    return keys
+
+class HistoryManager:
+    """Keeps the prompt an agent sends to its LLM at a roughly constant size.
+
+    The first message (the task) and the last ``history_length`` messages
+    are sent verbatim; everything in between is folded into a rolling
+    extractive summary appended to the first message. Tool results outside
+    the latest turn are cut to ``tool_result_chars``. The window never
+    starts on a tool result whose tool call was dropped. Summaries are
+    cached per conversation, so each message is summarized once.
+
+    Install it on an agent with ``attach`` (AutoGen's
+    ``process_all_messages_before_reply`` hook); the stored chat history is
+    left untouched.
+    """
+
+    def __init__(
+        self,
+        history_length: int = 10,
+        tool_result_chars: int = 1500,
+        summary_chars: int = 2000,
+        line_chars: int = 200,
+        max_conversations: int = 256
+    ):
+        self.history_length = max(1, history_length)
+        self.tool_result_chars = tool_result_chars
+        self.summary_chars = summary_chars
+        self.line_chars = line_chars
+        self.max_conversations = max_conversations
+        # key of the messages summarized -> summary lines
+        self._summaries: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "HistoryManager":
+        """Create a manager from the resolved ``conversation_config`` section."""
+        return cls(
+            history_length=config.get('history_length', 10),
+            tool_result_chars=config.get('tool_result_chars', 1500),
+            summary_chars=config.get('summary_chars', 2000)
+        )
+
+    def attach(self, agent: autogen.ConversableAgent) -> None:
+        agent.register_hook("process_all_messages_before_reply", self.process_messages)
+
+    def _summary_line(self, message: Dict[str, Any]) -> str:
+        if message.get("tool_calls"):
+            calls = ", ".join(
+                f"{call['function'].get('name')}({call['function'].get('arguments', '')})"
+                for call in message["tool_calls"]
+            )
+            return _shorten(f"{message.get('name') or message.get('role')} called {calls}", self.line_chars)
+        if message.get("tool_responses") or message.get("role") == "tool":
+            return _shorten(f"tool results: {_text(message)}", self.line_chars)
+        return _shorten(f"{message.get('name') or message.get('role')}: {_text(message)}", self.line_chars)
+
+    def _window_start(self, messages: List[Dict[str, Any]]) -> int:
+        start = max(1, len(messages) - self.history_length)
+        # Keep a tool result together with the message that requested it
+        while start > 1 and (messages[start].get("tool_responses") or messages[start].get("role") == "tool"):
+            start -= 1
+        return start
+
+    def _summary(self, messages: List[Dict[str, Any]], end: int) -> str:
+        """Rolling summary of ``messages[1:end]``, extending the cached one."""
+        # Summaries are keyed by the messages they cover, so one is only ever
+        # extended by the conversation it was made from (sessions share this manager)
+        prefixes = _prefix_keys(messages[:end])
+        with self._lock:
+            done, lines = 1, []
+            for i in range(end, 1, -1):
+                cached = self._summaries.pop(prefixes[i - 1], None)
+                if cached is not None:
+                    done, lines = i, cached
+                    break
+            lines = lines + [self._summary_line(message) for message in messages[done:end]]
+            # Oldest lines go first once the summary is over budget
+            while len(lines) > 1 and sum(len(line) + 1 for line in lines) > self.summary_chars:
+                lines.pop(0)
+            self._summaries[prefixes[end - 1]] = lines
+            while len(self._summaries) > self.max_conversations:
+                self._summaries.popitem(last=False)
+        return "\n".join(f"- {line}" for line in lines)
+
+    def process_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the messages to send: task, rolling summary and recent window."""
+        if not messages:
+            return messages
+        start = self._window_start(messages)
+        window = []
+        last_turn = len(messages) - 1
+        while last_turn > 0 and (messages[last_turn].get("tool_responses") or messages[last_turn].get("role") == "tool"):
+            last_turn -= 1
+        for i, message in enumerate(messages[start:], start=start):
+            content = message.get("content")
+            if i < last_turn and isinstance(content, str) and len(content) > self.tool_result_chars and (
+                message.get("tool_responses") or message.get("role") == "tool"
+            ):
+                message = {**message, "content": _shorten(content, self.tool_result_chars)}
+                if message.get("tool_responses"):
+                    message["tool_responses"] = [
+                        {**response, "content": _shorten(str(response.get("content", "")), self.tool_result_chars)}
+                        for response in message["tool_responses"]
+                    ]
+            window.append(message)
+        if start <= 1:
+            return [messages[0]] + window
+        summary = self._summary(messages, start)
+        first = dict(messages[0])
+        first["content"] = f"{first.get('content') or ''}\n\n{SUMMARY_HEADER}\n{summary}"
+        logger.debug("History: %d messages, %d summarized, %d verbatim", len(messages), start - 1, len(window))
+        return [first] + window
@@ -0,0 +1,243 @@
+"""
+Streaming, batched ingestion of documents into the vector stores.
+
+Usage:
+    python -m autogen_app.ingestion knowledge_base --dir knowledge_base
+    python -m autogen_app.ingestion knowledge_base --jsonl confluence_export.jsonl
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, List, Iterable, Iterator, Optional, Callable
+from pathlib import Path
+import argparse
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+from langchain.schema import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from .vector_store import VectorStore, get_vector_store
+from .registry import get_registry
+from .schema_catalog import SchemaCatalog
+from .sync import SyncPlan, SyncResult
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class IngestionStats:
+    """Progress and throughput of an ingestion run."""
+    documents: int = 0
+    chunks: int = 0
+    batches: int = 0
+    embed_seconds: float = 0.0
+    write_seconds: float = 0.0
+    sync: Optional[SyncResult] = None
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.documents} docs, {self.chunks} chunks in {self.batches} batches, "
+            f"{self.elapsed:.1f}s ({self.chunks_per_second:.1f} chunks/s; "
+            f"embed {self.embed_seconds:.1f}s, write {self.write_seconds:.1f}s)"
+            + (f"; sync: {self.sync}" if self.sync else "")
+        )
+
+def iter_directory(path: str, pattern: str = "**/*.txt") -> Iterator[Document]:
+    """Yield one document per file under ``path``, read lazily."""
+    root = Path(path)
+    for file in sorted(root.glob(pattern)):
+        if file.is_file():
+            yield Document(
+                page_content=file.read_text(encoding="utf-8", errors="replace"),
+                metadata={"source": str(file.relative_to(root))}
+            )
+
+def iter_jsonl(path: str, text_key: str = "page_content") -> Iterator[Document]:
+    """Yield documents from a JSONL export, one object per line.
+
+    ``text_key`` holds the text; a ``metadata`` object is used as-is,
+    otherwise every other key becomes metadata.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record.pop(text_key)
+            metadata = record.pop("metadata", None) or record
+            yield Document(page_content=text, metadata=metadata)
+
+def chunk_documents(
+    documents: Iterable[Document],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100
+) -> Iterator[Document]:
+    """Split documents into overlapping chunks, one document at a time."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    for document in documents:
+        for i, chunk in enumerate(splitter.split_documents([document])):
+            chunk.metadata["chunk"] = i
+            yield chunk
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to ``size`` items."""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def ingest(
+    store: VectorStore,
+    documents: Iterable[Document],
+    batch_size: int = 64,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    max_pending_batches: int = 2,
+    progress: Optional[Callable[[IngestionStats], None]] = None,
+    incremental: bool = False,
+    source_key: str = "source",
+    catalog: Optional[SchemaCatalog] = None
+) -> IngestionStats:
+    """Chunk, embed and write ``documents`` to ``store`` in fixed-size batches.
+
+    Embedding runs in the calling thread and writes in a background thread,
+    connected by a queue of at most ``max_pending_batches`` batches. A slow
+    store therefore blocks embedding instead of letting batches pile up, so
+    memory stays bounded however large the corpus is.
+
+    With ``incremental``, only new or changed documents (by ``source_key``
+    and content hash) are re-chunked and embedded, and sources missing from
+    ``documents`` are deleted; ``stats.sync`` records what changed.
+
+    With a schema ``catalog``, each source document is also parsed into it
+    before chunking (so statements are never split) and the catalog is
+    saved at the end.
+    """
+    stats = IngestionStats()
+    plan = SyncPlan(store, source_key=source_key) if incremental else None
+    if plan is not None:
+        documents = plan.filter(documents)
+    if catalog is not None:
+        catalog.watch(store)
+        documents = catalog.observe(documents)
+    pending: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_pending_batches)
+    errors: List[BaseException] = []
+
+    def writer():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            if errors:
+                continue
+            texts, embeddings, metadatas = item
+            try:
+                start = time.perf_counter()
+                store.add_embeddings(texts, embeddings, metadatas)
+                stats.write_seconds += time.perf_counter() - start
+            except BaseException as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=writer, name="ingestion-writer", daemon=True)
+    thread.start()
+
+    def counted(documents):
+        for document in documents:
+            stats.documents += 1
+            yield document
+
+    try:
+        chunks = chunk_documents(counted(documents), chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        for batch in batched(chunks, batch_size):
+            if errors:
+                break
+            texts = [doc.page_content for doc in batch]
+            start = time.perf_counter()
+            embeddings = store.document_embeddings.embed_documents(texts)
+            stats.embed_seconds += time.perf_counter() - start
+            pending.put((texts, embeddings, [doc.metadata for doc in batch]))
+            stats.chunks += len(batch)
+            stats.batches += 1
+            if progress is not None:
+                progress(stats)
+            elif stats.batches % 10 == 0:
+                logger.info("Ingested %s", stats)
+    finally:
+        pending.put(None)
+        thread.join()
+    if errors:
+        raise errors[0]
+    # Stores that train their index on a sample build it now if the corpus was small
+    store.flush()
+    if plan is not None:
+        stats.sync = plan.finish()
+    if catalog is not None:
+        catalog.save()
+    logger.info("Ingestion finished: %s", stats)
+    return stats
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load documents into a configured vector store")
+    parser.add_argument("store", help="vector store name from the config, e.g. knowledge_base")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", help="directory of text files")
+    source.add_argument("--jsonl", help="JSONL export with one document per line")
+    parser.add_argument("--pattern", default="**/*.txt", help="glob for --dir")
+    parser.add_argument("--text-key", default="page_content", help="text field for --jsonl")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument(
+        "--workers", type=int,
+        help="embed on this many worker processes (overrides embedding_workers)"
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="append everything instead of syncing changed sources only"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    config = get_registry().get_config()
+    store_config = {**config["vector_stores"][args.store]}
+    if args.workers:
+        store_config["embedding_workers"] = {
+            **(store_config.get("embedding_workers") or {}), "processes": args.workers
+        }
+    store = get_vector_store(store_config)
+    catalog = None
+    if store_config.get("schema_catalog"):
+        catalog = get_registry().get_schema_catalog(store_config["schema_catalog"])
+    if args.dir:
+        documents = iter_directory(args.dir, args.pattern)
+    else:
+        documents = iter_jsonl(args.jsonl, args.text_key)
+    try:
+        ingest(
+            store,
+            documents,
+            batch_size=args.batch_size,
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            incremental=not args.full,
+            catalog=catalog
+        )
+        if hasattr(store, "save") and getattr(store, "snapshot_path", None) is not None:
+            store.save()
+    finally:
+        get_registry().close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Embedding models that load on first use.
+"""
+
+from typing import Callable, List, Optional
+import logging
+import threading
+import time
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+class LazyEmbeddings(Embeddings):
+    """Embeddings whose model is built by ``factory`` on the first embed call.
+
+    Loading a sentence-transformers model takes seconds; deferring it keeps
+    constructing stores and agents cheap for processes (CLI tools, workers
+    serving from a snapshot or pgvector with cached query embeddings) that
+    may never embed anything.
+    """
+
+    def __init__(self, factory: Callable[[], Embeddings], name: str = "embeddings"):
+        self.factory = factory
+        self.name = name
+        self._embeddings: Optional[Embeddings] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._embeddings is not None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    start = time.perf_counter()
+                    self._embeddings = self.factory()
+                    logger.info("Loaded %s in %.2fs", self.name, time.perf_counter() - start)
+        return self._embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def close(self) -> None:
+        with self._lock:
+            embeddings, self._embeddings = self._embeddings, None
+        close = getattr(embeddings, "close", None)
+        if callable(close):
+            close()
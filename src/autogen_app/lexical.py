@@ -0,0 +1,109 @@
+"""
+Lexical retrieval (BM25 over an inverted index) and reciprocal rank fusion for hybrid search.
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+import heapq
+import math
+import re
+import threading
+
+_IDENTIFIER = re.compile(r"[A-Za-z0-9_]+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased terms, keeping whole identifiers alongside their parts.
+
+    ``user_id`` yields ``user_id``, ``user`` and ``id``; ``createUser``
+    yields ``createuser``, ``create`` and ``user``. Exact identifiers thus
+    match strongly while natural-language queries still match their parts.
+    """
+    terms = []
+    for identifier in _IDENTIFIER.findall(text):
+        terms.append(identifier.lower())
+        parts = [p.lower() for chunk in identifier.split("_") for p in _CAMEL.findall(chunk)]
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+class BM25Index:
+    """In-memory inverted index scored with Okapi BM25."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = defaultdict(dict)
+        self._lengths: Dict[Hashable, int] = {}
+        self._terms: Dict[Hashable, Tuple[str, ...]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        terms = Counter(tokenize(text))
+        with self._lock:
+            if doc_id in self._lengths:
+                self._remove(doc_id)
+            for term, count in terms.items():
+                self._postings[term][doc_id] = count
+            self._lengths[doc_id] = sum(terms.values())
+            self._terms[doc_id] = tuple(terms)
+            self._total_length += self._lengths[doc_id]
+
+    def add_many(self, documents: Iterable[Tuple[Hashable, str]]) -> None:
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+
+    def remove(self, doc_ids: Iterable[Hashable]) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                if doc_id in self._lengths:
+                    self._remove(doc_id)
+
+    def _remove(self, doc_id: Hashable) -> None:
+        for term in self._terms.pop(doc_id):
+            del self._postings[term][doc_id]
+            if not self._postings[term]:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._lengths.clear()
+            self._terms.clear()
+            self._total_length = 0
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[Hashable, float]]:
+        """Top ``k`` ``(doc_id, score)`` pairs for ``query``, best first."""
+        with self._lock:
+            count = len(self._lengths)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[Hashable, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                    scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None
+) -> List[Tuple[Hashable, float]]:
+    """Fuse ranked lists of ids: each id scores ``sum(weight / (k + rank))``, best first."""
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
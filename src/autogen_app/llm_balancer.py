@@ -0,0 +1,262 @@
+"""
+Load balancing, failover and request hedging across several LLM endpoints.
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, List, Optional
+import contextvars
+import logging
+import random
+import threading
+import time
+from .llm_scheduler import is_retryable
+from .streaming import streaming
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("least_outstanding", "latency")
+
+class Endpoint:
+    """Load and health of one endpoint, as seen from this process."""
+
+    def __init__(self, name: str, weight: float = 1.0, window: int = 100):
+        self.name = name
+        self.weight = weight
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.latencies: deque = deque(maxlen=window)
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.stats = {"requests": 0, "errors": 0, "ejections": 0, "hedges": 0}
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100.0))]
+
+class LoadBalancer:
+    """Picks an endpoint per request and fails over between them.
+
+    With ``least_outstanding`` the endpoint with the fewest requests in
+    flight (per unit of ``weight``) is chosen; with ``latency`` the one with
+    the lowest latency EWMA scaled by its queue. An endpoint with
+    ``failure_threshold`` consecutive transient failures (throttling, 5xx,
+    timeouts) is ejected for ``cooldown_seconds`` and then tried again.
+    Failed requests move to the next best endpoint; errors that would fail
+    anywhere (bad requests) are raised at once.
+
+    With ``hedge_percentile`` set, a request still running after that
+    percentile of its endpoint's recent latencies (at least
+    ``hedge_min_seconds``) is also sent to another endpoint, and whichever
+    answers first wins. Requests whose output is being streamed are not
+    hedged.
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        strategy: str = "least_outstanding",
+        weights: Optional[Dict[str, float]] = None,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_seconds: float = 1.0,
+        min_samples: int = 20,
+        max_hedges: int = 1,
+        latency_alpha: float = 0.2,
+        max_workers: int = 64
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unsupported load balancing strategy: {strategy}")
+        weights = weights or {}
+        self.endpoints = [Endpoint(name, weights.get(name, 1.0)) for name in names]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_seconds = hedge_min_seconds
+        self.min_samples = min_samples
+        self.max_hedges = max_hedges
+        self.latency_alpha = latency_alpha
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        names: List[str],
+        weights: Optional[Dict[str, float]] = None
+    ) -> "LoadBalancer":
+        """Create a balancer from an ``llm.balancing`` config section."""
+        return cls(
+            names,
+            strategy=config.get("strategy", "least_outstanding"),
+            weights=weights,
+            failure_threshold=config.get("failure_threshold", 3),
+            cooldown_seconds=config.get("cooldown_seconds", 30.0),
+            hedge_percentile=config.get("hedge_percentile"),
+            hedge_min_seconds=config.get("hedge_min_seconds", 1.0),
+            min_samples=config.get("min_samples", 20),
+            max_hedges=config.get("max_hedges", 1),
+            max_workers=config.get("max_workers", 64)
+        )
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm")
+        return self._pool
+
+    def _pick(self, exclude: List[int]) -> Optional[int]:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [i for i in range(len(self.endpoints)) if i not in exclude]
+            # With every endpoint ejected, trying one beats failing outright
+            pool = [i for i in candidates if self.endpoints[i].available(now)] or candidates
+            if not pool:
+                return None
+
+            def load(i: int):
+                endpoint = self.endpoints[i]
+                latency = endpoint.latency or 0.0
+                if self.strategy == "latency":
+                    return (latency * (endpoint.outstanding + 1) / endpoint.weight, random.random())
+                return (endpoint.outstanding / endpoint.weight, latency, random.random())
+            chosen = min(pool, key=load)
+            self.endpoints[chosen].outstanding += 1
+            self.endpoints[chosen].stats["requests"] += 1
+            return chosen
+
+    def _record(self, i: int, seconds: float, error: Optional[BaseException]) -> None:
+        with self._lock:
+            endpoint = self.endpoints[i]
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.failures = 0
+                endpoint.latencies.append(seconds)
+                endpoint.latency = seconds if endpoint.latency is None else (
+                    self.latency_alpha * seconds + (1 - self.latency_alpha) * endpoint.latency
+                )
+                return
+            endpoint.stats["errors"] += 1
+            if not is_retryable(error):
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.failure_threshold:
+                endpoint.ejected_until = time.monotonic() + self.cooldown_seconds
+                endpoint.stats["ejections"] += 1
+                logger.warning(
+                    "LLM endpoint %s ejected for %.0fs after %d failures (%s)",
+                    endpoint.name, self.cooldown_seconds, endpoint.failures, type(error).__name__
+                )
+
+    def _submit(self, i: int, request: Callable[[], Any], hedge: bool = False) -> Future:
+        def timed():
+            start = time.perf_counter()
+            try:
+                with span("llm.endpoint", endpoint=self.endpoints[i].name, hedge=hedge):
+                    result = request()
+            except BaseException as e:
+                self._record(i, time.perf_counter() - start, e)
+                raise
+            self._record(i, time.perf_counter() - start, None)
+            return result
+        return self.pool.submit(contextvars.copy_context().run, timed)
+
+    def _hedge_delay(self, i: int) -> Optional[float]:
+        endpoint = self.endpoints[i]
+        with self._lock:
+            if self.hedge_percentile is None or len(endpoint.latencies) < self.min_samples:
+                return None
+            return max(self.hedge_min_seconds, endpoint.percentile(self.hedge_percentile))
+
+    def call(self, requests: List[Callable[[], Any]]) -> Any:
+        """Run one logical request; ``requests[i]()`` sends it to endpoint ``i``."""
+        tried: List[int] = []
+        running: Dict[Future, int] = {}
+        # A hedge would stream a second copy of the answer to the caller
+        max_hedges = 0 if streaming() else self.max_hedges
+        hedges = 0
+        error: Optional[BaseException] = None
+        while True:
+            if not running:
+                i = self._pick(tried)
+                if i is None:
+                    raise error
+                tried.append(i)
+                running[self._submit(i, requests[i])] = i
+            delay = None
+            if hedges < max_hedges and len(tried) < len(self.endpoints) and len(running) == 1:
+                delay = self._hedge_delay(next(iter(running.values())))
+            done, _ = wait(list(running), timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                i = self._pick(tried)
+                if i is not None:
+                    hedges += 1
+                    with self._lock:
+                        self.endpoints[running[next(iter(running))]].stats["hedges"] += 1
+                    logger.info("Hedging slow LLM request on %s", self.endpoints[i].name)
+                    tried.append(i)
+                    running[self._submit(i, requests[i], hedge=True)] = i
+                continue
+            for future in done:
+                i = running.pop(future)
+                try:
+                    # Requests still running elsewhere finish in the background
+                    return future.result()
+                except Exception as e:
+                    error = e
+                    if not is_retryable(e):
+                        raise
+                    logger.warning("LLM endpoint %s failed (%s); failing over", self.endpoints[i].name, type(e).__name__)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                endpoint.name: {
+                    **endpoint.stats,
+                    "outstanding": endpoint.outstanding,
+                    "healthy": endpoint.available(now),
+                    "latency_ewma": endpoint.latency,
+                    "latency_p95": endpoint.percentile(95)
+                }
+                for endpoint in self.endpoints
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+class LoadBalancedClient:
+    """Stands in for an agent's ``OpenAIWrapper``, sending each ``create``
+    through ``balancer`` to one of ``clients`` (one wrapper per endpoint)."""
+
+    def __init__(self, clients: List[Any], balancer: LoadBalancer):
+        self.clients = clients
+        self.balancer = balancer
+
+    def create(self, **config: Any) -> Any:
+        return self.balancer.call([
+            (lambda client=client: client.create(**config)) for client in self.clients
+        ])
+
+    def clear_usage_summary(self) -> None:
+        for client in self.clients:
+            client.clear_usage_summary()
+
+    def __getattr__(self, name: str) -> Any:
+        # Response parsing and usage reporting are the same for every endpoint
+        return getattr(self.clients[0], name)
@@ -0,0 +1,153 @@
+"""
+Completion caches for AutoGen agents' ``client_cache`` (SQLite locally, Redis when shared).
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+from pathlib import Path
+import hashlib
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class CompletionCache(ABC):
+    """Cache implementing AutoGen's ``AbstractCache`` protocol.
+
+    AutoGen computes the key from the request (model, messages,
+    functions/tools, temperature, ...); it is hashed here to a fixed size.
+    AutoGen enters and exits the cache around every lookup, so exiting does
+    not close it; the owning provider calls ``close``.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        return hashlib.sha256(str(key).encode("utf-8")).hexdigest()
+
+    @abstractmethod
+    def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "CompletionCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+    def __deepcopy__(self, memo) -> "CompletionCache":
+        # Copies of an agent's settings must all share one cache
+        return self
+
+class SQLiteCompletionCache(CompletionCache):
+    """On-disk cache with TTL expiry and least-recently-used size eviction."""
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None, max_entries: int = 50000):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        Path(path).mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(Path(path) / "completions.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_completions_accessed ON completions (accessed_at)")
+        self._db.commit()
+
+    def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
+        digest = self._hash(key)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?", (digest,)
+            ).fetchone()
+            if row is None:
+                return default
+            if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._db.execute("DELETE FROM completions WHERE key = ?", (digest,))
+                self._db.commit()
+                return default
+            self._db.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, digest))
+            self._db.commit()
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        blob = pickle.dumps(value)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (self._hash(key), blob, now, now)
+            )
+            self._writes += 1
+            # Evict in bulk every few writes rather than counting rows on each one
+            if self._writes % 100 == 0:
+                self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            self._db.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._db.execute(
+            "DELETE FROM completions WHERE key IN ("
+            "SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+class RedisCompletionCache(CompletionCache):
+    """Cache shared by every worker through Redis; size is bounded by Redis' maxmemory policy."""
+
+    def __init__(self, redis_url: str, ttl_seconds: Optional[float] = None, prefix: str = "autogen_app:completion:"):
+        super().__init__(ttl_seconds)
+        import redis
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(redis_url)
+
+    def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
+        value = self._client.get(self.prefix + self._hash(key))
+        return default if value is None else pickle.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        ttl = int(self.ttl_seconds) if self.ttl_seconds else None
+        self._client.set(self.prefix + self._hash(key), pickle.dumps(value), ex=ttl)
+
+    def close(self) -> None:
+        self._client.close()
+
+def get_completion_cache(config: Optional[Dict[str, Any]]) -> Optional[CompletionCache]:
+    """Factory function to create the completion cache for an ``llm.cache`` section."""
+    if not config:
+        return None
+    backend = config.get("backend", "sqlite")
+    if backend == "none":
+        return None
+    elif backend == "sqlite":
+        return SQLiteCompletionCache(
+            config.get("path", "./cache_seed"),
+            ttl_seconds=config.get("ttl_seconds"),
+            max_entries=config.get("max_entries", 50000)
+        )
+    elif backend == "redis":
+        return RedisCompletionCache(config["redis_url"], ttl_seconds=config.get("ttl_seconds"))
+    else:
+        raise ValueError(f"Unsupported LLM cache backend: {backend}")
@@ -3,19 +3,47 @@ LLM provider interface for different model providers.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import os
-import boto3
-import google.generativeai as genai
-from autogen import OpenAIWrapper
+from .llm_cache import CompletionCache, get_completion_cache
+from .registry import get_registry
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
     
+    cache: Optional[CompletionCache] = None
+    scheduler: Optional["LLMScheduler"] = None
+    
     @abstractmethod
     def get_config(self) -> Dict[str, Any]:
         """Get LLM configuration for AutoGen."""
         pass
+    
+    def attach(self, agent: Any) -> None:
+        """Set up the client of an agent built from ``get_config()``, and its
+        completion cache (AutoGen's ``llm_config`` does not take one)."""
+        if getattr(agent, "client", None) is not None:
+            self.attach_client(agent.client)
+            agent.client_cache = self.cache
+    
+    def attach_client(self, client: Any) -> None:
+        """Send the requests of an ``OpenAIWrapper`` through this provider's
+        scheduler, if one is configured."""
+        if self.scheduler is not None:
+            self.scheduler.attach_client(client)
+    
+    def stats(self) -> Dict[str, Any]:
+        return self.scheduler.snapshot() if self.scheduler is not None else {}
+    
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.close()
+
+def _scheduler(config: Dict[str, Any]) -> Optional["LLMScheduler"]:
+    """The shared scheduler for a model's ``scheduler`` section, if enabled."""
+    if not (config.get('scheduler') or {}).get('enabled'):
+        return None
+    return get_registry().get_llm_scheduler(config)
 
 class BedrockProvider(LLMProvider):
     """Bedrock LLM provider."""
@@ -23,10 +51,26 @@ class BedrockProvider(LLMProvider):
     def __init__(self, config: Dict[str, Any]):
         self.model = config['model']
         self.region = config['region']
+        # SDKs are imported by the provider that needs them, so a Gemini-only
+        # process never loads boto3 and vice versa
+        import boto3
         self.bedrock = boto3.client(
             'bedrock-runtime',
             region_name=self.region
         )
+        self.cache = get_completion_cache(config.get('cache'))
+        self.scheduler = _scheduler(config)
+    
+    def attach_client(self, client: Any) -> None:
+        """Also stream responses while a run's output is being consumed;
+        AutoGen's Bedrock client only calls ``converse``."""
+        from .streaming import StreamingBedrockRuntime
+        # The scheduler may replace the runtime (to turn off SDK retries) before it is wrapped
+        super().attach_client(client)
+        for model_client in getattr(client, "_clients", None) or []:
+            runtime = getattr(model_client, "bedrock_runtime", None)
+            if runtime is not None and not isinstance(runtime, StreamingBedrockRuntime):
+                model_client.bedrock_runtime = StreamingBedrockRuntime(runtime)
     
     def get_config(self) -> Dict[str, Any]:
         return {
@@ -34,8 +78,11 @@ class BedrockProvider(LLMProvider):
                 "model": self.model,
                 "base_url": f"https://bedrock-runtime.{self.region}.amazonaws.com",
                 "api_type": "bedrock",
-                "api_key": os.getenv('AWS_ACCESS_KEY_ID'),
-                "api_secret": os.getenv('AWS_SECRET_ACCESS_KEY')
+                # AutoGen's Bedrock client takes its region from here, not from base_url
+                "aws_region": self.region,
+                "aws_access_key": os.getenv('AWS_ACCESS_KEY_ID'),
+                "aws_secret_key": os.getenv('AWS_SECRET_ACCESS_KEY'),
+                "aws_session_token": os.getenv('AWS_SESSION_TOKEN')
             }]
         }
 
@@ -44,8 +91,11 @@ class GeminiProvider(LLMProvider):
     
     def __init__(self, config: Dict[str, Any]):
         self.api_key = config['api_key']
+        import google.generativeai as genai
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel('gemini-pro')
+        self.cache = get_completion_cache(config.get('cache'))
+        self.scheduler = _scheduler(config)
     
     def get_config(self) -> Dict[str, Any]:
         return {
@@ -57,12 +107,87 @@ class GeminiProvider(LLMProvider):
             }]
         }
 
+class RoutingProvider(LLMProvider):
+    """Several endpoints (Bedrock regions, Gemini) behind one logical model.
+    
+    Each entry of ``llm.endpoints`` overrides the rest of the ``llm``
+    section (``scheduler`` settings are merged), so every endpoint gets its
+    own provider and scheduler. Agents get one config entry per endpoint,
+    and ``attach`` swaps their client for one that balances, fails over and
+    hedges across the endpoints as set in ``llm.balancing``.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        from .llm_balancer import LoadBalancer
+        defaults = {k: v for k, v in config.items() if k not in ('endpoints', 'balancing', 'cache')}
+        self.names: List[str] = []
+        self.providers: List[LLMProvider] = []
+        weights: Dict[str, float] = {}
+        for endpoint in config['endpoints']:
+            endpoint_config = {
+                **defaults,
+                **endpoint,
+                'scheduler': {**(defaults.get('scheduler') or {}), **(endpoint.get('scheduler') or {})}
+            }
+            name = endpoint.get('name') or (
+                f"{endpoint_config['provider']}:{endpoint_config.get('region') or endpoint_config.get('model')}"
+            )
+            endpoint_config['name'] = name
+            self.names.append(name)
+            self.providers.append(get_llm_provider(endpoint_config))
+            weights[name] = endpoint.get('weight', 1.0)
+        self.balancer = LoadBalancer.from_config(config.get('balancing') or {}, self.names, weights)
+        # One completion cache for all endpoints: an answer is reusable whichever endpoint produced it
+        self.cache = get_completion_cache(config.get('cache'))
+    
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            "config_list": [entry for provider in self.providers for entry in provider.get_config()["config_list"]]
+        }
+    
+    def attach(self, agent: Any) -> None:
+        from autogen import OpenAIWrapper
+        from .llm_balancer import LoadBalancedClient
+        if getattr(agent, "client", None) is None:
+            return
+        clients = []
+        for provider in self.providers:
+            client = OpenAIWrapper(**{**agent.llm_config, "config_list": provider.get_config()["config_list"]})
+            provider.attach_client(client)
+            clients.append(client)
+        agent.client = LoadBalancedClient(clients, self.balancer)
+        agent.client_cache = self.cache
+    
+    def stats(self) -> Dict[str, Any]:
+        endpoints = self.balancer.snapshot()
+        for name, provider in zip(self.names, self.providers):
+            if provider.scheduler is not None:
+                endpoints[name]["scheduler"] = provider.scheduler.snapshot()
+        return {"endpoints": endpoints}
+    
+    def close(self) -> None:
+        self.balancer.close()
+        for provider in self.providers:
+            provider.close()
+        super().close()
+
 def get_llm_provider(config: Dict[str, Any]) -> LLMProvider:
     """Factory function to create appropriate LLM provider."""
+    if config.get('endpoints'):
+        return RoutingProvider(config)
     provider = config['provider']
     if provider == 'bedrock':
         return BedrockProvider(config)
     elif provider == 'gemini':
         return GeminiProvider(config)
     else:
-        raise ValueError(f"Unsupported LLM provider: {provider}") 
\ No newline at end of file
+        raise ValueError(f"Unsupported LLM provider: {provider}") 
+
+def llm_settings(config: Dict[str, Any]) -> Dict[str, Any]:
+    """The ``llm`` config section, with the completion cache path defaulting
+    to ``app_config.app.CACHE_SEED_PATH``."""
+    llm = dict(config['llm'])
+    cache_seed_path = config.get('app_config', {}).get('app', {}).get('CACHE_SEED_PATH')
+    if llm.get('cache') and cache_seed_path and 'path' not in llm['cache']:
+        llm['cache'] = {**llm['cache'], 'path': cache_seed_path}
+    return llm
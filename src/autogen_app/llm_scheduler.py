@@ -0,0 +1,380 @@
+"""
+Client-side scheduling of LLM requests: rate limits, adaptive concurrency, retries and priorities.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+import contextvars
+import functools
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first when requests are queued for a slot
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("llm_priority", default="interactive")
+
+@contextmanager
+def llm_priority(priority: str) -> Iterator[None]:
+    """Send the LLM calls made inside the block (and by tools it runs) at ``priority``."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "RESOURCE_EXHAUSTED", "rate_limit_exceeded"}
+TRANSIENT_NAMES = ("Timeout", "Connection", "ServiceUnavailable", "InternalServer", "ServerError")
+
+def _status(error: BaseException) -> Optional[int]:
+    for attribute in ("status_code", "code", "status"):
+        value = getattr(error, attribute, None)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            continue
+        if 100 <= value < 600:
+            return value
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        # botocore ClientError
+        return response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return None
+
+def is_throttle(error: BaseException) -> bool:
+    """Whether ``error`` means the provider is rejecting requests for load (HTTP 429 and equivalents)."""
+    if _status(error) == 429:
+        return True
+    response = getattr(error, "response", None)
+    if isinstance(response, dict) and response.get("Error", {}).get("Code") in THROTTLE_CODES:
+        return True
+    if type(error).__name__ in ("RateLimitError", "ResourceExhausted", "ThrottlingException"):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, str) and code in THROTTLE_CODES
+
+def is_retryable(error: BaseException) -> bool:
+    """Throttling, 5xx responses, timeouts and dropped connections."""
+    if is_throttle(error) or isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = _status(error)
+    if status is not None:
+        return status >= 500 or status == 408
+    return any(part in type(error).__name__ for part in TRANSIENT_NAMES)
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from a ``Retry-After`` header."""
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None)
+    if not headers or not hasattr(headers, "get"):
+        return None
+    try:
+        return max(0.0, float(headers.get("retry-after") or headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+def estimate_tokens(params: Dict[str, Any]) -> int:
+    """Rough token count of a chat request: ~4 characters per prompt token plus
+    the completion budget, which providers such as Bedrock reserve up front."""
+    chars = 0
+    for message in params.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(str(part.get("text", "")) for part in content if isinstance(part, dict))
+        chars += len(str(content or ""))
+        if message.get("tool_calls"):
+            chars += len(str(message["tool_calls"]))
+    chars += len(str(params.get("tools") or ""))
+    return chars // 4 + int(params.get("max_tokens") or 0)
+
+def response_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    if isinstance(usage, dict):
+        return usage.get("total_tokens")
+    return getattr(usage, "total_tokens", None)
+
+def _secret(value: Any) -> Optional[str]:
+    # AutoGen may hand credentials over as pydantic SecretStr
+    value = value.get_secret_value() if hasattr(value, "get_secret_value") else value
+    return value or None
+
+def disable_sdk_retries(model_client: Any) -> None:
+    """Make an AutoGen model client try each request once.
+
+    The SDKs retry throttling themselves (AutoGen builds Bedrock's runtime
+    with five attempts), which would hide 429s from the scheduler until
+    several backoffs later and multiply its own retries and failover.
+    """
+    if hasattr(model_client, "bedrock_runtime") and hasattr(model_client, "_aws_region"):
+        import boto3
+        from botocore.config import Config
+        session = boto3.Session(
+            aws_access_key_id=_secret(model_client._aws_access_key),
+            aws_secret_access_key=_secret(model_client._aws_secret_key),
+            aws_session_token=_secret(model_client._aws_session_token),
+            profile_name=model_client._aws_profile_name
+        )
+        model_client.bedrock_runtime = session.client(
+            "bedrock-runtime",
+            config=Config(
+                region_name=model_client._aws_region,
+                signature_version="v4",
+                retries={"max_attempts": 1, "mode": "standard"},
+                read_timeout=model_client._timeout
+            )
+        )
+    elif hasattr(getattr(model_client, "_oai_client", None), "with_options"):
+        model_client._oai_client = model_client._oai_client.with_options(max_retries=0)
+
+class TokenBucket:
+    """Refills at ``per_minute / 60`` units per second up to ``burst_seconds`` worth.
+
+    ``reserve`` takes the units immediately (the balance may go negative) and
+    returns how long the caller must wait before using them, so concurrent
+    callers queue up in arrival order instead of retrying the bucket.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._balance = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._balance = min(self.capacity, self._balance + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # A request larger than the bucket still goes through, once it is full
+            self._balance -= min(amount, self.capacity)
+            return 0.0 if self._balance >= 0 else -self._balance / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Return (or, if negative, charge) units once the real cost is known."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._balance = min(self.capacity, self._balance + amount)
+
+class AdaptiveLimit:
+    """Concurrency limit adjusted by AIMD: +1 per window of successes, halved on throttling.
+
+    Decreases are at most one per ``cooldown`` seconds, so a burst of 429s
+    from requests already in flight counts as one congestion signal.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        decrease: float = 0.5,
+        cooldown: float = 2.0
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.value = float(max(minimum, min(maximum, initial)))
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return int(self.value)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.value = min(float(self.maximum), self.value + 1.0 / self.value)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.value = max(float(self.minimum), self.value * self.decrease)
+                self._last_decrease = now
+                logger.info("LLM throttled; concurrency limit now %d", self.limit)
+
+class LLMScheduler:
+    """Admission control for one model's requests.
+
+    A request waits for a concurrency slot (interactive before batch, then
+    first come first served), then for the requests/min and tokens/min
+    buckets, and only then reaches the provider. Throttling responses halve
+    the concurrency limit; successes grow it back. Retryable failures are
+    retried up to ``max_retries`` times with full-jitter exponential backoff,
+    or after the provider's ``Retry-After``. Token reservations are corrected
+    with the actual usage from each response.
+    """
+
+    def __init__(
+        self,
+        name: str = "llm",
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        burst_seconds: float = 10.0,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        queue_timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        self.limit = AdaptiveLimit(initial_concurrency, min_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiting: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "failed": 0, "queued_seconds": 0.0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], name: str = "llm") -> "LLMScheduler":
+        """Create a scheduler from an ``llm.scheduler`` config section."""
+        return cls(
+            name=name,
+            requests_per_minute=config.get("requests_per_minute"),
+            tokens_per_minute=config.get("tokens_per_minute"),
+            burst_seconds=config.get("burst_seconds", 10.0),
+            initial_concurrency=config.get("initial_concurrency", 4),
+            min_concurrency=config.get("min_concurrency", 1),
+            max_concurrency=config.get("max_concurrency", 32),
+            max_retries=config.get("max_retries", 5),
+            backoff_base=config.get("backoff_base", 0.5),
+            backoff_max=config.get("backoff_max", 30.0),
+            queue_timeout=config.get("queue_timeout")
+        )
+
+    def _acquire(self, priority: int) -> None:
+        entry = (priority, next(self._sequence))
+        deadline = None if self.queue_timeout is None else time.monotonic() + self.queue_timeout
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while self._waiting[0] != entry or self.in_flight >= self.limit.limit:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"{self.name}: no LLM slot free within {self.queue_timeout}s")
+                    self._condition.wait(remaining)
+            except BaseException:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self.in_flight += 1
+            # The next in line may fit as well
+            self._condition.notify_all()
+
+    def _release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        with self._condition:
+            self.stats[key] += amount
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return delay
+
+    def call(self, func: Callable[[], Any], tokens: int = 0, priority: Optional[str] = None) -> Any:
+        """Run ``func()`` (one provider request of about ``tokens`` tokens) under the limits."""
+        rank = PRIORITIES[priority or _priority.get()]
+        for attempt in range(self.max_retries + 1):
+            queued = time.perf_counter()
+            with span("llm.queue", scheduler=self.name, attempt=attempt):
+                self._acquire(rank)
+                try:
+                    wait = max(
+                        self.requests.reserve(1) if self.requests is not None else 0.0,
+                        self.tokens.reserve(tokens) if self.tokens is not None else 0.0
+                    )
+                    if wait > 0:
+                        time.sleep(wait)
+                except BaseException:
+                    self._release()
+                    raise
+            try:
+                self._count("queued_seconds", time.perf_counter() - queued)
+                self._count("requests")
+                try:
+                    with span("llm.request", endpoint=self.name, attempt=attempt):
+                        response = func()
+                except Exception as e:
+                    throttled = is_throttle(e)
+                    if throttled:
+                        self._count("throttled")
+                        self.limit.on_throttle()
+                    if attempt == self.max_retries or not (throttled or is_retryable(e)):
+                        self._count("failed")
+                        raise
+                    error = e
+                else:
+                    self.limit.on_success()
+                    used = response_tokens(response)
+                    if self.tokens is not None and used is not None:
+                        self.tokens.refund(min(tokens, self.tokens.capacity) - used)
+                    return response
+            finally:
+                self._release()
+            delay = self._backoff(attempt, error)
+            self._count("retries")
+            logger.info(
+                "%s: %s, retry %d/%d in %.1fs", self.name, type(error).__name__, attempt + 1, self.max_retries, delay
+            )
+            time.sleep(delay)
+
+    def wrap(self, create: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+        """Schedule a model client's ``create(params)``."""
+        @functools.wraps(create)
+        def scheduled_create(params: Dict[str, Any]) -> Any:
+            return self.call(lambda: create(params), estimate_tokens(params))
+        scheduled_create.scheduler = self
+        return scheduled_create
+
+    def attach(self, agent: Any) -> None:
+        """Route ``agent``'s LLM requests through this scheduler.
+
+        AutoGen's ``OpenAIWrapper`` keeps one model client per config entry
+        and only calls them on completion-cache misses, so wrapping those
+        leaves cache hits unthrottled.
+        """
+        self.attach_client(getattr(agent, "client", None))
+
+    def attach_client(self, client: Any) -> None:
+        """Route the requests of an ``OpenAIWrapper`` through this scheduler,
+        which then does all of their retrying."""
+        for model_client in getattr(client, "_clients", None) or []:
+            if getattr(model_client.create, "scheduler", None) is None:
+                disable_sdk_retries(model_client)
+                model_client.create = self.wrap(model_client.create)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiting),
+            "concurrency_limit": self.limit.limit
+        }
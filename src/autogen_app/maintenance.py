@@ -0,0 +1,51 @@
+"""
+Maintenance entry point for pgvector collections (index lifecycle after bulk loads).
+
+Usage:
+    autogen-app-maintenance ensure|rebuild|reindex|analyze [--store NAME ...]
+"""
+
+from typing import List, Optional
+import argparse
+import logging
+from .registry import get_registry
+from .vector_store import get_vector_store
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = {
+    "ensure": "ensure_index",
+    "rebuild": "rebuild_index",
+    "reindex": "reindex",
+    "analyze": "analyze",
+}
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Maintain pgvector ANN indexes")
+    parser.add_argument("action", choices=sorted(ACTIONS))
+    parser.add_argument(
+        "--store", action="append", dest="stores",
+        help="vector store name from the config (default: all pgvector stores)"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    config = get_registry().get_config()
+    names = args.stores or [
+        name for name, store in config["vector_stores"].items() if store["type"] == "pgvector"
+    ]
+    try:
+        for name in names:
+            store_config = {**config["vector_stores"][name]}
+            store_config["index"] = {**(store_config.get("index") or {}), "auto_create": False}
+            store = get_vector_store(store_config)
+            logger.info("Running %s on %s", args.action, name)
+            getattr(store, ACTIONS[args.action])()
+            if args.action == "analyze":
+                # ANALYZE covers the shared table, once is enough
+                break
+    finally:
+        get_registry().close()
+
+if __name__ == "__main__":
+    main()
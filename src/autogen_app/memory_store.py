@@ -0,0 +1,365 @@
+"""
+In-memory vector store backed by a FAISS index.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from pathlib import Path
+import logging
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain.schema import Document
+from .faiss_index import (
+    apply_search_params,
+    build_index,
+    current_version,
+    evaluate_index,
+    index_type,
+    read_index,
+    read_snapshot,
+    training_points,
+    write_snapshot
+)
+from .lexical import BM25Index, reciprocal_rank_fusion
+from .registry import get_registry
+from .tracing import span
+from .vector_store import TOMBSTONE, VectorStore
+
+logger = logging.getLogger(__name__)
+
+class MemoryVectorStore(VectorStore):
+    """In-memory vector store using FAISS.
+    
+    The ``index`` config selects a flat (exact), HNSW, IVF-Flat or IVF-PQ
+    index. With ``snapshot_dir`` configured, the index can be saved to a
+    versioned snapshot and is loaded from the current one (memory-mapped,
+    read-only) on construction instead of re-embedding the corpus; the first
+    write reads it into memory.
+    
+    Deleted chunks are removed from flat indexes and tombstoned in the others
+    (HNSW cannot remove vectors, IVF does not renumber the rest); tombstones
+    are filtered out of searches and dropped by ``compact()``, which runs
+    before every snapshot.
+    
+    IVF indexes are trained on the first ``training_points`` vectors added
+    (or on all of them, if fewer, once ``flush`` is called); until then added
+    documents are held back and flushed by any read.
+    
+    With ``hybrid`` enabled, a BM25 inverted index is kept alongside the
+    vectors and searches fuse both rankings with reciprocal rank fusion, so
+    exact identifiers (``user_id``, ``createUser``) rank well.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.embeddings = get_registry().get_embeddings(
+            config["embedding_model"], config.get("embedding_cache")
+        )
+        # Bulk document embedding can run on a process pool (ingestion boxes)
+        self.document_embeddings = self.embeddings
+        if config.get("embedding_workers"):
+            self.document_embeddings = get_registry().get_embeddings(
+                config["embedding_model"], config.get("embedding_cache"), config["embedding_workers"]
+            )
+        self.vectorstore = None
+        # Batches held back until there are enough vectors to train the index
+        self._pending: List[Tuple[List[str], List[List[float]], List[Dict[str, Any]]]] = []
+        self._pending_count = 0
+        self.read_only = False
+        # Snapshot version the index was loaded from
+        self.snapshot_version: Optional[str] = None
+        self.tombstones = 0
+        self.hybrid = config.get("hybrid") or {}
+        self.lexical = None
+        if self.hybrid.get("enabled"):
+            self.lexical = BM25Index(k1=self.hybrid.get("k1", 1.5), b=self.hybrid.get("b", 0.75))
+        if self.snapshot_path is not None and current_version(self.snapshot_path):
+            self.load()
+    
+    @property
+    def snapshot_path(self) -> Optional[Path]:
+        """Directory holding this collection's snapshot versions, if configured."""
+        if not self.config.get("snapshot_dir"):
+            return None
+        return Path(self.config["snapshot_dir"]) / self.config.get("collection_name", "default")
+    
+    def add_documents(self, documents: List[Document]) -> None:
+        texts = [doc.page_content for doc in documents]
+        self.add_embeddings(
+            texts, self.document_embeddings.embed_documents(texts), [doc.metadata for doc in documents]
+        )
+    
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        metadatas = metadatas or [{} for _ in texts]
+        if self.vectorstore is None:
+            self._pending.append((list(texts), list(embeddings), list(metadatas)))
+            self._pending_count += len(texts)
+            if self._pending_count >= training_points(self.config.get("index")):
+                self.flush()
+            return
+        self._make_writable()
+        self._add(texts, embeddings, metadatas)
+    
+    def flush(self) -> None:
+        """Build the index from the vectors held back to train it, however many there are."""
+        if not self._pending:
+            return
+        pending, self._pending, self._pending_count = self._pending, [], 0
+        texts = [text for batch in pending for text in batch[0]]
+        embeddings = [embedding for batch in pending for embedding in batch[1]]
+        metadatas = [metadata for batch in pending for metadata in batch[2]]
+        self.vectorstore = FAISS(
+            embedding_function=self.embeddings,
+            index=build_index(self.config.get("index"), np.array(embeddings, dtype="float32")),
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={}
+        )
+        self._add(texts, embeddings, metadatas)
+    
+    def _add(self, texts: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> None:
+        ids = self.vectorstore.add_embeddings(list(zip(texts, embeddings)), metadatas=metadatas)
+        if self.lexical is not None:
+            self.lexical.add_many(zip(ids, texts))
+        if self._listeners:
+            self._notify_change([
+                Document(page_content=text, metadata=metadata)
+                for text, metadata in zip(texts, metadatas)
+            ])
+    
+    def _make_writable(self) -> None:
+        if self.read_only:
+            # A memory-mapped index can neither be written to nor, with its IVF
+            # lists on disk, cloned: read the snapshot it came from into memory
+            index, _ = read_index(self.snapshot_path, self.snapshot_version, mmap=False)
+            apply_search_params(index, self.config.get("index"))
+            self.vectorstore.index = index
+            self.read_only = False
+    
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        self.flush()
+        if self.vectorstore is None:
+            return []
+        # Embedded here rather than by LangChain so embedding and search are timed apart
+        with span("vector_store.embed", collection=self.collection_name):
+            vector = self.embeddings.embed_query(query)
+        with span("vector_store.search", collection=self.collection_name, k=k):
+            if self.lexical is not None:
+                return self._hybrid_search(query, vector, k)
+            if not self.tombstones:
+                return self.vectorstore.similarity_search_by_vector(vector, k=k)
+            return self.vectorstore.similarity_search_by_vector(
+                vector, k=k, filter=lambda metadata: not metadata.get(TOMBSTONE), fetch_k=k + self.tombstones
+            )
+    
+    def _hybrid_search(self, query: str, embedding: List[float], k: int) -> List[Document]:
+        """Fuse the vector and BM25 rankings of the top candidates."""
+        candidates = max(k, self.hybrid.get("candidates", 20))
+        docstore = self.vectorstore.docstore
+        vector = np.array([embedding], dtype="float32")
+        _, positions = self.vectorstore.index.search(vector, candidates + self.tombstones)
+        semantic = [
+            self.vectorstore.index_to_docstore_id[i] for i in positions[0] if i >= 0
+        ]
+        semantic = [doc_id for doc_id in semantic if not docstore.search(doc_id).metadata.get(TOMBSTONE)]
+        lexical = [doc_id for doc_id, _ in self.lexical.search(query, candidates)]
+        fused = reciprocal_rank_fusion(
+            [semantic[:candidates], lexical],
+            k=self.hybrid.get("rrf_k", 60),
+            weights=[self.hybrid.get("vector_weight", 1.0), self.hybrid.get("lexical_weight", 1.0)]
+        )
+        return [docstore.search(doc_id) for doc_id, _ in fused[:k]]
+    
+    def _live_documents(self) -> List[Document]:
+        """Indexed documents in index order, excluding tombstoned ones."""
+        docstore = self.vectorstore.docstore
+        documents = [
+            docstore.search(self.vectorstore.index_to_docstore_id[i])
+            for i in range(len(self.vectorstore.index_to_docstore_id))
+        ]
+        return [doc for doc in documents if not doc.metadata.get(TOMBSTONE)]
+    
+    def source_hashes(self) -> Dict[str, str]:
+        self.flush()
+        if self.vectorstore is None:
+            return {}
+        return {
+            doc.metadata["source_id"]: doc.metadata.get("content_hash")
+            for doc in self._live_documents() if "source_id" in doc.metadata
+        }
+    
+    def delete_sources(self, source_ids: List[str], keep_hashes: Optional[Dict[str, str]] = None) -> None:
+        self.flush()
+        if self.vectorstore is None:
+            return
+        targets = set(source_ids)
+        keep_hashes = keep_hashes or {}
+        ids = [
+            doc_id for doc_id, doc in self.vectorstore.docstore._dict.items()
+            if doc.metadata.get("source_id") in targets and not doc.metadata.get(TOMBSTONE)
+            and not _is_current(doc, keep_hashes)
+        ]
+        if not ids:
+            return
+        self._notify_change(removed_source_ids=source_ids)
+        if self.lexical is not None:
+            self.lexical.remove(ids)
+        self._make_writable()
+        if isinstance(self.vectorstore.index, faiss.IndexFlat):
+            self.vectorstore.delete(ids)
+            return
+        # HNSW cannot remove vectors, and IVF removes them without renumbering the
+        # rest as FAISS.delete assumes: hide them until the next compaction
+        for doc_id in ids:
+            self.vectorstore.docstore._dict[doc_id].metadata[TOMBSTONE] = True
+        self.tombstones += len(ids)
+        if self.tombstones > self.config.get("compact_ratio", 0.2) * self.vectorstore.index.ntotal:
+            self.compact()
+    
+    def compact(self) -> None:
+        """Rebuild the index without tombstoned documents, from the vectors it
+        already holds (re-embedding only if the index cannot return them)."""
+        if self.vectorstore is None or not self.tombstones:
+            return
+        docstore = self.vectorstore.docstore
+        documents = [
+            docstore.search(self.vectorstore.index_to_docstore_id[i])
+            for i in range(len(self.vectorstore.index_to_docstore_id))
+        ]
+        live = [i for i, doc in enumerate(documents) if not doc.metadata.get(TOMBSTONE)]
+        vectors = _stored_vectors(self.vectorstore.index)
+        trained = _empty_copy(self.vectorstore.index) if vectors is not None else None
+        logger.info("Compacting index: dropping %d tombstones, keeping %d", self.tombstones, len(live))
+        self.vectorstore = None
+        self.read_only = False
+        self.tombstones = 0
+        if self.lexical is not None:
+            self.lexical.clear()
+        if not live:
+            return
+        if vectors is None:
+            self.add_documents([documents[i] for i in live])
+        elif trained is not None:
+            # Re-add to the trained IVF lists rather than retrain on (and, for PQ,
+            # re-quantize) what the codes reconstruct
+            self.vectorstore = FAISS(
+                embedding_function=self.embeddings,
+                index=trained,
+                docstore=InMemoryDocstore(),
+                index_to_docstore_id={}
+            )
+            self._add(
+                [documents[i].page_content for i in live],
+                vectors[live].tolist(),
+                [documents[i].metadata for i in live]
+            )
+        else:
+            self.add_embeddings(
+                [documents[i].page_content for i in live],
+                vectors[live].tolist(),
+                [documents[i].metadata for i in live]
+            )
+        self.flush()
+    
+    def index_report(
+        self,
+        queries: List[str],
+        k: int = 4,
+        sweep: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Recall@k and latency of the configured index versus exact search.
+        
+        ``sweep`` lists search parameter settings to compare, e.g.
+        ``[{"efSearch": 16}, {"efSearch": 64}]`` or ``[{"nprobe": 8}]``.
+        The configured search parameters are restored afterwards.
+        """
+        self.flush()
+        if self.vectorstore is None:
+            return []
+        self.compact()
+        texts = [doc.page_content for doc in self._live_documents()]
+        database = np.array(self.embeddings.embed_documents(texts), dtype="float32")
+        query_vectors = np.array(self.embeddings.embed_documents(queries), dtype="float32")
+        report = evaluate_index(self.vectorstore.index, database, query_vectors, k=k, sweep=sweep)
+        apply_search_params(self.vectorstore.index, self.config.get("index"))
+        return report
+    
+    def save(self) -> str:
+        """Write the index and docstore to a new snapshot version."""
+        if self.snapshot_path is None:
+            raise ValueError("snapshot_dir is not configured for this vector store")
+        self.flush()
+        if self.vectorstore is None:
+            raise ValueError("Cannot snapshot an empty vector store")
+        self.compact()
+        return write_snapshot(
+            self.snapshot_path,
+            self.vectorstore.index,
+            self.vectorstore.docstore._dict,
+            self.vectorstore.index_to_docstore_id,
+            manifest={
+                "embedding_model": self.config["embedding_model"],
+                "index_type": index_type(self.config.get("index")),
+                "dimensions": self.vectorstore.index.d
+            },
+            keep=self.config.get("snapshot_keep", 3)
+        )
+    
+    def load(self, version: Optional[str] = None, mmap: bool = True) -> None:
+        """Replace the in-memory index with a snapshot (the current one by default)."""
+        index, documents, index_to_docstore_id, manifest = read_snapshot(
+            self.snapshot_path, version=version, mmap=mmap
+        )
+        if manifest["embedding_model"] != self.config["embedding_model"]:
+            raise ValueError(
+                f"Snapshot was built with {manifest['embedding_model']}, "
+                f"not {self.config['embedding_model']}"
+            )
+        self.vectorstore = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(documents),
+            index_to_docstore_id=index_to_docstore_id
+        )
+        apply_search_params(index, self.config.get("index"))
+        self._pending, self._pending_count = [], 0
+        self.read_only = mmap
+        self.snapshot_version = manifest["version"]
+        self.tombstones = 0
+        if self.lexical is not None:
+            self.lexical.clear()
+            self.lexical.add_many(
+                (doc_id, doc.page_content) for doc_id, doc in documents.items()
+                if not doc.metadata.get(TOMBSTONE)
+            )
+        self._notify_change(list(documents.values()))
+        logger.info("Loaded %d documents from snapshot %s", index.ntotal, manifest["version"])
+
+def _stored_vectors(index: "faiss.Index") -> Optional[np.ndarray]:
+    """Every vector in ``index``, by position, if it can reconstruct them."""
+    try:
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.make_direct_map()
+        return index.reconstruct_n(0, index.ntotal)
+    except RuntimeError:
+        logger.warning("Index cannot reconstruct its vectors; re-embedding to compact it")
+        return None
+
+def _empty_copy(index: "faiss.Index") -> Optional["faiss.Index"]:
+    """An empty copy of a trained IVF index, keeping its training; None for
+    indexes that need none."""
+    if faiss.try_extract_index_ivf(index) is None:
+        return None
+    copy = faiss.clone_index(index)
+    copy.reset()
+    return copy
+
+def _is_current(document: Document, keep_hashes: Dict[str, str]) -> bool:
+    source_id = document.metadata.get("source_id")
+    return source_id in keep_hashes and document.metadata.get("content_hash") == keep_hashes[source_id]
@@ -0,0 +1,459 @@
+"""
+PostgreSQL vector store using pgvector, with pooled engines shared across collections.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import json
+import logging
+import re
+import uuid
+from sqlalchemy import text
+from sqlalchemy.engine import URL
+from langchain_community.vectorstores import PGVector
+from langchain.schema import Document
+from .vector_store import VectorStore
+from .registry import get_registry
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+_COLLECTION_SQL = text("SELECT uuid FROM langchain_pg_collection WHERE name = :name")
+_VERSION_SQL = text("SELECT cmetadata->>'version' FROM langchain_pg_collection WHERE uuid = :collection_id")
+# Written in the same transaction as every change to the collection's rows
+_BUMP_VERSION_SQL = text(
+    "UPDATE langchain_pg_collection SET cmetadata = "
+    "(COALESCE(cmetadata::jsonb, '{}'::jsonb) || jsonb_build_object('version', CAST(:version AS text)))::json "
+    "WHERE uuid = :collection_id"
+)
+
+ASYNC_DRIVERS = {
+    "asyncpg": "postgresql+asyncpg",
+    "psycopg": "postgresql+psycopg",
+}
+
+def connection_url(config: Dict[str, Any], drivername: str = "postgresql+psycopg2") -> URL:
+    """Build a SQLAlchemy URL for a pgvector store config."""
+    return URL.create(
+        drivername,
+        username=config["user"],
+        password=config["password"],
+        host=config["host"],
+        port=int(config["port"]),
+        database=config["database"],
+    )
+
+def engine_args(config: Dict[str, Any], is_async: bool = False) -> Dict[str, Any]:
+    """Pool settings for ``create_engine``/``create_async_engine`` from a store config."""
+    args = {
+        "pool_size": config.get("pool_size", 5),
+        "max_overflow": config.get("max_overflow", 10),
+        "pool_pre_ping": config.get("pool_pre_ping", True),
+        "pool_recycle": config.get("pool_recycle", 1800),
+    }
+    timeout = config.get("statement_timeout_ms")
+    if timeout:
+        if is_async and config.get("async_driver", "asyncpg") == "asyncpg":
+            args["connect_args"] = {"server_settings": {"statement_timeout": str(timeout)}}
+        else:
+            args["connect_args"] = {"options": f"-c statement_timeout={int(timeout)}"}
+    return args
+
+def vector_literal(embedding: List[float]) -> str:
+    """Render an embedding in pgvector's text input format."""
+    return "[" + ",".join(repr(float(x)) for x in embedding) + "]"
+
+INDEX_METHODS = ("hnsw", "ivfflat")
+
+def _settings_sql(params: Dict[str, int]) -> List[str]:
+    """``SET LOCAL`` statements applying search parameters to the current transaction."""
+    return [f"SET LOCAL {name} = {int(value)}" for name, value in params.items()]
+
+class PGVectorStore(VectorStore):
+    """PostgreSQL vector store using pgvector.
+
+    Stores pointing at the same database with the same pool settings share one
+    SQLAlchemy engine (and one async engine) through the resource registry, so
+    every collection draws from a single connection pool.
+
+    The ``index`` config manages a partial HNSW or IVFFlat index per
+    collection. HNSW is created with the store; IVFFlat is built by
+    ``autogen-app-maintenance ensure`` once the collection is loaded.
+    Searches filter on the collection first, so the planner uses that
+    collection's index, and set ``hnsw.ef_search``/``ivfflat.probes`` for
+    the query's transaction.
+
+    With ``hybrid`` enabled, a partial GIN index over the documents'
+    ``tsvector`` backs a full-text candidate list that is fused with the
+    vector candidates by reciprocal rank fusion in the same query.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.collection_name = config["collection_name"]
+        self.dimensions = int(config.get("dimensions", 384))
+        self.index_config = config.get("index") or {}
+        self.embeddings = get_registry().get_embeddings(
+            config["embedding_model"], config.get("embedding_cache")
+        )
+        self.document_embeddings = self.embeddings
+        if config.get("embedding_workers"):
+            self.document_embeddings = get_registry().get_embeddings(
+                config["embedding_model"], config.get("embedding_cache"), config["embedding_workers"]
+            )
+        url = connection_url(config)
+        self.engine = get_registry().get_engine(url, **engine_args(config))
+        self.vectorstore = PGVector(
+            collection_name=self.collection_name,
+            connection_string=url.render_as_string(hide_password=False),
+            embedding_function=self.embeddings,
+            connection=self.engine
+        )
+        self._collection_id: Optional[uuid.UUID] = None
+        if self.index_config.get("auto_create", True):
+            try:
+                # IVFFlat clusters the rows present when it is built, so it is
+                # left to maintenance after the bulk load
+                self.ensure_index(vector_index=self.index_method == "hnsw")
+            except Exception:
+                logger.exception("Could not create vector index for %s", self.collection_name)
+
+    @property
+    def async_engine(self):
+        """Async engine for this store's database, created on first use."""
+        driver = self.config.get("async_driver", "asyncpg")
+        if driver not in ASYNC_DRIVERS:
+            raise ValueError(f"Unsupported async driver: {driver}")
+        url = connection_url(self.config, ASYNC_DRIVERS[driver])
+        return get_registry().get_async_engine(url, **engine_args(self.config, is_async=True))
+
+    @property
+    def collection_id(self) -> Optional[uuid.UUID]:
+        """UUID of this store's row in ``langchain_pg_collection``."""
+        if self._collection_id is None:
+            with self.engine.connect() as conn:
+                self._collection_id = conn.execute(_COLLECTION_SQL, {"name": self.collection_name}).scalar()
+        return self._collection_id
+
+    @property
+    def index_method(self) -> Optional[str]:
+        """Configured ANN index method, or None for sequential scans."""
+        method = self.index_config.get("type")
+        if method in (None, "none"):
+            return None
+        if method not in INDEX_METHODS:
+            raise ValueError(f"Unsupported pgvector index type: {method}")
+        return method
+
+    @property
+    def index_name(self) -> str:
+        name = re.sub(r"[^a-z0-9_]", "_", self.collection_name.lower())
+        return f"ix_{name}_embedding_{self.index_method}"[:63]
+
+    def add_documents(self, documents: List[Document]) -> None:
+        texts = [doc.page_content for doc in documents]
+        self.add_embeddings(
+            texts, self.document_embeddings.embed_documents(texts), [doc.metadata for doc in documents]
+        )
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """Insert pre-computed embeddings in one executemany round trip.
+
+        SQLAlchemy batches the rows into multi-row INSERT statements
+        ("insertmanyvalues"), instead of one ORM object per row.
+        """
+        if not texts:
+            return
+        table = self.vectorstore.EmbeddingStore.__table__
+        primary_key = table.primary_key.columns.values()[0].name
+        metadatas = metadatas or [{} for _ in texts]
+        rows = []
+        for text_, embedding, metadata in zip(texts, embeddings, metadatas):
+            row_id = str(uuid.uuid4())
+            row = {
+                primary_key: row_id,
+                "collection_id": self.collection_id,
+                "embedding": list(embedding),
+                "document": text_,
+                "cmetadata": metadata
+            }
+            if "custom_id" in table.c and primary_key != "custom_id":
+                row["custom_id"] = row_id
+            rows.append(row)
+        with self.engine.begin() as conn:
+            conn.execute(table.insert(), rows)
+            self._bump_version(conn)
+        if self._listeners:
+            self._notify_change([
+                Document(page_content=text_, metadata=metadata)
+                for text_, metadata in zip(texts, metadatas)
+            ])
+
+    def source_hashes(self) -> Dict[str, str]:
+        if self.collection_id is None:
+            return {}
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    "SELECT DISTINCT cmetadata->>'source_id', cmetadata->>'content_hash' "
+                    "FROM langchain_pg_embedding "
+                    "WHERE collection_id = :collection_id AND cmetadata->>'source_id' IS NOT NULL"
+                ),
+                {"collection_id": self.collection_id}
+            )
+            return {row[0]: row[1] for row in result}
+
+    def delete_sources(self, source_ids: List[str], keep_hashes: Optional[Dict[str, str]] = None) -> None:
+        if not source_ids or self.collection_id is None:
+            return
+        sql = (
+            "DELETE FROM langchain_pg_embedding "
+            "WHERE collection_id = :collection_id AND cmetadata->>'source_id' = ANY(:source_ids)"
+        )
+        params = {"collection_id": self.collection_id, "source_ids": list(source_ids)}
+        if keep_hashes:
+            sql += (
+                " AND cmetadata->>'content_hash' IS DISTINCT FROM "
+                "(CAST(:keep_hashes AS jsonb) ->> (cmetadata->>'source_id'))"
+            )
+            params["keep_hashes"] = json.dumps(keep_hashes)
+        with self.engine.begin() as conn:
+            conn.execute(text(sql), params)
+            self._bump_version(conn)
+        self._notify_change(removed_source_ids=source_ids)
+
+    def data_version(self) -> Optional[str]:
+        """Version stamped on the collection row by every write, from any process."""
+        if self.collection_id is None:
+            return None
+        with self.engine.connect() as conn:
+            return conn.execute(_VERSION_SQL, {"collection_id": self.collection_id}).scalar()
+
+    def _bump_version(self, conn) -> None:
+        conn.execute(_BUMP_VERSION_SQL, {"version": uuid.uuid4().hex, "collection_id": self.collection_id})
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        with span("vector_store.embed", collection=self.collection_name):
+            embedding = self.embeddings.embed_query(query)
+        if self.collection_id is None:
+            return []
+        with span("vector_store.search", collection=self.collection_name, k=k), self.engine.begin() as conn:
+            for statement in _settings_sql(self._search_params()):
+                conn.execute(text(statement))
+            result = conn.execute(text(self._search_sql()), self._search_bindings(query, embedding, k))
+            return [Document(page_content=row[0], metadata=row[1] or {}) for row in result]
+
+    def batch_key(self) -> Optional[Any]:
+        return (id(self.engine), self.dimensions)
+
+    @classmethod
+    def search_batch(cls, searches: List[Tuple["PGVectorStore", str, int]]) -> List[List[Document]]:
+        """Run ``(store, query, k)`` searches in one SQL statement.
+
+        Each distinct query is embedded once per embedding model. Every
+        collection keeps its own top ``k`` through a UNION ALL of
+        per-collection subqueries, so each still uses its partial indexes;
+        search parameters are set to the largest any of the stores asks for.
+        """
+        if len({store.batch_key() for store, _, _ in searches}) > 1:
+            raise ValueError("Batched searches must share one engine and embedding size")
+        vectors: Dict[Tuple[int, str], List[float]] = {}
+        parts, params, settings = [], {}, {}
+        for i, (store, query, k) in enumerate(searches):
+            if store.collection_id is None:
+                continue
+            key = (id(store.embeddings), query)
+            if key not in vectors:
+                with span("vector_store.embed", collection=store.collection_name):
+                    vectors[key] = store.embeddings.embed_query(query)
+            params.update(store._search_bindings(query, vectors[key], k, suffix=f"_{i}"))
+            parts.append(f"SELECT {i} AS search, * FROM ({store._search_sql(suffix=f'_{i}')}) AS s{i}")
+            for name, value in store._search_params().items():
+                settings[name] = max(value, settings.get(name, value))
+        results: List[List[Document]] = [[] for _ in searches]
+        if not parts:
+            return results
+        with span("vector_store.search", collections=len(parts)), searches[0][0].engine.begin() as conn:
+            for statement in _settings_sql(settings):
+                conn.execute(text(statement))
+            sql = " UNION ALL ".join(parts) + " ORDER BY search, distance"
+            for row in conn.execute(text(sql), params):
+                results[row[0]].append(Document(page_content=row[1], metadata=row[2] or {}))
+        return results
+
+    @classmethod
+    def search_many(cls, stores: List["PGVectorStore"], query: str, k: int = 4) -> Dict[str, List[Document]]:
+        """Search several collections for ``query`` in one round trip, grouped by collection name."""
+        results = cls.search_batch([(store, query, k) for store in stores])
+        return {store.collection_name: documents for store, documents in zip(stores, results)}
+
+    async def asimilarity_search(self, query: str, k: int = 4) -> List[Document]:
+        with span("vector_store.embed", collection=self.collection_name):
+            embedding = await asyncio.to_thread(self.embeddings.embed_query, query)
+        with span("vector_store.search", collection=self.collection_name, k=k):
+            async with self.async_engine.begin() as conn:
+                if self._collection_id is None:
+                    result = await conn.execute(_COLLECTION_SQL, {"name": self.collection_name})
+                    self._collection_id = result.scalar()
+                    if self._collection_id is None:
+                        return []
+                for statement in _settings_sql(self._search_params()):
+                    await conn.execute(text(statement))
+                result = await conn.execute(text(self._search_sql()), self._search_bindings(query, embedding, k))
+                return [Document(page_content=row[0], metadata=row[1] or {}) for row in result]
+
+    @property
+    def hybrid(self) -> Dict[str, Any]:
+        """Hybrid (full-text + vector) search settings; empty when disabled."""
+        hybrid = self.config.get("hybrid") or {}
+        return hybrid if hybrid.get("enabled") else {}
+
+    def _search_params(self) -> Dict[str, int]:
+        """Configured search-time index parameters."""
+        if self.index_method == "hnsw" and "ef_search" in self.index_config:
+            return {"hnsw.ef_search": int(self.index_config["ef_search"])}
+        if self.index_method == "ivfflat" and "probes" in self.index_config:
+            return {"ivfflat.probes": int(self.index_config["probes"])}
+        return {}
+
+    def _search_bindings(self, query: str, embedding: List[float], k: int, suffix: str = "") -> Dict[str, Any]:
+        bindings = {f"embedding{suffix}": vector_literal(embedding), f"k{suffix}": k}
+        if self.hybrid:
+            bindings[f"query{suffix}"] = query
+            bindings[f"candidates{suffix}"] = max(k, int(self.hybrid.get("candidates", 20)))
+        return bindings
+
+    def _search_sql(self, suffix: str = "") -> str:
+        """Search returning ``document, cmetadata, distance`` (lower is better).
+
+        Bind parameter names end in ``suffix`` so several searches can share
+        one statement. The collection id is inlined (it is a UUID read from
+        our own table) so the predicate matches the partial indexes even
+        under generic plans.
+        """
+        collection = f"collection_id = '{uuid.UUID(str(self.collection_id))}'::uuid"
+        distance = f"embedding::vector({self.dimensions}) <=> CAST(:embedding{suffix} AS vector({self.dimensions}))"
+        if not self.hybrid:
+            return (
+                f"SELECT document, cmetadata, {distance} AS distance FROM langchain_pg_embedding "
+                f"WHERE {collection} ORDER BY {distance} LIMIT :k{suffix}"
+            )
+        # Reciprocal rank fusion of the vector and full-text candidate lists;
+        # the fused score is negated so that, like a distance, lower is better.
+        primary_key = self.vectorstore.EmbeddingStore.__table__.primary_key.columns.values()[0].name
+        document = f"to_tsvector('{self._text_search_config}', document)"
+        return (
+            "WITH semantic AS ("
+            "SELECT id, row_number() OVER (ORDER BY distance) AS rank FROM ("
+            f"SELECT {primary_key} AS id, {distance} AS distance FROM langchain_pg_embedding "
+            f"WHERE {collection} ORDER BY {distance} LIMIT :candidates{suffix}) AS v), "
+            "lexical AS ("
+            f"SELECT {primary_key} AS id, row_number() OVER (ORDER BY ts_rank_cd({document}, q) DESC) AS rank "
+            f"FROM langchain_pg_embedding, plainto_tsquery('{self._text_search_config}', :query{suffix}) AS q "
+            f"WHERE {collection} AND {document} @@ q "
+            f"ORDER BY ts_rank_cd({document}, q) DESC LIMIT :candidates{suffix}), "
+            "fused AS ("
+            "SELECT id, SUM(weight / (rank + "
+            f"{float(self.hybrid.get('rrf_k', 60))})) AS score FROM ("
+            f"SELECT id, rank, {float(self.hybrid.get('vector_weight', 1.0))} AS weight FROM semantic "
+            f"UNION ALL SELECT id, rank, {float(self.hybrid.get('lexical_weight', 1.0))} FROM lexical) AS r "
+            "GROUP BY id) "
+            "SELECT e.document, e.cmetadata, -f.score AS distance "
+            f"FROM fused AS f JOIN langchain_pg_embedding AS e ON e.{primary_key} = f.id "
+            f"ORDER BY f.score DESC LIMIT :k{suffix}"
+        )
+
+    @property
+    def _text_search_config(self) -> str:
+        # Interpolated into SQL, so only plain configuration names are accepted
+        name = self.hybrid.get("text_search_config", "simple")
+        if not re.fullmatch(r"[a-z_]+", name):
+            raise ValueError(f"Invalid text search configuration: {name}")
+        return name
+
+    def ensure_index(self, vector_index: bool = True) -> None:
+        """Create this collection's ANN index (plus source id and, for hybrid
+        search, full-text indexes) if missing.
+
+        An IVFFlat index is only built once the collection has ``lists * 39``
+        rows to train its lists on; until then searches scan the collection.
+        """
+        if self.collection_id is None:
+            return
+        name = re.sub(r"[^a-z0-9_]", "_", self.collection_name.lower())
+        self._execute_autocommit(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {f'ix_{name}_source_id'[:63]} "
+            "ON langchain_pg_embedding ((cmetadata->>'source_id')) "
+            f"WHERE collection_id = '{uuid.UUID(str(self.collection_id))}'::uuid"
+        )
+        if self.hybrid:
+            self._execute_autocommit(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {f'ix_{name}_document_fts'[:63]} "
+                f"ON langchain_pg_embedding USING gin (to_tsvector('{self._text_search_config}', document)) "
+                f"WHERE collection_id = '{uuid.UUID(str(self.collection_id))}'::uuid"
+            )
+        if self.index_method is None or not vector_index:
+            return
+        if self.index_method == "hnsw":
+            options = (
+                f"m = {int(self.index_config.get('m', 16))}, "
+                f"ef_construction = {int(self.index_config.get('ef_construction', 64))}"
+            )
+        else:
+            lists = int(self.index_config.get("lists", 100))
+            rows = self.row_count()
+            if rows < lists * 39:
+                logger.warning(
+                    "Not building %s: %d rows is too few to train %d lists (needs %d)",
+                    self.index_name, rows, lists, lists * 39
+                )
+                return
+            options = f"lists = {lists}"
+        statement = (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.index_name} "
+            f"ON langchain_pg_embedding USING {self.index_method} "
+            f"((embedding::vector({self.dimensions})) vector_cosine_ops) WITH ({options}) "
+            f"WHERE collection_id = '{uuid.UUID(str(self.collection_id))}'::uuid"
+        )
+        logger.info("Ensuring vector index %s", self.index_name)
+        self._execute_autocommit(statement)
+
+    def row_count(self) -> int:
+        """Number of embeddings stored in this collection."""
+        if self.collection_id is None:
+            return 0
+        with self.engine.connect() as conn:
+            return conn.execute(
+                text("SELECT count(*) FROM langchain_pg_embedding WHERE collection_id = :collection_id"),
+                {"collection_id": self.collection_id}
+            ).scalar()
+
+    def drop_index(self) -> None:
+        """Drop this collection's ANN index."""
+        if self.index_method is not None:
+            self._execute_autocommit(f"DROP INDEX CONCURRENTLY IF EXISTS {self.index_name}")
+
+    def rebuild_index(self) -> None:
+        """Drop and re-create the index, e.g. with new build parameters or after
+        a bulk load that changed the data distribution (IVFFlat centroids)."""
+        self.drop_index()
+        self.ensure_index()
+
+    def reindex(self) -> None:
+        """Rebuild the index in place without blocking reads or writes."""
+        if self.index_method is not None:
+            self._execute_autocommit(f"REINDEX INDEX CONCURRENTLY {self.index_name}")
+
+    def analyze(self) -> None:
+        """Refresh planner statistics after bulk loads."""
+        self._execute_autocommit("ANALYZE langchain_pg_embedding")
+
+    def _execute_autocommit(self, statement: str) -> None:
+        # CONCURRENTLY index operations cannot run inside a transaction block
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(statement))
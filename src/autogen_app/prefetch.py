@@ -0,0 +1,176 @@
+"""
+Speculative retrieval from every collection while the supervisor's first LLM call is in flight.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+import contextvars
+import functools
+import logging
+import threading
+import numpy as np
+from .registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PrefetchBatch:
+    """Retrievals started for one request, keyed by tool name."""
+    query: str
+    futures: Dict[str, Future]
+    prefetcher: "Prefetcher"
+    hits: int = 0
+    misses: int = 0
+    _vector: Optional[np.ndarray] = field(default=None, repr=False)
+    # Outcome of each (tool, query) looked up, so the batch hook and the tool
+    # it falls back to share one lookup
+    _served: Dict[Tuple[str, str], Optional[str]] = field(default_factory=dict, repr=False)
+
+    def serve(self, name: str, query: str) -> Optional[str]:
+        """Return the prefetched result for ``name`` if it answers ``query``."""
+        key = (name, query)
+        if key not in self._served:
+            self._served[key] = self._serve(name, query)
+        return self._served[key]
+
+    def _serve(self, name: str, query: str) -> Optional[str]:
+        future = self.futures.get(name)
+        if future is None or not self.prefetcher.matches(self, query):
+            self.misses += 1
+            return None
+        try:
+            result = future.result(timeout=self.prefetcher.timeout)
+        except FutureTimeoutError:
+            logger.warning("Prefetch for %s timed out; searching directly", name)
+            self.misses += 1
+            return None
+        except Exception:
+            logger.exception("Prefetch for %s failed; searching directly", name)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+# Prefetch batch of the request being handled in this context
+_active: contextvars.ContextVar[Optional[PrefetchBatch]] = contextvars.ContextVar(
+    "autogen_app_prefetch", default=None
+)
+
+def prefetched(name: str, query: str) -> Optional[str]:
+    """Result of tool ``name`` for ``query`` from the active prefetch batch, if it applies."""
+    batch = _active.get()
+    return batch.serve(name, query) if batch is not None else None
+
+def serve_prefetched(function_map: Dict[str, Callable[..., str]]) -> Dict[str, Callable[..., str]]:
+    """Wrap retrieval tools so they answer from the active prefetch batch when it applies."""
+    def wrap(name: str, func: Callable[..., str]) -> Callable[..., str]:
+        @functools.wraps(func)
+        def tool(query: str) -> str:
+            result = prefetched(name, query)
+            return result if result is not None else func(query)
+        return tool
+    return {name: wrap(name, func) for name, func in function_map.items()}
+
+class Prefetcher:
+    """Starts every retrieval tool on the user's query as soon as it arrives.
+
+    Results land in a per-request batch that ``serve_prefetched`` tools read
+    through a context variable, so vector latency overlaps the first LLM
+    call. A tool call is served from the batch when its query matches the
+    user's: ``exact`` (after normalizing case and whitespace), ``semantic``
+    (cosine similarity of at least ``threshold``) or ``any``. Otherwise the
+    tool searches as usual.
+    """
+
+    def __init__(
+        self,
+        function_map: Dict[str, Callable[..., str]],
+        match: str = "semantic",
+        threshold: float = 0.8,
+        timeout: float = 10.0,
+        embeddings=None
+    ):
+        if match not in ("exact", "semantic", "any"):
+            raise ValueError(f"Unsupported prefetch match mode: {match}")
+        if match == "semantic" and embeddings is None:
+            raise ValueError("Semantic prefetch matching needs an embedding model")
+        self.function_map = function_map
+        self.match = match
+        self.threshold = threshold
+        self.timeout = timeout
+        self.embeddings = embeddings
+        self.stats = {"requests": 0, "hits": 0, "misses": 0}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, function_map: Dict[str, Callable[..., str]], config: Dict[str, Any]) -> "Prefetcher":
+        """Create a prefetcher from the ``prefetch`` config section."""
+        match = config.get("match", "semantic")
+        embeddings = None
+        if match == "semantic":
+            embeddings = get_registry().get_embeddings(
+                config.get("embedding_model", "all-MiniLM-L6-v2"), config.get("embedding_cache")
+            )
+        return cls(
+            function_map,
+            match=match,
+            threshold=config.get("threshold", 0.8),
+            timeout=config.get("timeout", 10.0),
+            embeddings=embeddings
+        )
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=len(self.function_map), thread_name_prefix="prefetch"
+                    )
+        return self._pool
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.array(self.embeddings.embed_query(text), dtype="float32")
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def matches(self, batch: PrefetchBatch, query: str) -> bool:
+        """Whether a tool call for ``query`` can use the batch's results."""
+        if self.match == "any" or " ".join(query.lower().split()) == " ".join(batch.query.lower().split()):
+            return True
+        if self.match == "exact":
+            return False
+        if batch._vector is None:
+            batch._vector = self._embed(batch.query)
+        return float(batch._vector @ self._embed(query)) >= self.threshold
+
+    @contextmanager
+    def prefetch(self, query: str) -> Iterator[PrefetchBatch]:
+        """Start retrieval for ``query`` and serve it to tools called inside the block."""
+        # Each search runs in a copy of the caller's context (so its spans keep
+        # their parent), taken before this batch is active so it cannot serve itself
+        futures = {
+            name: self.pool.submit(contextvars.copy_context().run, func, query)
+            for name, func in self.function_map.items()
+        }
+        batch = PrefetchBatch(query, futures, self)
+        token = _active.set(batch)
+        try:
+            yield batch
+        finally:
+            _active.reset(token)
+            for future in futures.values():
+                future.cancel()
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["hits"] += batch.hits
+                self.stats["misses"] += batch.misses
+            logger.info("Prefetch for %r: %d served, %d searched directly", query, batch.hits, batch.misses)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
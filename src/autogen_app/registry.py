@@ -0,0 +1,180 @@
+"""
+Process-wide registry of shared resources (config, embedding models, LLM providers and schedulers, DB engines, schema catalogs).
+"""
+
+from typing import Dict, Any, Optional, Callable
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class ResourceRegistry:
+    """Thread-safe, lazily initialised cache of expensive shared resources.
+
+    Every resource is created on first request and handed out to all later
+    callers, so the embedding model, LLM clients and parsed config are loaded
+    once per process instead of once per agent or vector store.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._resources: Dict[tuple, Any] = {}
+        self._embedding_batching: Optional[Dict[str, Any]] = None
+
+    def _get_or_create(self, key: tuple, factory: Callable[[], Any]) -> Any:
+        resource = self._resources.get(key)
+        if resource is not None:
+            return resource
+        with self._lock:
+            resource = self._resources.get(key)
+            if resource is None:
+                logger.info("Creating shared resource: %s", key)
+                resource = factory()
+                self._resources[key] = resource
+            return resource
+
+    def get_config(self) -> Dict[str, Any]:
+        """Get the parsed application config, loading it on first use."""
+        from .vector_store import load_config
+        return self._get_or_create(("config",), load_config)
+
+    def configure_embedding_batching(self, config: Optional[Dict[str, Any]]) -> None:
+        """Batch concurrent query embeddings (``max_batch``, ``max_wait_ms``) for
+        embedding models created from now on; used by the HTTP server."""
+        self._embedding_batching = config or None
+
+    def get_embeddings(
+        self,
+        model_name: str,
+        cache_config: Optional[Dict[str, Any]] = None,
+        workers_config: Optional[Dict[str, Any]] = None
+    ):
+        """Get the embedding model for ``model_name``; the model itself is only
+        loaded on the first embed call.
+
+        With ``workers_config`` (``processes``, ``threads_per_worker``,
+        ``batch_size``) embeddings are computed on a process pool instead of
+        in this process. With ``cache_config`` (``max_entries``, ``path``) the
+        model is wrapped in a content-hash keyed embedding cache.
+        """
+        if workers_config:
+            def factory():
+                from .embedding_workers import ProcessPoolEmbeddings
+                return ProcessPoolEmbeddings(model_name, **workers_config)
+            key = ("embedding_workers", model_name, _config_key(workers_config))
+        elif self._embedding_batching:
+            batching = self._embedding_batching
+            def factory():
+                from .batching import BatchingEmbeddings
+                return BatchingEmbeddings(_lazy_huggingface(model_name), **batching)
+            key = ("batching_embeddings", model_name, _config_key(batching))
+        else:
+            def factory():
+                return _lazy_huggingface(model_name)
+            key = ("embeddings", model_name)
+        embeddings = self._get_or_create(key, factory)
+        if not cache_config:
+            return embeddings
+
+        def cache_factory():
+            from .embedding_cache import EmbeddingCache
+            return EmbeddingCache(**cache_config)
+        cache = self._get_or_create(("embedding_cache", _config_key(cache_config)), cache_factory)
+
+        def cached_factory():
+            from .embedding_cache import CachedEmbeddings
+            return CachedEmbeddings(embeddings, model_name, cache)
+        return self._get_or_create(("cached_embeddings", key, _config_key(cache_config)), cached_factory)
+
+    def get_llm_provider(self, config: Dict[str, Any]):
+        """Get the LLM provider for an ``llm`` config section."""
+        def factory():
+            from .llm_provider import get_llm_provider
+            return get_llm_provider(config)
+        return self._get_or_create(("llm", _config_key(config)), factory)
+
+    def get_llm_scheduler(self, config: Dict[str, Any]):
+        """Get the request scheduler for an ``llm`` config section, shared by
+        every agent calling that model."""
+        def factory():
+            from .llm_scheduler import LLMScheduler
+            return LLMScheduler.from_config(
+                config.get("scheduler") or {}, name=config.get("name") or config.get("model", "llm")
+            )
+        return self._get_or_create(("llm_scheduler", _config_key(config)), factory)
+
+    def get_schema_catalog(self, config: Dict[str, Any]):
+        """Get the schema catalog for a vector store's ``schema_catalog`` section,
+        shared by ingestion and the agents in this process."""
+        def factory():
+            from .schema_catalog import SchemaCatalog
+            return SchemaCatalog.from_config(config)
+        return self._get_or_create(("schema_catalog", _config_key(config)), factory)
+
+    def get_engine(self, url, **engine_args):
+        """Get the pooled SQLAlchemy engine for ``url`` and pool settings."""
+        def factory():
+            from sqlalchemy import create_engine
+            return create_engine(url, **engine_args)
+        return self._get_or_create(("engine", _url_key(url), _config_key(engine_args)), factory)
+
+    def get_async_engine(self, url, **engine_args):
+        """Get the pooled async SQLAlchemy engine for ``url`` and pool settings."""
+        def factory():
+            from sqlalchemy.ext.asyncio import create_async_engine
+            return create_async_engine(url, **engine_args)
+        return self._get_or_create(("async_engine", _url_key(url), _config_key(engine_args)), factory)
+
+    def close(self) -> None:
+        """Release all resources; later calls re-create them lazily."""
+        with self._lock:
+            resources = list(self._resources.items())
+            self._resources.clear()
+        for key, resource in reversed(resources):
+            if hasattr(resource, "sync_engine"):
+                resource = resource.sync_engine
+            close = getattr(resource, "dispose", None) or getattr(resource, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception:
+                    logger.exception("Error closing shared resource: %s", key)
+
+def _lazy_huggingface(model_name: str):
+    """HuggingFace embeddings for ``model_name``, loaded on the first embed call."""
+    from .lazy import LazyEmbeddings
+    def load():
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model_name)
+    return LazyEmbeddings(load, name=model_name)
+
+def _config_key(config: Dict[str, Any]) -> str:
+    """Stable, hashable key for a (possibly nested) config dict."""
+    return json.dumps(config, sort_keys=True, default=str)
+
+def _url_key(url) -> str:
+    """Registry key for a database URL, including the password."""
+    if hasattr(url, "render_as_string"):
+        return url.render_as_string(hide_password=False)
+    return str(url)
+
+_registry: Optional[ResourceRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> ResourceRegistry:
+    """Get the process-wide resource registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ResourceRegistry()
+    return _registry
+
+def reset_registry() -> None:
+    """Close the process-wide registry and release everything it holds."""
+    global _registry
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        registry.close()
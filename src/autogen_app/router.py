@@ -0,0 +1,145 @@
+"""
+Embedding-based router that sends single-domain questions straight to one tool.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+import threading
+import numpy as np
+from .registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+# Label for examples that should always go through the supervisor
+SUPERVISOR = "supervisor"
+
+@dataclass
+class RouteDecision:
+    """Outcome of routing one query."""
+    query: str
+    route: Optional[str]
+    score: float
+    scores: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def routed(self) -> bool:
+        return self.route is not None
+
+class EmbeddingRouter:
+    """Classifies queries against labelled examples with the shared embedding model.
+
+    ``centroid`` compares the query with each label's mean example vector;
+    ``knn`` takes a similarity-weighted vote of the ``k`` nearest examples.
+    A query is routed only if the best label is a tool, its similarity is at
+    least ``threshold`` and it beats the runner-up by ``margin``; otherwise
+    the decision is to fall back to the supervisor.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        examples: Dict[str, List[str]],
+        method: str = "centroid",
+        threshold: float = 0.6,
+        margin: float = 0.05,
+        k: int = 5
+    ):
+        if method not in ("centroid", "knn"):
+            raise ValueError(f"Unsupported routing method: {method}")
+        self.embeddings = embeddings
+        self.method = method
+        self.threshold = threshold
+        self.margin = margin
+        self.k = k
+        self.labels: List[str] = []
+        vectors = []
+        for label, queries in examples.items():
+            for vector in self.embeddings.embed_documents(list(queries)):
+                self.labels.append(label)
+                vectors.append(vector)
+        self.vectors = self._normalize(np.array(vectors, dtype="float32"))
+        self.routes = sorted(set(self.labels))
+        self.centroids = self._normalize(np.stack([
+            self.vectors[[i for i, l in enumerate(self.labels) if l == label]].mean(axis=0)
+            for label in self.routes
+        ]))
+        self._lock = threading.Lock()
+        self.stats = {"routed": 0, "fallback": 0, "correct": 0, "incorrect": 0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "EmbeddingRouter":
+        """Create a router from the ``router`` config section."""
+        embeddings = get_registry().get_embeddings(
+            config.get("embedding_model", "all-MiniLM-L6-v2"), config.get("embedding_cache")
+        )
+        return cls(
+            embeddings,
+            config["examples"],
+            method=config.get("method", "centroid"),
+            threshold=config.get("threshold", 0.6),
+            margin=config.get("margin", 0.05),
+            k=config.get("k", 5)
+        )
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _scores(self, vector: np.ndarray) -> Dict[str, float]:
+        if self.method == "centroid":
+            return dict(zip(self.routes, (self.centroids @ vector).tolist()))
+        similarities = self.vectors @ vector
+        nearest = np.argsort(-similarities)[:self.k]
+        scores = {label: 0.0 for label in self.routes}
+        for i in nearest:
+            scores[self.labels[i]] += float(similarities[i]) / len(nearest)
+        return scores
+
+    def route(self, query: str) -> RouteDecision:
+        """Pick the tool for ``query``, or None to use the supervisor."""
+        vector = self._normalize(np.array(self.embeddings.embed_query(query), dtype="float32"))
+        scores = self._scores(vector)
+        ranked: List[Tuple[str, float]] = sorted(scores.items(), key=lambda item: -item[1])
+        best, score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else -1.0
+        confident = best != SUPERVISOR and score >= self.threshold and score - runner_up >= self.margin
+        decision = RouteDecision(query, best if confident else None, score, scores)
+        with self._lock:
+            self.stats["routed" if confident else "fallback"] += 1
+        logger.info(
+            "Route %r -> %s (score %.3f, runner-up %.3f)",
+            query, decision.route or SUPERVISOR, score, runner_up
+        )
+        return decision
+
+    def record_outcome(self, decision: RouteDecision, expected: Optional[str]) -> None:
+        """Record whether a routed decision matched the expected tool
+        (``None`` or ``"supervisor"`` when the supervisor should have handled it)."""
+        if not decision.routed:
+            return
+        correct = decision.route == (expected or SUPERVISOR)
+        with self._lock:
+            self.stats["correct" if correct else "incorrect"] += 1
+        if not correct:
+            logger.warning("Misrouted %r to %s (expected %s)", decision.query, decision.route, expected)
+
+    @property
+    def accuracy(self) -> Optional[float]:
+        """Share of routed decisions recorded as correct."""
+        judged = self.stats["correct"] + self.stats["incorrect"]
+        return self.stats["correct"] / judged if judged else None
+
+    def evaluate(self, labelled: List[Tuple[str, str]]) -> Dict[str, float]:
+        """Route ``(query, expected_label)`` pairs and report coverage and accuracy."""
+        decisions = [(self.route(query), expected) for query, expected in labelled]
+        routed = [(d, e) for d, e in decisions if d.routed]
+        correct = sum(d.route == e for d, e in routed)
+        report = {
+            "queries": len(labelled),
+            "coverage": len(routed) / len(labelled) if labelled else 0.0,
+            "accuracy": correct / len(routed) if routed else 0.0
+        }
+        logger.info("Router evaluation: %s", report)
+        return report
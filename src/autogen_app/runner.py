@@ -0,0 +1,280 @@
+"""
+Runs user queries through the supervisor, with a semantic answer cache and fast router in front.
+"""
+
+from concurrent.futures import Executor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Dict, Any, AsyncIterator, List, Optional, Union
+import asyncio
+import json
+import logging
+import threading
+import time
+import autogen
+from .agents import TOOL_COLLECTIONS, TOOL_AGENTS
+from .prefetch import Prefetcher
+from .router import EmbeddingRouter, RouteDecision, SUPERVISOR
+from .streaming import EventSink, emit
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+ROUTED_PROMPT = """Answer the question using the context below.
+
+Context:
+{context}
+
+Question: {query}"""
+
+@dataclass
+class RunResult:
+    """Answer to one query and the tool outputs it was built from."""
+    query: str
+    answer: str
+    tool_outputs: List[Dict[str, Any]] = field(default_factory=list)
+    cached: bool = False
+    route: Optional[str] = None
+
+    @property
+    def collections(self) -> List[str]:
+        return sorted({TOOL_COLLECTIONS[o["name"]] for o in self.tool_outputs if o["name"] in TOOL_COLLECTIONS})
+
+def create_user_proxy(name: str = "user_proxy", max_consecutive_auto_reply: int = 10) -> autogen.UserProxyAgent:
+    """User proxy that drives the supervisor without human input."""
+    return autogen.UserProxyAgent(
+        name=name,
+        human_input_mode="NEVER",
+        max_consecutive_auto_reply=max_consecutive_auto_reply,
+        is_termination_msg=lambda x: (x.get("content") or "").rstrip().endswith("TERMINATE"),
+        code_execution_config=False,
+    )
+
+def tool_outputs_from_history(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pair the tool calls in a chat history with their results."""
+    calls = {}
+    outputs = []
+    for message in messages:
+        for tool_call in message.get("tool_calls") or []:
+            calls[tool_call["id"]] = tool_call["function"]
+        for response in message.get("tool_responses") or []:
+            function = calls.get(response.get("tool_call_id"), {})
+            outputs.append({
+                "name": function.get("name"),
+                "arguments": function.get("arguments"),
+                "content": response.get("content")
+            })
+    return outputs
+
+class SupervisorRunner:
+    """Answers queries with the supervisor built by ``create_agents``.
+
+    With a ``semantic_cache`` configured, paraphrases of recently answered
+    questions are served from the cache without any LLM or vector store
+    calls, and answers are invalidated when their collections change. With
+    a ``router`` configured, confident single-domain questions go straight
+    to one retrieval tool and its specialist agent, saving the supervisor's
+    tool-selection LLM call. A routed answer counts as correct for the
+    router's accuracy unless the session's next query is a follow-up to it.
+    With ``prefetch`` enabled, every collection is searched for the query
+    while the supervisor's first LLM call is in flight.
+    ``astream`` runs a query while yielding its tokens and tool calls.
+    """
+
+    def __init__(
+        self,
+        agents: Dict[str, autogen.ConversableAgent],
+        config: Dict[str, Any],
+        user_proxy: Optional[autogen.UserProxyAgent] = None
+    ):
+        self.agents = agents
+        self.config = config
+        self.supervisor = agents["supervisor"]
+        self.user_proxy = user_proxy or create_user_proxy()
+        self.supervisor.tool_executor.register(self.user_proxy)
+        self.supervisor.register_hook("process_message_before_send", _emit_message)
+
+        self.router: Optional[EmbeddingRouter] = None
+        router_config = config.get("router") or {}
+        if router_config.get("enabled"):
+            self.router = EmbeddingRouter.from_config(router_config)
+        # Last routed decision per user proxy, judged by what the user asks next
+        self._routed: Dict[autogen.UserProxyAgent, RouteDecision] = {}
+        self._routed_lock = threading.Lock()
+
+        self.prefetcher: Optional[Prefetcher] = None
+        prefetch_config = config.get("prefetch") or {}
+        if prefetch_config.get("enabled"):
+            self.prefetcher = Prefetcher.from_config(self.supervisor.tool_executor.function_map, prefetch_config)
+
+        self.semantic_cache: Optional["SemanticAnswerCache"] = None
+        cache_config = config.get("semantic_cache") or {}
+        if cache_config.get("enabled"):
+            # Imported here so FAISS is only loaded when the cache is used
+            from .semantic_cache import SemanticAnswerCache
+            self.semantic_cache = SemanticAnswerCache.from_config(cache_config)
+            for tool, collection in TOOL_COLLECTIONS.items():
+                store = getattr(agents[TOOL_AGENTS[tool]], "vector_store", None)
+                if store is not None:
+                    self.semantic_cache.watch(store, collection)
+
+    def create_session_proxy(self, name: str) -> autogen.UserProxyAgent:
+        """User proxy for one session; the supervisor keeps a separate history per proxy."""
+        user_proxy = create_user_proxy(name=name)
+        self.supervisor.tool_executor.register(user_proxy)
+        return user_proxy
+
+    def end_session(self, user_proxy: autogen.UserProxyAgent) -> None:
+        """Forget the supervisor's history with a session proxy."""
+        self.supervisor.clear_history(user_proxy)
+        self._judge_route(user_proxy, follow_up=False)
+
+    def _judge_route(self, user_proxy: autogen.UserProxyAgent, follow_up: bool) -> None:
+        """Record the outcome of the proxy's last routed answer, if any: a
+        follow-up to it means the specialist alone fell short."""
+        if self.router is None:
+            return
+        with self._routed_lock:
+            decision = self._routed.pop(user_proxy, None)
+        if decision is not None:
+            self.router.record_outcome(decision, SUPERVISOR if follow_up else decision.route)
+
+    def run(
+        self,
+        query: str,
+        user_proxy: Optional[autogen.UserProxyAgent] = None,
+        clear_history: bool = True
+    ) -> RunResult:
+        """Answer ``query``, from the semantic cache when possible.
+
+        With ``clear_history=False`` the query continues the conversation
+        held with ``user_proxy``; follow-ups depend on that context, so they
+        always go to the supervisor.
+        """
+        with span("query") as current:
+            result = self._run(query, user_proxy or self.user_proxy, clear_history)
+            if current is not None:
+                current.set(cached=result.cached, route=result.route or "supervisor")
+        return result
+
+    def _run(self, query: str, user_proxy: autogen.UserProxyAgent, clear_history: bool) -> RunResult:
+        self._judge_route(user_proxy, follow_up=not clear_history)
+        fresh = clear_history or not self.supervisor.chat_messages.get(user_proxy)
+        if fresh and self.semantic_cache is not None:
+            hit = self.semantic_cache.lookup(query)
+            if hit is not None:
+                return RunResult(query, hit.answer, hit.tool_outputs, cached=True)
+
+        decision = self.router.route(query) if fresh and self.router is not None else None
+        if decision is not None and decision.routed:
+            result = self._run_routed(query, decision.route)
+            with self._routed_lock:
+                self._routed[user_proxy] = decision
+        else:
+            previous = 0 if clear_history else len(user_proxy.chat_messages.get(self.supervisor, []))
+            with self.prefetcher.prefetch(query) if self.prefetcher is not None else nullcontext():
+                # initiate_chat replaces both agents' client_cache with its own ``cache``
+                chat = user_proxy.initiate_chat(
+                    recipient=self.supervisor,
+                    message=query,
+                    clear_history=clear_history,
+                    cache=self.supervisor.client_cache
+                )
+            messages = chat.chat_history[previous:]
+            result = RunResult(
+                query,
+                _final_answer(messages) or "",
+                tool_outputs_from_history(messages)
+            )
+        if fresh and self.semantic_cache is not None and result.answer:
+            self.semantic_cache.store(query, result.answer, result.tool_outputs, result.collections)
+        return result
+
+    async def astream(
+        self,
+        query: str,
+        user_proxy: Optional[autogen.UserProxyAgent] = None,
+        clear_history: bool = True,
+        executor: Optional[Executor] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Answer ``query`` like ``run`` on ``executor``, yielding events as they happen.
+
+        ``token`` events carry text deltas from model clients that stream
+        (Bedrock, OpenAI); a ``reset`` voids the current turn's deltas when
+        its request is retried. ``message`` events carry each complete
+        supervisor turn, ``tool_call`` and ``tool_result`` events the
+        retrieval calls. The last event is ``answer``, with the seconds to
+        the first token (or to the answer, when nothing was streamed), or
+        ``error``.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        sink = EventSink(loop, queue)
+
+        def work() -> None:
+            try:
+                with sink.activate():
+                    result = self.run(query, user_proxy=user_proxy, clear_history=clear_history)
+                first_token = sink.first_token
+                sink.emit(
+                    "answer",
+                    answer=result.answer,
+                    cached=result.cached,
+                    route=result.route,
+                    collections=result.collections,
+                    time_to_first_token=first_token if first_token is not None else time.perf_counter() - sink.start
+                )
+            except Exception as e:
+                logger.exception("Streamed query failed")
+                sink.emit("error", error=str(e))
+            finally:
+                sink.close()
+
+        future = loop.run_in_executor(executor, work)
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield event
+        await future
+
+    def _run_routed(self, query: str, tool: str) -> RunResult:
+        """Answer with one retrieval tool and its specialist, skipping the supervisor."""
+        context = self.supervisor.tool_executor.run([(tool, {"query": query})])[0]
+        specialist = self.agents[TOOL_AGENTS[tool]]
+        reply = specialist.generate_reply(messages=[{
+            "role": "user",
+            "content": ROUTED_PROMPT.format(context=context, query=query)
+        }])
+        answer = reply.get("content") if isinstance(reply, dict) else reply
+        return RunResult(
+            query,
+            answer or "",
+            [{"name": tool, "arguments": json.dumps({"query": query}), "content": context}],
+            route=tool
+        )
+
+def _emit_message(
+    sender: autogen.ConversableAgent,
+    message: Union[Dict[str, Any], str],
+    recipient: autogen.Agent,
+    silent: bool
+) -> Union[Dict[str, Any], str]:
+    """Hook emitting each supervisor turn; its text is final, unlike token deltas,
+    and is all that is seen of turns from clients that do not stream."""
+    turn = {"content": message} if isinstance(message, str) else message
+    emit(
+        "message",
+        agent=sender.name,
+        content=turn.get("content"),
+        tool_calls=[call["function"]["name"] for call in turn.get("tool_calls") or []]
+    )
+    return message
+
+def _final_answer(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """Last non-empty text content in a chat, without the termination marker."""
+    for message in reversed(messages):
+        content = message.get("content")
+        if content and not message.get("tool_responses"):
+            return content.rstrip().removesuffix("TERMINATE").rstrip()
+    return None
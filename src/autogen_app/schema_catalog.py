@@ -0,0 +1,423 @@
+"""
+Structured catalog of SQL tables and GraphQL types parsed from schema documents.
+"""
+
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Set, Tuple
+from pathlib import Path
+import json
+import logging
+import os
+import re
+import threading
+from langchain.schema import Document
+from .lexical import tokenize
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Column:
+    name: str
+    type: str
+    references: Optional[Tuple[str, str]] = None  # (table, column)
+
+@dataclass
+class Table:
+    name: str
+    columns: List[Column] = field(default_factory=list)
+    primary_key: List[str] = field(default_factory=list)
+    ddl: str = ""
+    source: Optional[str] = None
+
+    @property
+    def references(self) -> Set[str]:
+        """Tables this table has foreign keys to."""
+        return {column.references[0] for column in self.columns if column.references}
+
+@dataclass
+class GraphQLField:
+    name: str
+    type: str
+    arguments: str = ""
+
+    @property
+    def type_name(self) -> str:
+        return re.sub(r"[\[\]!\s]", "", self.type)
+
+    def __str__(self) -> str:
+        return f"{self.name}{self.arguments}: {self.type}"
+
+@dataclass
+class GraphQLType:
+    name: str
+    kind: str  # type, input, interface, enum, union or scalar
+    fields: List[GraphQLField] = field(default_factory=list)
+    sdl: str = ""
+    source: Optional[str] = None
+
+OPERATION_TYPES = ("Query", "Mutation", "Subscription")
+
+@dataclass
+class CatalogMatch:
+    """Rendered definitions for a question and how well it matched: ``score``
+    is the best match's (2 for a table, type or operation named outright,
+    a fraction for columns or fields shared by several entities)."""
+    text: str
+    score: float
+    strong: bool
+
+_CREATE_TABLE = re.compile(
+    r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:GLOBAL\s+|LOCAL\s+)?TEMP(?:ORARY)?\s+)?(?:EXTERNAL\s+)?TABLE\s+"
+    r"(?:IF\s+NOT\s+EXISTS\s+)?([`\"\w.]+)\s*\(",
+    re.IGNORECASE
+)
+_COLUMN = re.compile(r"(`[^`]+`|\"[^\"]+\"|\w+)\s+(\w+(?:\s*<[^>]*>)?(?:\s*\([^)]*\))?)?")
+_REFERENCES = re.compile(r"REFERENCES\s+([`\"\w.]+)\s*(?:\(\s*([`\"\w]+)\s*\))?", re.IGNORECASE)
+_GRAPHQL_BLOCK = re.compile(r"\b(?:extend\s+)?(type|input|interface|enum)\s+(\w+)[^{]*\{([^}]*)\}")
+_GRAPHQL_UNION = re.compile(r"\bunion\s+(\w+)\s*=\s*([\w\s|]+)")
+_GRAPHQL_SCALAR = re.compile(r"\bscalar\s+(\w+)")
+_GRAPHQL_FIELD = re.compile(r"(\w+)\s*(\([^)]*\))?\s*:\s*([\[\]\w!]+)")
+
+def _unquote(name: str) -> str:
+    return name.replace("`", "").replace('"', "")
+
+def _split_top_level(body: str) -> List[str]:
+    """Split a column list on commas outside parentheses and quoted strings."""
+    parts, depth, quote, current = [], 0, None, []
+    for char in body:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"`":
+            quote = char
+        elif char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        else:
+            depth += (char == "(") - (char == ")")
+        current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+def _columns(definition: str) -> List[str]:
+    return [_unquote(c.strip()) for c in definition.strip("() ").split(",") if c.strip()]
+
+def parse_ddl(text: str, source: Optional[str] = None) -> List[Table]:
+    """Parse the ``CREATE TABLE`` statements in ``text``."""
+    tables = []
+    for match in _CREATE_TABLE.finditer(text):
+        depth, end = 1, match.end()
+        while end < len(text) and depth:
+            depth += (text[end] == "(") - (text[end] == ")")
+            end += 1
+        if depth:
+            continue  # statement cut off (e.g. at a chunk boundary)
+        table = Table(_unquote(match.group(1)), ddl=text[match.start():end].strip(), source=source)
+        foreign_keys = []
+        for definition in _split_top_level(text[match.end():end - 1]):
+            definition = re.sub(r"^CONSTRAINT\s+\S+\s+", "", definition, flags=re.IGNORECASE)
+            keyword = definition.split(None, 1)[0].upper()
+            if definition.upper().startswith("PRIMARY KEY"):
+                table.primary_key = _columns(definition[len("PRIMARY KEY"):])
+            elif definition.upper().startswith("FOREIGN KEY"):
+                columns = re.match(r"FOREIGN\s+KEY\s*(\([^)]*\))", definition, re.IGNORECASE)
+                reference = _REFERENCES.search(definition)
+                if columns and reference:
+                    foreign_keys.append((_columns(columns.group(1)), reference))
+            elif keyword in ("UNIQUE", "CHECK", "INDEX", "KEY", "CONSTRAINT"):
+                continue
+            else:
+                column_match = _COLUMN.match(definition)
+                if column_match is None:
+                    continue
+                column = Column(_unquote(column_match.group(1)), re.sub(r"\s+", "", column_match.group(2) or ""))
+                reference = _REFERENCES.search(definition)
+                if reference:
+                    column.references = (_unquote(reference.group(1)), _unquote(reference.group(2) or "id"))
+                if re.search(r"\bPRIMARY\s+KEY\b", definition, re.IGNORECASE):
+                    table.primary_key.append(column.name)
+                table.columns.append(column)
+        by_name = {column.name.lower(): column for column in table.columns}
+        for columns, reference in foreign_keys:
+            for name in columns:
+                if name.lower() in by_name:
+                    by_name[name.lower()].references = (
+                        _unquote(reference.group(1)), _unquote(reference.group(2) or "id")
+                    )
+        tables.append(table)
+    return tables
+
+def parse_sdl(text: str, source: Optional[str] = None) -> List[GraphQLType]:
+    """Parse the type, input, interface, enum, union and scalar definitions in GraphQL SDL."""
+    # Descriptions and comments would otherwise be parsed as fields
+    text = re.sub(r'"""[\s\S]*?"""|"[^"\n]*"|#[^\n]*', "", text)
+    types = []
+    for match in _GRAPHQL_BLOCK.finditer(text):
+        kind, name, body = match.groups()
+        if kind == "enum":
+            fields = [GraphQLField(value, name) for value in re.findall(r"\w+", body)]
+        else:
+            fields = [
+                GraphQLField(f.group(1), f.group(3), re.sub(r"\s+", " ", f.group(2) or ""))
+                for f in _GRAPHQL_FIELD.finditer(body)
+            ]
+        types.append(GraphQLType(name, kind, fields, sdl=match.group(0).strip(), source=source))
+    for match in _GRAPHQL_UNION.finditer(text):
+        members = [GraphQLField(member, member) for member in re.findall(r"\w+", match.group(2))]
+        types.append(GraphQLType(match.group(1), "union", members, sdl=match.group(0).strip(), source=source))
+    for match in _GRAPHQL_SCALAR.finditer(text):
+        types.append(GraphQLType(match.group(1), "scalar", sdl=match.group(0).strip(), source=source))
+    return types
+
+def _variants(name: str) -> Set[str]:
+    """Lookup keys for a table or type name: full, unqualified, singular and plural."""
+    name = name.lower()
+    short = name.rsplit(".", 1)[-1]
+    variants = {name, short}
+    if short.endswith("ies"):
+        variants.add(short[:-3] + "y")
+    elif short.endswith("s"):
+        variants.add(short[:-1])
+    else:
+        variants.add(short + "s")
+    return variants
+
+class SchemaCatalog:
+    """Tables, columns and foreign keys, or GraphQL types, fields and
+    operations, indexed by name and relationship.
+
+    ``lookup`` resolves the identifiers in a question against the name
+    indexes (dictionary lookups, no similarity search), then follows
+    foreign keys / field types ``expand_depth`` hops to pull in related
+    tables or types, and renders just those definitions. Entities remember
+    the source document they came from, so re-ingesting or deleting a
+    source replaces them. Naming an operation type ("which mutations are
+    there") lists its fields. A match scoring at least ``min_score`` is
+    ``strong`` enough to answer without vector search.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        path: Optional[str] = None,
+        expand_depth: int = 1,
+        max_results: int = 8,
+        min_score: float = 2.0
+    ):
+        if kind not in ("sql", "graphql"):
+            raise ValueError(f"Unsupported schema catalog kind: {kind}")
+        self.kind = kind
+        self.path = Path(path) if path else None
+        self.expand_depth = expand_depth
+        self.max_results = max_results
+        self.min_score = min_score
+        self.tables: Dict[str, Table] = {}
+        self.types: Dict[str, GraphQLType] = {}
+        self._names: Dict[str, Set[str]] = {}
+        self._fields: Dict[str, Set[str]] = {}
+        self._related: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SchemaCatalog":
+        """Create a catalog from a vector store's ``schema_catalog`` section."""
+        return cls(
+            config["kind"],
+            path=config.get("path"),
+            expand_depth=config.get("expand_depth", 1),
+            max_results=config.get("max_results", 8),
+            min_score=config.get("min_score", 2.0)
+        )
+
+    def __len__(self) -> int:
+        return len(self.tables) + len(self.types)
+
+    # Building
+
+    def add_document(self, document: Document) -> None:
+        """Parse a schema document, replacing what its source defined before."""
+        source = document.metadata.get("source_id") or document.metadata.get("source")
+        with self._lock:
+            if source is not None:
+                self._drop_source(source)
+            if self.kind == "sql":
+                for table in parse_ddl(document.page_content, source):
+                    self.tables[table.name.lower()] = table
+            else:
+                for type_ in parse_sdl(document.page_content, source):
+                    existing = self.types.get(type_.name)
+                    if existing is not None and type_.sdl.startswith("extend"):
+                        existing.fields.extend(type_.fields)
+                        existing.sdl += "\n" + type_.sdl
+                    else:
+                        self.types[type_.name] = type_
+            self._reindex()
+
+    def observe(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Pass ``documents`` through unchanged, adding each to the catalog (ingestion hook)."""
+        for document in documents:
+            try:
+                self.add_document(document)
+            except Exception:
+                logger.exception("Could not parse %s into the schema catalog", document.metadata.get("source"))
+            yield document
+
+    def remove_sources(self, source_ids: Iterable[str]) -> None:
+        with self._lock:
+            for source in source_ids:
+                self._drop_source(source)
+            self._reindex()
+
+    def watch(self, store) -> None:
+        """Follow ``store``: parse whole documents added to it directly and drop
+        entities whose source is deleted. Chunks written by ingestion are
+        skipped; ``ingest`` parses their source documents before chunking."""
+        def on_change(_, documents: List[Document], removed: List[str]) -> None:
+            if removed:
+                self.remove_sources(removed)
+            for document in documents:
+                if "chunk" not in document.metadata:
+                    self.add_document(document)
+        store.on_change(on_change)
+
+    def _drop_source(self, source: str) -> None:
+        for entities in (self.tables, self.types):
+            for key in [key for key, entity in entities.items() if entity.source == source]:
+                del entities[key]
+
+    def _reindex(self) -> None:
+        names: Dict[str, Set[str]] = {}
+        fields: Dict[str, Set[str]] = {}
+        related: Dict[str, Set[str]] = {}
+        if self.kind == "sql":
+            lookup = {variant: key for key in self.tables for variant in _variants(key)}
+            for key, table in self.tables.items():
+                for variant in _variants(key):
+                    names.setdefault(variant, set()).add(key)
+                for column in table.columns:
+                    fields.setdefault(column.name.lower(), set()).add(key)
+                    target = column.references[0].lower() if column.references else None
+                    # Conventional <table>_id columns count as references too
+                    if target is None and column.name.lower().endswith("_id"):
+                        target = lookup.get(column.name.lower()[:-3])
+                    target = lookup.get(target, target) if target else None
+                    if target in self.tables and target != key:
+                        related.setdefault(key, set()).add(target)
+                        related.setdefault(target, set()).add(key)
+        else:
+            for name, type_ in self.types.items():
+                for variant in _variants(name):
+                    names.setdefault(variant, set()).add(name)
+                for field_ in type_.fields:
+                    if type_.kind != "union":
+                        fields.setdefault(field_.name.lower(), set()).add(name)
+                    if field_.type_name in self.types and field_.type_name != name and type_.kind != "enum":
+                        related.setdefault(name, set()).add(field_.type_name)
+        self._names, self._fields, self._related = names, fields, related
+
+    # Lookup
+
+    def lookup(self, query: str) -> Optional[CatalogMatch]:
+        """Definitions relevant to ``query``, or None if nothing in it is known."""
+        # Table/type names also match by their parts and singular/plural forms;
+        # columns, fields and operations only by the whole identifier
+        terms = set(tokenize(query))
+        identifiers = {identifier.lower() for identifier in re.findall(r"\w+", query)}
+        with self._lock:
+            scores: Dict[str, float] = {}
+            # (operation type, field name) -> field, in the order found
+            operations: Dict[Tuple[str, str], GraphQLField] = {}
+            best = 0.0
+            for term in terms:
+                for key in self._names.get(term, ()):
+                    if key in OPERATION_TYPES:
+                        for field_ in self.types[key].fields:
+                            operations.setdefault((key, field_.name), field_)
+                        best = max(best, 2.0)
+                    else:
+                        scores[key] = scores.get(key, 0.0) + 2.0
+            for term in identifiers:
+                owners = self._fields.get(term, ())
+                for key in owners:
+                    if key in OPERATION_TYPES:
+                        for field_ in self.types[key].fields:
+                            if field_.name.lower() == term:
+                                operations.setdefault((key, field_.name), field_)
+                                best = max(best, 2.0)
+                                # The types an operation named outright returns are relevant too
+                                if field_.type_name in self.types:
+                                    scores[field_.type_name] = scores.get(field_.type_name, 0.0) + 2.0
+                    else:
+                        scores[key] = scores.get(key, 0.0) + 1.0 / len(owners)
+            matched = [key for key, score in sorted(scores.items(), key=lambda item: -item[1]) if score >= 1.0]
+            matched = matched[:self.max_results]
+            if not matched and not operations:
+                return None
+            best = max([best] + [scores[key] for key in matched])
+            keys = self._expand(matched)
+            text_ = self._render(keys, matched, [(owner, f) for (owner, _), f in operations.items()])
+            return CatalogMatch(text_, best, best >= self.min_score)
+
+    def _expand(self, keys: List[str]) -> List[str]:
+        """``keys`` followed by related entities up to ``expand_depth`` hops away."""
+        result = list(keys)
+        seen = set(keys)
+        frontier = list(keys)
+        for _ in range(self.expand_depth):
+            frontier = [
+                neighbour for key in frontier for neighbour in sorted(self._related.get(key, ()))
+                if neighbour not in seen and not seen.add(neighbour)
+            ]
+            result.extend(frontier)
+        return result[:self.max_results]
+
+    def _render(self, keys: List[str], matched: List[str], operations: List[Tuple[str, GraphQLField]]) -> str:
+        sections = []
+        if operations:
+            by_type: Dict[str, List[str]] = {}
+            for owner, operation in operations:
+                by_type.setdefault(owner, []).append(f"  {operation}")
+            sections.extend(f"type {owner} {{\n" + "\n".join(lines) + "\n}" for owner, lines in by_type.items())
+        for key in keys:
+            entity = self.tables[key] if self.kind == "sql" else self.types[key]
+            text_ = entity.ddl if self.kind == "sql" else entity.sdl
+            note = "" if key in matched else ("-- related\n" if self.kind == "sql" else "# related\n")
+            sections.append(note + text_)
+        return "\n\n".join(sections)
+
+    # Persistence
+
+    def save(self) -> None:
+        """Write the catalog to ``path`` atomically."""
+        if self.path is None:
+            return
+        with self._lock:
+            data = {
+                "kind": self.kind,
+                "tables": [asdict(table) for table in self.tables.values()],
+                "types": [asdict(type_) for type_ in self.types.values()]
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, self.path)
+        logger.info("Saved schema catalog with %d entries to %s", len(self), self.path)
+
+    def load(self) -> None:
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        with self._lock:
+            self.tables = {}
+            for table in data.get("tables", []):
+                columns = [
+                    Column(c["name"], c["type"], tuple(c["references"]) if c["references"] else None)
+                    for c in table.pop("columns")
+                ]
+                self.tables[table["name"].lower()] = Table(columns=columns, **table)
+            self.types = {}
+            for type_ in data.get("types", []):
+                fields = [GraphQLField(**f) for f in type_.pop("fields")]
+                self.types[type_["name"]] = GraphQLType(fields=fields, **type_)
+            self._reindex()
+        logger.info("Loaded schema catalog with %d entries from %s", len(self), self.path)
@@ -0,0 +1,203 @@
+"""
+Semantic answer cache: serves paraphrased questions from previously computed answers.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Iterable
+import itertools
+import logging
+import threading
+import time
+import faiss
+import numpy as np
+from .registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedAnswer:
+    """A supervisor answer together with what it was built from."""
+    question: str
+    answer: str
+    tool_outputs: List[Dict[str, Any]] = field(default_factory=list)
+    collections: List[str] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    score: float = 0.0
+
+class SemanticAnswerCache:
+    """Nearest-neighbour cache of answers keyed by question embedding.
+
+    Questions are embedded with the configured sentence-transformer and
+    indexed by inner product over normalized vectors (flat or HNSW). A hit
+    needs cosine similarity of at least ``threshold``. Entries are evicted
+    LRU beyond ``max_entries``, expire after ``ttl_seconds`` and are dropped
+    when a collection they drew on is re-hydrated, whether by this process
+    or (for stores with a ``data_version``) another one.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        threshold: float = 0.92,
+        max_entries: int = 1000,
+        ttl_seconds: Optional[float] = 3600,
+        index: Optional[Dict[str, Any]] = None,
+        version_check_seconds: float = 5.0
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.index_config = index or {}
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._vectors: Dict[int, np.ndarray] = {}
+        self._ids = itertools.count()
+        self._index = None
+        self._stale = 0
+        self._lock = threading.Lock()
+        # Watched stores and the data version each was last seen at
+        self.version_check_seconds = version_check_seconds
+        self._watched: Dict[str, Any] = {}
+        self._versions: Dict[str, Optional[str]] = {}
+        self._checked_at = time.monotonic()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SemanticAnswerCache":
+        """Create a cache from the ``semantic_cache`` config section."""
+        embeddings = get_registry().get_embeddings(
+            config.get("embedding_model", "all-MiniLM-L6-v2"), config.get("embedding_cache")
+        )
+        return cls(
+            embeddings,
+            threshold=config.get("threshold", 0.92),
+            max_entries=config.get("max_entries", 1000),
+            ttl_seconds=config.get("ttl_seconds", 3600),
+            index=config.get("index"),
+            version_check_seconds=config.get("version_check_seconds", 5.0)
+        )
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.array(self.embeddings.embed_query(question), dtype="float32")
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _new_index(self, dimensions: int) -> "faiss.Index":
+        if self.index_config.get("type") == "hnsw":
+            inner = faiss.IndexHNSWFlat(dimensions, self.index_config.get("M", 32), faiss.METRIC_INNER_PRODUCT)
+            inner.hnsw.efSearch = self.index_config.get("ef_search", 64)
+        else:
+            inner = faiss.IndexFlatIP(dimensions)
+        return faiss.IndexIDMap2(inner)
+
+    def _rebuild(self) -> None:
+        """Rebuild the index from live entries; removed entries are only
+        forgotten (not every index type can remove vectors) until here."""
+        self._index = None
+        self._stale = 0
+        if self._vectors:
+            ids = np.fromiter(self._vectors.keys(), dtype="int64")
+            vectors = np.stack(list(self._vectors.values()))
+            self._index = self._new_index(vectors.shape[1])
+            self._index.add_with_ids(vectors, ids)
+
+    def _remove(self, entry_id: int) -> None:
+        self._entries.pop(entry_id, None)
+        self._vectors.pop(entry_id, None)
+        self._stale += 1
+        if self._stale > max(64, len(self._entries)):
+            self._rebuild()
+
+    def lookup(self, question: str) -> Optional[CachedAnswer]:
+        """Return the cached answer for a sufficiently similar question."""
+        self._check_versions()
+        if self._index is None:
+            return None
+        vector = self._embed(question)
+        with self._lock:
+            if self._index is None:
+                return None
+            scores, ids = self._index.search(vector.reshape(1, -1), min(8, self._index.ntotal))
+            now = time.time()
+            for score, entry_id in zip(scores[0], ids[0]):
+                entry = self._entries.get(int(entry_id))
+                if entry is None:
+                    continue
+                if self.ttl_seconds is not None and now - entry.created_at > self.ttl_seconds:
+                    self._remove(int(entry_id))
+                    continue
+                if score < self.threshold:
+                    break
+                self._entries.move_to_end(int(entry_id))
+                entry.score = float(score)
+                logger.info("Semantic cache hit (%.3f): %r ~ %r", score, question, entry.question)
+                return entry
+        return None
+
+    def store(
+        self,
+        question: str,
+        answer: str,
+        tool_outputs: Optional[List[Dict[str, Any]]] = None,
+        collections: Optional[Iterable[str]] = None
+    ) -> None:
+        """Cache ``answer`` for ``question``, noting the collections it used."""
+        vector = self._embed(question)
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = CachedAnswer(
+                question=question,
+                answer=answer,
+                tool_outputs=list(tool_outputs or []),
+                collections=sorted(set(collections or []))
+            )
+            self._vectors[entry_id] = vector
+            if self._index is None:
+                self._index = self._new_index(vector.shape[0])
+            self._index.add_with_ids(vector.reshape(1, -1), np.array([entry_id], dtype="int64"))
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, collections: Optional[Iterable[str]] = None) -> None:
+        """Drop answers that used any of ``collections`` (everything if None)."""
+        with self._lock:
+            if collections is None:
+                self._entries.clear()
+                self._vectors.clear()
+                self._rebuild()
+                return
+            targets = set(collections)
+            stale = [i for i, entry in self._entries.items() if targets & set(entry.collections)]
+            for entry_id in stale:
+                self._remove(entry_id)
+        if stale:
+            logger.info("Semantic cache: invalidated %d answers for %s", len(stale), sorted(targets))
+
+    def watch(self, store, collection: str) -> None:
+        """Invalidate answers built on ``collection`` whenever ``store`` changes:
+        through ``on_change`` for writes in this process, and by polling the
+        store's ``data_version`` on lookup (at most every
+        ``version_check_seconds``) for ingestion runs and other workers."""
+        store.on_change(lambda *_: self.invalidate([collection]))
+        self._watched[collection] = store
+        self._versions[collection] = self._data_version(store, collection)
+
+    def _data_version(self, store, collection: str) -> Optional[str]:
+        try:
+            return store.data_version()
+        except Exception:
+            logger.warning("Could not read the data version of %s", collection, exc_info=True)
+            return self._versions.get(collection)
+
+    def _check_versions(self) -> None:
+        now = time.monotonic()
+        if not self._watched or now - self._checked_at < self.version_check_seconds:
+            return
+        self._checked_at = now
+        changed = []
+        for collection, store in list(self._watched.items()):
+            version = self._data_version(store, collection)
+            if version != self._versions.get(collection):
+                self._versions[collection] = version
+                changed.append(collection)
+        if changed:
+            self.invalidate(changed)
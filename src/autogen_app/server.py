@@ -0,0 +1,314 @@
+"""
+Async HTTP API serving supervisor queries.
+
+Usage:
+    autogen-app-server
+    uvicorn autogen_app.server:create_app --factory --app-dir src
+"""
+
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, AsyncIterator, List, Optional, Set
+import asyncio
+import json
+import logging
+import time
+import uuid
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from .registry import get_registry
+from .tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+class QueryRequest(BaseModel):
+    query: str
+    session_id: Optional[str] = None
+    # Continue the session's conversation instead of starting a new one
+    follow_up: bool = False
+
+class QueryResponse(BaseModel):
+    session_id: str
+    answer: str
+    cached: bool = False
+    route: Optional[str] = None
+    collections: List[str] = []
+    seconds: float = 0.0
+
+@dataclass
+class Session:
+    """A client's conversation: its own user proxy, so the supervisor keeps a
+    separate history per session, and a lock so its queries run in order."""
+    id: str
+    user_proxy: Any
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+    queries: int = 0
+
+class QueryService:
+    """Agents, stores and caches built once, shared by every request.
+
+    Queries run on a thread pool of ``max_concurrency`` workers (the
+    supervisor loop is synchronous), sized to what the LLM endpoint allows
+    at once; at most ``max_queue`` more may wait before requests are turned
+    away with 503. Sessions idle for ``session_ttl_seconds`` or beyond
+    ``max_sessions`` are dropped, oldest first.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        from .agents import create_agents
+        from .runner import SupervisorRunner
+        settings = config.get("server") or {}
+        self.max_concurrency = settings.get("max_concurrency", 8)
+        self.max_queue = settings.get("max_queue", 64)
+        self.session_ttl = settings.get("session_ttl_seconds", 1800)
+        self.max_sessions = settings.get("max_sessions", 1000)
+        self.shutdown_timeout = settings.get("shutdown_timeout", 30)
+        get_registry().configure_embedding_batching(settings.get("embedding_batch"))
+        self.agents = create_agents()
+        self.runner = SupervisorRunner(self.agents, config)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="query")
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.draining = False
+        self.waiting = 0
+        self.running = 0
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        # Seconds to the first streamed token of recent streamed queries
+        self.first_token: deque = deque(maxlen=1000)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def session(self, session_id: Optional[str] = None) -> Session:
+        """Get a session, creating it (with a new id if none is given)."""
+        self._expire_sessions()
+        session_id = session_id or uuid.uuid4().hex
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = Session(session_id, self.runner.create_session_proxy(f"user_{session_id}"))
+            self.sessions[session_id] = session
+        self.sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def end_session(self, session_id: str) -> bool:
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self.runner.end_session(session.user_proxy)
+        return True
+
+    def _expire_sessions(self) -> None:
+        now = time.monotonic()
+        excess = len(self.sessions) - self.max_sessions
+        # Least recently used first; sessions with a query in progress are kept
+        for session_id, session in list(self.sessions.items()):
+            if excess <= 0 and now - session.last_used < self.session_ttl:
+                break
+            if session.lock.locked():
+                continue
+            self.end_session(session_id)
+            excess -= 1
+
+    def _admit(self) -> None:
+        if self.draining:
+            raise HTTPException(status_code=503, detail="Server is shutting down")
+        if self.waiting >= self.max_queue:
+            raise HTTPException(status_code=503, detail="Too many queued queries")
+
+    @asynccontextmanager
+    async def _slot(self, session: Session) -> AsyncIterator[None]:
+        """Wait for the session's previous query and a free worker."""
+        self.waiting += 1
+        self._idle.clear()
+        waiting = True
+        try:
+            async with session.lock, self._slots:
+                self.waiting -= 1
+                self.running += 1
+                waiting = False
+                try:
+                    yield
+                finally:
+                    self.running -= 1
+        finally:
+            if waiting:
+                # Cancelled (client went away) before a worker was free
+                self.waiting -= 1
+            if not self.waiting and not self.running:
+                self._idle.set()
+        session.queries += 1
+
+    async def query(self, request: QueryRequest) -> QueryResponse:
+        self._admit()
+        session = self.session(request.session_id)
+        start = time.perf_counter()
+        async with self._slot(session):
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                lambda: self.runner.run(
+                    request.query, user_proxy=session.user_proxy, clear_history=not request.follow_up
+                )
+            )
+        return QueryResponse(
+            session_id=session.id,
+            answer=result.answer,
+            cached=result.cached,
+            route=result.route,
+            collections=result.collections,
+            seconds=time.perf_counter() - start
+        )
+
+    def stream(self, request: QueryRequest) -> AsyncIterator[Dict[str, Any]]:
+        """Events of a query as ``SupervisorRunner.astream`` yields them,
+        after a ``session`` event naming the session.
+
+        The query runs in a task of its own that keeps its worker slot until
+        the run finishes, even if the client goes away meanwhile (the run
+        cannot be stopped once started); one still waiting for a slot is
+        cancelled instead.
+        """
+        self._admit()
+        session = self.session(request.session_id)
+        events: asyncio.Queue = asyncio.Queue()
+        started = asyncio.Event()
+
+        async def run() -> None:
+            try:
+                async with self._slot(session):
+                    started.set()
+                    async for event in self.runner.astream(
+                        request.query,
+                        user_proxy=session.user_proxy,
+                        clear_history=not request.follow_up,
+                        executor=self.executor
+                    ):
+                        if event["type"] == "answer":
+                            self.first_token.append(event["time_to_first_token"])
+                        events.put_nowait(event)
+            finally:
+                events.put_nowait(None)
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        async def relay() -> AsyncIterator[Dict[str, Any]]:
+            try:
+                yield {"type": "session", "session_id": session.id}
+                while True:
+                    event = await events.get()
+                    if event is None:
+                        break
+                    yield event
+            finally:
+                if not started.is_set():
+                    task.cancel()
+        return relay()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "sessions": len(self.sessions),
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "draining": self.draining
+        }
+        if self.first_token:
+            ordered = sorted(self.first_token)
+            stats["time_to_first_token"] = {
+                "p50": ordered[len(ordered) // 2],
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            }
+        if self.runner.router is not None:
+            stats["router"] = {**self.runner.router.stats, "accuracy": self.runner.router.accuracy}
+        if self.runner.prefetcher is not None:
+            stats["prefetch"] = dict(self.runner.prefetcher.stats)
+        tracer = get_tracer()
+        if tracer is not None:
+            stats["latency"] = tracer.snapshot()
+        llm_stats = self.agents["supervisor"].llm_provider.stats()
+        if llm_stats:
+            stats["llm"] = llm_stats
+        return stats
+
+    async def shutdown(self) -> None:
+        """Stop accepting queries, let running ones finish, then release resources."""
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Shutting down with %d queries still running", self.running + self.waiting)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for closeable in (self.runner.prefetcher, self.agents["supervisor"].tool_executor):
+            if closeable is not None:
+                closeable.close()
+        get_registry().close()
+
+def create_app(config: Optional[Dict[str, Any]] = None) -> FastAPI:
+    """Build the FastAPI app; agents and stores are created once at startup."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.service = await asyncio.to_thread(QueryService, config or get_registry().get_config())
+        logger.info("Query service ready")
+        try:
+            yield
+        finally:
+            await app.state.service.shutdown()
+
+    app = FastAPI(title="AutoGen App", lifespan=lifespan)
+
+    @app.post("/query", response_model=QueryResponse)
+    async def query(body: QueryRequest, request: Request) -> QueryResponse:
+        return await request.app.state.service.query(body)
+
+    @app.post("/query/stream")
+    async def query_stream(body: QueryRequest, request: Request) -> StreamingResponse:
+        """The query's events as server-sent events, ending with ``answer`` or ``error``."""
+        events = request.app.state.service.stream(body)
+
+        async def sse() -> AsyncIterator[str]:
+            async for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    @app.post("/sessions")
+    async def create_session(request: Request) -> Dict[str, str]:
+        return {"session_id": request.app.state.service.session().id}
+
+    @app.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str, request: Request) -> Dict[str, bool]:
+        if not request.app.state.service.end_session(session_id):
+            raise HTTPException(status_code=404, detail="Unknown session")
+        return {"deleted": True}
+
+    @app.get("/health")
+    async def health(request: Request) -> Dict[str, Any]:
+        service = request.app.state.service
+        if service.draining:
+            raise HTTPException(status_code=503, detail="Server is shutting down")
+        return {"status": "ok"}
+
+    @app.get("/stats")
+    async def stats(request: Request) -> Dict[str, Any]:
+        return request.app.state.service.stats()
+
+    return app
+
+def main() -> None:
+    import uvicorn
+    logging.basicConfig(level=logging.INFO)
+    settings = get_registry().get_config().get("server") or {}
+    uvicorn.run(
+        create_app(),
+        host=settings.get("host", "0.0.0.0"),
+        port=settings.get("port", 8000),
+        timeout_graceful_shutdown=settings.get("shutdown_timeout", 30)
+    )
+
+if __name__ == "__main__":
+    main()
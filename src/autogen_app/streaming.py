@@ -0,0 +1,139 @@
+"""
+Incremental output of a supervisor run: LLM tokens and structured events.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+import asyncio
+import contextvars
+import json
+import time
+
+_sink: contextvars.ContextVar[Optional["EventSink"]] = contextvars.ContextVar("event_sink", default=None)
+
+class EventSink:
+    """Delivers the events of one run to an asyncio queue from any thread.
+
+    Events are dicts with a ``type`` and the seconds ``elapsed`` since the
+    run started; ``None`` marks the end of the run.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self.loop = loop
+        self.queue = queue
+        self.start = time.perf_counter()
+        self.first_token: Optional[float] = None
+
+    def emit(self, type: str, **data: Any) -> None:
+        elapsed = time.perf_counter() - self.start
+        if type == "token" and self.first_token is None:
+            self.first_token = elapsed
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, {"type": type, "elapsed": elapsed, **data})
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    @contextmanager
+    def activate(self) -> Iterator[None]:
+        """Send the events of everything run in this context (and the tool
+        and LLM threads it starts) to this sink."""
+        from autogen.io import IOStream
+        token = _sink.set(self)
+        try:
+            with IOStream.set_default(StreamingIOStream(self)):
+                yield
+        finally:
+            _sink.reset(token)
+
+def streaming() -> bool:
+    """Whether anyone is consuming events in the current context."""
+    return _sink.get() is not None
+
+def emit(type: str, **data: Any) -> None:
+    """Emit an event to the current run's sink; a no-op outside a stream."""
+    sink = _sink.get()
+    if sink is not None:
+        sink.emit(type, **data)
+
+class StreamingIOStream:
+    """AutoGen IOStream that turns the token deltas of streaming model
+    clients into ``token`` events and drops console output."""
+
+    def __init__(self, sink: EventSink):
+        self.sink = sink
+
+    def print(self, *objects: Any, sep: str = " ", end: str = "\n", flush: bool = False) -> None:
+        pass
+
+    def send(self, message: Any) -> None:
+        # AutoGen wraps events; a stream event's payload carries the delta
+        if getattr(message, "type", None) == "stream":
+            content = getattr(message.content, "content", None)
+            if content:
+                self.sink.emit("token", text=content)
+
+    def input(self, prompt: str = "", *, password: bool = False) -> str:
+        return ""
+
+class StreamingBedrockRuntime:
+    """Wraps a ``bedrock-runtime`` client so that, while a run is being
+    streamed, ``converse`` calls ``converse_stream`` instead and emits text
+    deltas as ``token`` events. The streamed blocks are reassembled into the
+    response ``converse`` would have returned, so AutoGen's Bedrock client
+    parses it unchanged.
+    """
+
+    def __init__(self, runtime: Any):
+        self.runtime = runtime
+
+    def converse(self, **request: Any) -> Dict[str, Any]:
+        if not streaming():
+            return self.runtime.converse(**request)
+        response = self.runtime.converse_stream(**request)
+        blocks: Dict[int, Dict[str, Any]] = {}
+        stop_reason = "end_turn"
+        usage = {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0}
+        streamed = False
+        try:
+            for event in response["stream"]:
+                if "contentBlockStart" in event:
+                    start = event["contentBlockStart"]
+                    tool_use = start["start"].get("toolUse")
+                    if tool_use is not None:
+                        blocks[start["contentBlockIndex"]] = {
+                            "toolUse": {"toolUseId": tool_use["toolUseId"], "name": tool_use["name"], "input": ""}
+                        }
+                elif "contentBlockDelta" in event:
+                    index = event["contentBlockDelta"]["contentBlockIndex"]
+                    delta = event["contentBlockDelta"]["delta"]
+                    if "text" in delta:
+                        block = blocks.setdefault(index, {"text": ""})
+                        block["text"] += delta["text"]
+                        streamed = True
+                        emit("token", text=delta["text"])
+                    elif "toolUse" in delta:
+                        blocks[index]["toolUse"]["input"] += delta["toolUse"].get("input", "")
+                elif "messageStop" in event:
+                    stop_reason = event["messageStop"]["stopReason"]
+                elif "metadata" in event:
+                    usage = event["metadata"].get("usage", usage)
+        except Exception:
+            if streamed:
+                # The request may be retried elsewhere; its partial text is void
+                emit("reset")
+            raise
+        content = []
+        for index in sorted(blocks):
+            block = blocks[index]
+            if "toolUse" in block:
+                block["toolUse"]["input"] = json.loads(block["toolUse"]["input"] or "{}")
+            content.append(block)
+        return {
+            "output": {"message": {"role": "assistant", "content": content}},
+            "stopReason": stop_reason,
+            "usage": usage,
+            "ResponseMetadata": response["ResponseMetadata"]
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.runtime, name)
@@ -0,0 +1,75 @@
+"""
+Incremental sync of source documents into a vector store using content hashes.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Iterable, Iterator, Set
+import logging
+from langchain.schema import Document
+from .embedding_cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SyncResult:
+    """What an incremental sync changed."""
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    changed_sources: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.added} added, {self.updated} updated, "
+            f"{self.unchanged} unchanged, {self.deleted} deleted"
+        )
+
+class SyncPlan:
+    """Filters a stream of source documents down to the ones that changed.
+
+    Documents are stamped with ``source_id`` and ``content_hash`` metadata
+    (inherited by their chunks). ``finish``, called once the changed
+    documents have been written, deletes the old chunks of changed sources
+    and sources that were not seen at all, so a failed ingestion never
+    leaves a source with no version.
+    """
+
+    def __init__(self, store, source_key: str = "source"):
+        self.store = store
+        self.source_key = source_key
+        self.existing: Dict[str, str] = store.source_hashes()
+        self.seen: Set[str] = set()
+        # Updated sources -> hash of their new version, whose chunks are kept
+        self.replaced: Dict[str, str] = {}
+        self.result = SyncResult()
+
+    def filter(self, documents: Iterable[Document]) -> Iterator[Document]:
+        for document in documents:
+            digest = content_hash(document.page_content)
+            source_id = str(document.metadata.get(self.source_key) or digest)
+            self.seen.add(source_id)
+            previous = self.existing.get(source_id)
+            if previous == digest:
+                self.result.unchanged += 1
+                continue
+            if previous is None:
+                self.result.added += 1
+            else:
+                self.replaced[source_id] = digest
+                self.result.updated += 1
+            self.result.changed_sources.append(source_id)
+            document.metadata = {**document.metadata, "source_id": source_id, "content_hash": digest}
+            yield document
+
+    def finish(self, delete_missing: bool = True) -> SyncResult:
+        if self.replaced:
+            self.store.delete_sources(list(self.replaced), keep_hashes=self.replaced)
+        if delete_missing:
+            missing = [source_id for source_id in self.existing if source_id not in self.seen]
+            if missing:
+                self.store.delete_sources(missing)
+                self.result.deleted = len(missing)
+                self.result.changed_sources.extend(missing)
+        logger.info("Sync finished: %s", self.result)
+        return self.result
@@ -0,0 +1,190 @@
+"""
+Concurrent execution of the tool calls an agent emits in a single turn.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, List, Callable, Optional, Tuple
+import contextvars
+import json
+import logging
+import threading
+import time
+import autogen
+from .streaming import emit
+from .tracing import record, span
+
+logger = logging.getLogger(__name__)
+
+def _traced_call(name: str, func: Callable[..., Any], arguments: Dict[str, Any]) -> Any:
+    with span(f"tool.{name}"):
+        return func(**arguments)
+
+class ParallelToolExecutor:
+    """Runs a turn's tool calls on a bounded thread pool.
+
+    Results are returned in the order the model emitted the calls. Each call
+    has its own timeout; a call that times out or raises produces an error
+    string for the model instead of failing the whole turn.
+
+    An optional ``batch`` hook receives all of a turn's calls first and
+    returns results for those it can answer together (e.g. one round trip
+    for several vector searches), keyed by call index; the rest run on the
+    pool as usual. The hook runs on the pool too, bounded by the shortest
+    timeout among the calls.
+    """
+
+    def __init__(
+        self,
+        function_map: Dict[str, Callable[..., Any]],
+        max_workers: int = 4,
+        timeout: float = 30.0,
+        timeouts: Optional[Dict[str, float]] = None,
+        batch: Optional[Callable[[List[Tuple[str, Dict[str, Any]]]], Dict[int, str]]] = None
+    ):
+        self.function_map = function_map
+        self.batch = batch
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(
+        cls,
+        function_map: Dict[str, Callable[..., Any]],
+        config: Dict[str, Any],
+        batch: Optional[Callable[[List[Tuple[str, Dict[str, Any]]]], Dict[int, str]]] = None
+    ) -> "ParallelToolExecutor":
+        """Create an executor from the ``tools`` config section."""
+        return cls(
+            function_map,
+            max_workers=config.get("max_workers", 4),
+            timeout=config.get("timeout", 30.0),
+            timeouts=config.get("timeouts"),
+            batch=batch if config.get("batch_search", True) else None
+        )
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="tool"
+                    )
+        return self._pool
+
+    def run(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Run ``(name, arguments)`` calls concurrently, returning results in order."""
+        for name, arguments in calls:
+            emit("tool_call", name=name, arguments=arguments)
+        batched: Dict[int, str] = {}
+        if self.batch is not None and len(calls) > 1:
+            batched = self._run_batch(calls)
+        submitted = []
+        for i, (name, arguments) in enumerate(calls):
+            if i in batched:
+                submitted.append((name, None, batched[i]))
+                continue
+            func = self.function_map.get(name)
+            if func is None:
+                submitted.append((name, None, f"Error: Function {name} not found."))
+                continue
+            context = contextvars.copy_context()
+            future = self.pool.submit(context.run, _traced_call, name, func, arguments)
+            submitted.append((name, future, None))
+
+        start = time.monotonic()
+        results = []
+        for name, future, result in submitted:
+            if future is None:
+                results.append(result)
+                emit("tool_result", name=name, content=result, seconds=time.monotonic() - start)
+                continue
+            deadline = start + self.timeouts.get(name, self.timeout)
+            try:
+                results.append(str(future.result(timeout=max(0.0, deadline - time.monotonic()))))
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning("Tool %s timed out", name)
+                results.append(f"Error: {name} timed out after {self.timeouts.get(name, self.timeout)}s")
+            except Exception as e:
+                logger.exception("Tool %s failed", name)
+                results.append(f"Error: {e}")
+            emit("tool_result", name=name, content=results[-1], seconds=time.monotonic() - start)
+        return results
+
+    def _run_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> Dict[int, str]:
+        """Run the ``batch`` hook on the pool, within the shortest timeout of
+        the calls; if it fails or times out every call runs separately."""
+        timeout = min(self.timeouts.get(name, self.timeout) for name, _ in calls)
+        context = contextvars.copy_context()
+        future = self.pool.submit(context.run, self._traced_batch, calls)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning("Batched tool execution timed out after %ss; running calls separately", timeout)
+        except Exception:
+            logger.exception("Batched tool execution failed; running calls separately")
+        return {}
+
+    def _traced_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> Dict[int, str]:
+        with span("tool.batch", calls=len(calls)):
+            start = time.perf_counter()
+            results = self.batch(calls)
+            seconds = time.perf_counter() - start
+            # Each answered call gets its span, lasting as long as the batch
+            for i in results:
+                record(f"tool.{calls[i][0]}", seconds, batched=True)
+            return results
+
+    def generate_tool_calls_reply(
+        self,
+        recipient: autogen.ConversableAgent,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        sender: Optional[autogen.Agent] = None,
+        config: Optional[Any] = None
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """AutoGen reply function that executes all pending tool calls at once."""
+        if messages is None:
+            messages = recipient._oai_messages[sender]
+        message = messages[-1]
+        tool_calls = message.get("tool_calls")
+        if not tool_calls:
+            return False, None
+
+        calls = []
+        for tool_call in tool_calls:
+            function = tool_call["function"]
+            try:
+                arguments = json.loads(function.get("arguments") or "{}")
+            except json.JSONDecodeError as e:
+                arguments = e
+            calls.append((function["name"], arguments))
+
+        valid = [(i, call) for i, call in enumerate(calls) if isinstance(call[1], dict)]
+        results = [f"Error: invalid arguments for {name}: {arguments}" for name, arguments in calls]
+        for (i, _), result in zip(valid, self.run([call for _, call in valid])):
+            results[i] = result
+
+        tool_responses = [
+            {"tool_call_id": tool_call["id"], "role": "tool", "content": result}
+            for tool_call, result in zip(tool_calls, results)
+        ]
+        return True, {
+            "role": "tool",
+            "tool_responses": tool_responses,
+            "content": "\n\n".join(r["content"] for r in tool_responses)
+        }
+
+    def register(self, agent: autogen.ConversableAgent) -> None:
+        """Make ``agent`` execute tool calls through this executor."""
+        agent.register_reply([autogen.Agent, None], self.generate_tool_calls_reply, position=0)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,272 @@
+"""
+Spans and latency histograms for the stages of a query: LLM turns, tools, embedding and search.
+"""
+
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, List, Optional
+import contextvars
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+@dataclass
+class Span:
+    """One timed stage. Spans started while another is open in the same
+    context (including tool and LLM threads started from it) are its children."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start: float = field(default_factory=time.time)
+    duration: Optional[float] = None
+    error: Optional[str] = None
+    _otel: Any = field(default=None, repr=False)
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+        if self._otel is not None:
+            self._otel.set_attributes({k: v for k, v in attributes.items() if v is not None})
+
+class SpanStats:
+    """Durations of the last ``window`` spans of one name, plus running totals
+    of their ``*_tokens`` attributes."""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.durations: deque = deque(maxlen=window)
+        self.tokens: Dict[str, int] = {}
+
+    def add(self, span: Span) -> None:
+        self.count += 1
+        self.seconds += span.duration
+        self.durations.append(span.duration)
+        if span.error is not None:
+            self.errors += 1
+        for key, value in span.attributes.items():
+            if key.endswith("_tokens") and isinstance(value, (int, float)):
+                self.tokens[key] = self.tokens.get(key, 0) + value
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.durations:
+            return None
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100.0))]
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            "count": self.count,
+            "errors": self.errors,
+            "mean": self.seconds / self.count if self.count else None,
+            **{f"p{q}": self.percentile(q) for q in PERCENTILES}
+        }
+        summary.update(self.tokens)
+        return summary
+
+class InMemoryExporter:
+    """Keeps the last ``max_spans`` finished spans, e.g. for tests and debugging."""
+
+    def __init__(self, max_spans: int = 10000):
+        self._spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self, name: Optional[str] = None, trace_id: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            spans = list(self._spans)
+        return [
+            span for span in spans
+            if (name is None or span.name == name) and (trace_id is None or span.trace_id == trace_id)
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+class Tracer:
+    """Times spans, aggregates their durations per span name and hands them
+    to ``exporters``.
+
+    With ``opentelemetry`` every span is mirrored to an OpenTelemetry span
+    (same name, attributes and parent), exported by whatever SDK the process
+    has configured.
+    """
+
+    def __init__(
+        self,
+        window: int = 2048,
+        exporters: Optional[List[Any]] = None,
+        opentelemetry: bool = False
+    ):
+        self.window = window
+        self.exporters = list(exporters or [])
+        self._stats: Dict[str, SpanStats] = {}
+        self._lock = threading.Lock()
+        self._otel = None
+        if opentelemetry:
+            from opentelemetry import trace
+            self._otel = trace.get_tracer("autogen_app")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "Tracer":
+        """Create a tracer from the ``tracing`` config section."""
+        exporters = []
+        if config.get("memory_exporter", True):
+            exporters.append(InMemoryExporter(config.get("max_spans", 10000)))
+        return cls(
+            window=config.get("window", 2048),
+            exporters=exporters,
+            opentelemetry=config.get("opentelemetry", False)
+        )
+
+    @property
+    def memory(self) -> Optional[InMemoryExporter]:
+        """The in-process exporter, if there is one."""
+        return next((e for e in self.exporters if isinstance(e, InMemoryExporter)), None)
+
+    @staticmethod
+    def _child(name: str, attributes: Dict[str, Any]) -> Span:
+        parent = _current.get()
+        return Span(
+            name,
+            trace_id=parent.trace_id if parent is not None else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent is not None else None,
+            attributes=attributes
+        )
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        current = self._child(name, attributes)
+        otel = nullcontext()
+        if self._otel is not None:
+            otel = self._otel.start_as_current_span(
+                name, attributes={k: v for k, v in attributes.items() if v is not None}
+            )
+        token = _current.set(current)
+        start = time.perf_counter()
+        try:
+            with otel as otel_span:
+                current._otel = otel_span
+                yield current
+        except BaseException as e:
+            current.error = type(e).__name__
+            raise
+        finally:
+            current.duration = time.perf_counter() - start
+            _current.reset(token)
+            self._finish(current)
+
+    def record(self, name: str, seconds: float, **attributes: Any) -> Span:
+        """Record a stage that took ``seconds`` and has just ended, as a child
+        of the current span."""
+        current = self._child(name, attributes)
+        current.start = time.time() - seconds
+        current.duration = seconds
+        if self._otel is not None:
+            end = time.time_ns()
+            otel_span = self._otel.start_span(
+                name,
+                start_time=end - int(seconds * 1e9),
+                attributes={k: v for k, v in attributes.items() if v is not None}
+            )
+            otel_span.end(end_time=end)
+        self._finish(current)
+        return current
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            stats = self._stats.get(span.name)
+            if stats is None:
+                stats = self._stats[span.name] = SpanStats(self.window)
+            stats.add(span)
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception:
+                logger.exception("Span exporter failed")
+
+    def histogram(self, name: str) -> Optional[Dict[str, Any]]:
+        """Count, errors, mean and p50/p95/p99 seconds of the spans named ``name``."""
+        with self._lock:
+            stats = self._stats.get(name)
+            return stats.summary() if stats is not None else None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: stats.summary() for name, stats in sorted(self._stats.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+        for exporter in self.exporters:
+            if hasattr(exporter, "clear"):
+                exporter.clear()
+
+_tracer: Optional[Tracer] = None
+
+def configure_tracing(config: Optional[Dict[str, Any]]) -> Optional[Tracer]:
+    """Install the process-wide tracer for a ``tracing`` config section;
+    spans are not recorded unless it is enabled."""
+    global _tracer
+    _tracer = Tracer.from_config(config) if config and config.get("enabled") else None
+    return _tracer
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+def span(name: str, **attributes: Any):
+    """Context manager timing a stage; yields the ``Span`` (or ``None`` when
+    tracing is off, so callers use ``if span:`` before setting attributes)."""
+    tracer = _tracer
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, **attributes)
+
+def record(name: str, seconds: float, **attributes: Any) -> None:
+    """Record a finished stage of ``seconds`` (e.g. one of several answered
+    together) when tracing is on."""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.record(name, seconds, **attributes)
+
+def trace_client(client: Any, name: str) -> None:
+    """Record every ``create`` of an agent's LLM client as an ``llm.<name>``
+    span with its prompt and completion token counts.
+
+    The span covers the whole call, completion cache lookups included; its
+    ``llm.queue`` children are the scheduler's waits for a slot and rate
+    limits, its ``llm.request`` children the requests sent to a provider
+    (each naming its ``endpoint``), and with several endpoints each attempt
+    on one is an ``llm.endpoint`` span.
+    """
+    if client is None or getattr(client.create, "traced", False):
+        return
+    create = client.create
+
+    def traced(**config: Any) -> Any:
+        with span(f"llm.{name}") as current:
+            response = create(**config)
+            usage = getattr(response, "usage", None)
+            if current is not None and usage is not None:
+                current.set(
+                    prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                    completion_tokens=getattr(usage, "completion_tokens", 0) or 0
+                )
+            return response
+    traced.traced = True
+    client.create = traced
@@ -3,17 +3,44 @@ Vector store interface for knowledge bases.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
 import yaml
 from pathlib import Path
+import asyncio
+import logging
 import os
-from langchain_community.vectorstores import PGVector, FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.schema import Document
+from .sync import SyncPlan, SyncResult
+
+logger = logging.getLogger(__name__)
+
+# Metadata flag for chunks deleted from an index that cannot remove vectors
+TOMBSTONE = "_deleted"
 
 class VectorStore(ABC):
     """Abstract base class for vector stores."""
     
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.collection_name = config.get("collection_name", "default")
+        self._listeners: List[Callable[["VectorStore", List[Document], List[str]], None]] = []
+    
+    def on_change(self, callback: Callable[["VectorStore", List[Document], List[str]], None]) -> None:
+        """Call ``callback(store, added_documents, removed_source_ids)`` after every write."""
+        self._listeners.append(callback)
+    
+    def _notify_change(self, documents: List[Document] = (), removed_source_ids: List[str] = ()) -> None:
+        for callback in self._listeners:
+            try:
+                callback(self, list(documents), list(removed_source_ids))
+            except Exception:
+                logger.exception("Vector store change listener failed")
+    
+    def data_version(self) -> Optional[str]:
+        """Token that changes whenever any process writes to this collection,
+        or None if other processes cannot change what this store serves."""
+        return None
+    
     @abstractmethod
     def add_documents(self, documents: List[Document]) -> None:
         """Add documents to the vector store."""
@@ -23,53 +50,92 @@ class VectorStore(ABC):
     def similarity_search(self, query: str, k: int = 4) -> List[Document]:
         """Search for similar documents."""
         pass
-
-class MemoryVectorStore(VectorStore):
-    """In-memory vector store using FAISS."""
     
-    def __init__(self, config: Dict[str, Any]):
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=config["embedding_model"]
-        )
-        self.vectorstore = None
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """Add texts whose embeddings were already computed (bulk ingestion)."""
+        metadatas = metadatas or [{} for _ in texts]
+        self.add_documents([
+            Document(page_content=text, metadata=metadata)
+            for text, metadata in zip(texts, metadatas)
+        ])
     
-    def add_documents(self, documents: List[Document]) -> None:
-        if self.vectorstore is None:
-            self.vectorstore = FAISS.from_documents(documents, self.embeddings)
-        else:
-            self.vectorstore.add_documents(documents)
+    def flush(self) -> None:
+        """Write anything ``add_embeddings`` is still holding back."""
+        pass
     
-    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
-        if self.vectorstore is None:
-            return []
-        return self.vectorstore.similarity_search(query, k=k)
-
-class PGVectorStore(VectorStore):
-    """PostgreSQL vector store using pgvector."""
+    async def asimilarity_search(self, query: str, k: int = 4) -> List[Document]:
+        """Search for similar documents without blocking the event loop."""
+        return await asyncio.to_thread(self.similarity_search, query, k)
     
-    def __init__(self, config: Dict[str, Any]):
-        connection_string = f"postgresql+psycopg2://{config["user"]}:{config["password"]}@{config["host"]}:{config["port"]}/{config["database"]}"
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=config["embedding_model"]
-        )
-        self.vectorstore = PGVector(
-            collection_name=config["collection_name"],
-            connection_string=connection_string,
-            embedding_function=self.embeddings
-        )
+    def batch_key(self) -> Optional[Any]:
+        """Stores of one class returning the same non-None key can be searched
+        together by ``search_batch``."""
+        return None
     
-    def add_documents(self, documents: List[Document]) -> None:
-        self.vectorstore.add_documents(documents)
+    @classmethod
+    def search_batch(cls, searches: List[Tuple["VectorStore", str, int]]) -> List[List[Document]]:
+        """Run ``(store, query, k)`` searches over stores sharing a ``batch_key``."""
+        return [store.similarity_search(query, k) for store, query, k in searches]
     
-    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
-        return self.vectorstore.similarity_search(query, k=k)
+    def source_hashes(self) -> Dict[str, str]:
+        """Map of ``source_id`` to ``content_hash`` for every indexed source."""
+        raise NotImplementedError(f"{type(self).__name__} does not support incremental sync")
+    
+    def delete_sources(self, source_ids: List[str], keep_hashes: Optional[Dict[str, str]] = None) -> None:
+        """Remove every chunk belonging to ``source_ids``, except those whose
+        ``content_hash`` is the source's entry in ``keep_hashes``."""
+        raise NotImplementedError(f"{type(self).__name__} does not support incremental sync")
+    
+    def sync_documents(
+        self,
+        documents: Iterable[Document],
+        source_key: str = "source",
+        delete_missing: bool = True
+    ) -> SyncResult:
+        """Bring the store in line with ``documents``, touching only what changed.
+        
+        Each document is identified by ``metadata[source_key]``. Unchanged
+        documents are skipped, changed ones replace their previous chunks and,
+        with ``delete_missing``, sources no longer present are removed.
+        """
+        plan = SyncPlan(self, source_key=source_key)
+        changed = list(plan.filter(documents))
+        if changed:
+            self.add_documents(changed)
+        return plan.finish(delete_missing=delete_missing)
+
+def similarity_search_many(searches: List[Tuple[VectorStore, str, int]]) -> List[List[Document]]:
+    """Run several ``(store, query, k)`` searches, in order.
+    
+    Searches on stores that can be batched together (e.g. pgvector
+    collections in one database) go out as one round trip.
+    """
+    groups: Dict[Any, List[int]] = {}
+    for i, (store, _, _) in enumerate(searches):
+        key = store.batch_key()
+        groups.setdefault((type(store), key) if key is not None else i, []).append(i)
+    results: List[List[Document]] = [[] for _ in searches]
+    for indices in groups.values():
+        store = searches[indices[0]][0]
+        for i, documents in zip(indices, type(store).search_batch([searches[i] for i in indices])):
+            results[i] = documents
+    return results
 
 def get_vector_store(config: Dict[str, Any]) -> VectorStore:
     """Factory function to create appropriate vector store."""
     store_type = config["type"]
+    # Backends are imported on first use, so a process only loads FAISS or
+    # PGVector (and their dependencies) for the store types it configures
     if store_type == "memory":
+        from .memory_store import MemoryVectorStore
         return MemoryVectorStore(config)
     elif store_type == "pgvector":
+        from .pgvector_store import PGVectorStore
         return PGVectorStore(config)
     else:
         raise ValueError(f"Unsupported vector store type: {store_type}")
@@ -80,3 +146,10 @@ def load_config() -> Dict[str, Any]:
     config_path = Path(__file__).parent.parent.parent / "config" / f"settings.{env}.yaml"
     with open(config_path, "r") as f:
         return yaml.safe_load(f)
+
+def __getattr__(name: str):
+    # ``MemoryVectorStore`` used to live here; keep old imports working
+    if name == "MemoryVectorStore":
+        from .memory_store import MemoryVectorStore
+        return MemoryVectorStore
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
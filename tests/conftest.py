@@ -0,0 +1,85 @@
+import zlib
+import pytest
+from autogen_app.tracing import configure_tracing
+
+@pytest.fixture
+def tracer():
+    """Process-wide tracer with an in-memory exporter, removed after the test."""
+    tracer = configure_tracing({"enabled": True})
+    yield tracer
+    configure_tracing(None)
+
+class FakeClock:
+    """Stands in for ``time.monotonic`` so token buckets and cooldowns can be stepped."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("autogen_app.llm_scheduler.time.monotonic", clock)
+    return clock
+
+class HashEmbeddings:
+    """Deterministic bag-of-words vectors standing in for a sentence-transformers
+    model, so texts sharing words are near each other without a download."""
+
+    def __init__(self, dimensions: int = 32):
+        self.dimensions = dimensions
+        self.embedded = []
+
+    def embed_query(self, text):
+        self.embedded.append(text)
+        vector = [0.0] * self.dimensions
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode()) % self.dimensions] += 1.0
+        norm = sum(x * x for x in vector) ** 0.5 or 1.0
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    """``HashEmbeddings`` in place of every embedding model the registry creates."""
+    from autogen_app import registry
+    embeddings = HashEmbeddings()
+    monkeypatch.setattr(registry, "_lazy_huggingface", lambda model_name: embeddings)
+    registry.reset_registry()
+    yield embeddings
+    registry.reset_registry()
+
+@pytest.fixture
+def app_config(tmp_path, monkeypatch):
+    """The local settings with a Bedrock model and every cache and snapshot
+    under ``tmp_path``; ``create_agents`` and friends load it from the registry."""
+    import yaml
+    from pathlib import Path
+    from autogen_app import vector_store
+    from autogen_app.registry import reset_registry
+    with open(Path(__file__).parent.parent / "config" / "settings.local.yaml") as f:
+        config = yaml.safe_load(f)
+    config["llm"] = {
+        "provider": "bedrock",
+        "model": "anthropic.claude-3-sonnet-20240229-v1:0",
+        "region": "us-east-1",
+        "cache": {"backend": "sqlite", "path": str(tmp_path / "completions")},
+        "scheduler": {"enabled": True, "max_retries": 0}
+    }
+    for store in config["vector_stores"].values():
+        store.pop("snapshot_dir", None)
+        if "embedding_cache" in store:
+            store["embedding_cache"]["path"] = str(tmp_path / "embeddings.sqlite")
+        if "schema_catalog" in store:
+            store["schema_catalog"]["path"] = str(tmp_path / f"{store['collection_name']}_catalog.json")
+    monkeypatch.setattr(vector_store, "load_config", lambda: config)
+    reset_registry()
+    yield config
+    reset_registry()
@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("autogen")
+pytest.importorskip("faiss")
+pytest.importorskip("boto3")
+
+from autogen_app.agents import create_agents
+from autogen_app.llm_cache import SQLiteCompletionCache
+
+class FakeBedrockRuntime:
+    """Answers ``converse`` like Bedrock, counting the calls that reach it."""
+
+    def __init__(self, text="SELECT count(*) FROM orders"):
+        self.text = text
+        self.calls = []
+
+    def converse(self, **request):
+        self.calls.append(request)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": self.text}]}},
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": 12, "outputTokens": 6, "totalTokens": 18},
+            "ResponseMetadata": {"RequestId": f"request-{len(self.calls)}"}
+        }
+
+def test_create_agents_with_completion_cache(app_config):
+    agents = create_agents()
+    assert set(agents) == {"knowledge_retriever", "sql_generator", "graphql_generator", "code_generator", "supervisor"}
+    cache = agents["supervisor"].client_cache
+    assert isinstance(cache, SQLiteCompletionCache)
+    for agent in agents.values():
+        assert agent.client_cache is cache
+        assert "cache" not in agent.llm_config
+
+def test_repeated_request_is_served_from_the_cache(app_config):
+    agents = create_agents()
+    agent = agents["sql_generator"]
+    runtime = FakeBedrockRuntime()
+    for model_client in agent.client._clients:
+        model_client.bedrock_runtime = runtime
+    messages = [{"role": "user", "content": "How many orders are there?"}]
+    first = agent.generate_reply(messages=messages)
+    second = agent.generate_reply(messages=messages)
+    assert first == second
+    assert "SELECT count(*) FROM orders" in str(first)
+    assert len(runtime.calls) == 1
+
+def test_create_agents_without_cache(app_config):
+    del app_config["llm"]["cache"]
+    agents = create_agents()
+    assert all(agent.client_cache is None for agent in agents.values())
+
+def test_supervisor_chats_use_the_cache(app_config):
+    from autogen_app.runner import SupervisorRunner
+    for section in ("semantic_cache", "router", "prefetch"):
+        app_config[section]["enabled"] = False
+    agents = create_agents()
+    runtime = FakeBedrockRuntime("There are 42 orders. TERMINATE")
+    for model_client in agents["supervisor"].client._clients:
+        model_client.bedrock_runtime = runtime
+    runner = SupervisorRunner(agents, app_config)
+    assert runner.run("How many orders are there?").answer == "There are 42 orders."
+    assert runner.run("How many orders are there?").answer == "There are 42 orders."
+    assert len(runtime.calls) == 1
@@ -0,0 +1,76 @@
+import threading
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from autogen_app.batching import MicroBatcher
+
+def submit_concurrently(batcher, items):
+    results = {}
+    barrier = threading.Barrier(len(items))
+
+    def submit(item):
+        barrier.wait()
+        results[item] = batcher.submit(item)
+    threads = [threading.Thread(target=submit, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_calls_share_a_batch():
+    batches = []
+
+    def double(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+    batcher = MicroBatcher(double, max_batch=32, max_wait_ms=100)
+    try:
+        results = submit_concurrently(batcher, list(range(8)))
+    finally:
+        batcher.close()
+    assert results == {i: i * 2 for i in range(8)}
+    assert len(batches) < 8
+    assert sorted(item for batch in batches for item in batch) == list(range(8))
+    assert batcher.stats == {"batches": len(batches), "items": 8}
+
+def test_batches_are_capped_at_max_batch():
+    batches = []
+
+    def identity(items):
+        batches.append(len(items))
+        return items
+    batcher = MicroBatcher(identity, max_batch=3, max_wait_ms=100)
+    try:
+        results = submit_concurrently(batcher, list(range(10)))
+    finally:
+        batcher.close()
+    assert results == {i: i for i in range(10)}
+    assert max(batches) <= 3
+
+def test_errors_reach_every_caller_in_the_batch():
+    def broken(items):
+        raise RuntimeError("model unavailable")
+    batcher = MicroBatcher(broken, max_wait_ms=50)
+    errors = []
+
+    def submit(item):
+        try:
+            batcher.submit(item)
+        except RuntimeError as e:
+            errors.append(str(e))
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+    assert errors == ["model unavailable"] * 4
+
+def test_submit_after_close_fails():
+    batcher = MicroBatcher(lambda items: items)
+    assert batcher.submit("x") == "x"
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit("y")
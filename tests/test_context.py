@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+from autogen_app.context import ContextAssembler, compact_whitespace
+
+class WordEncoding:
+    """One token per word, so budgets are easy to reason about without tiktoken's download."""
+
+    def encode(self, text):
+        return text.split(" ")
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+def assembler(**kwargs):
+    assembler = ContextAssembler(**kwargs)
+    assembler._encoding = WordEncoding()
+    return assembler
+
+def chunk(text, source="doc.md", number=None):
+    metadata = {"source_id": source}
+    if number is not None:
+        metadata["chunk"] = number
+    return Document(page_content=text, metadata=metadata)
+
+def test_encoding_is_loaded_on_first_use():
+    assert ContextAssembler()._encoding is None
+
+def test_compacts_whitespace_only_when_asked():
+    ddl = "CREATE TABLE users (\n    id      INT,\n\n    email   TEXT\n)"
+    code = "def f():\n    if x:\n        return 1"
+    assert assembler(compact=True).assemble([chunk(ddl)]).text == compact_whitespace(ddl)
+    assert assembler().assemble([chunk(code)]).text == code
+
+def test_drops_contained_and_near_duplicate_documents():
+    base = "the orders table holds one row per order with its customer and total amount in cents"
+    result = assembler().assemble([
+        chunk(base, source="a.md"),
+        chunk("one row per order with its customer", source="b.md"),
+        chunk(base + " today", source="c.md"),
+    ])
+    assert result.text == base
+    assert result.duplicates == 2
+
+def test_overlap_is_cut_only_against_adjacent_chunks():
+    overlap = "shared sentence between the first and second chunk of the source"
+    first = "the first chunk starts the document and ends with the " + overlap
+    second = overlap + " and then the second chunk goes on with new material"
+    third = "the third chunk is unrelated and must stay whole even so"
+    result = assembler().assemble([chunk(first, number=0), chunk(second, number=1)])
+    assert result.text == first + "\n\n" + "and then the second chunk goes on with new material"
+    # A chunk that is not the neighbour keeps its text
+    result = assembler().assemble([chunk(first, number=0), chunk(overlap + " " + third, number=2)])
+    assert result.text.endswith(overlap + " " + third)
+
+def test_later_chunk_ranked_first_trims_the_earlier_one():
+    overlap = "shared sentence between the first and second chunk of the source"
+    first = "the first chunk starts the document and ends with the " + overlap
+    second = overlap + " and then the second chunk goes on with new material"
+    result = assembler().assemble([chunk(second, number=1), chunk(first, number=0)])
+    assert result.text == second + "\n\n" + "the first chunk starts the document and ends with the"
+
+def test_trimmed_remainder_is_what_gets_compared():
+    overlap = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu nu xi omicron pi"
+    first = "intro words here " + overlap
+    second = overlap + " rho sigma tau upsilon phi"
+    # Most of the second chunk's shingles are the overlap, but what is left after
+    # cutting it is new and must not count as a duplicate of the first chunk
+    result = assembler(dedup_threshold=0.5).assemble([chunk(first, number=0), chunk(second, number=1)])
+    assert result.used == 2
+    assert result.text.endswith("rho sigma tau upsilon phi")
+
+def test_budget_truncates_the_first_document_that_does_not_fit():
+    words = " ".join(f"w{i}" for i in range(100))
+    result = assembler(max_tokens=60, min_tokens=10).assemble([
+        chunk("a b c d e f g h i j", source="a.md"),
+        chunk(words, source="b.md"),
+    ])
+    assert result.truncated
+    assert result.tokens == 60
+    assert result.text.endswith("…")
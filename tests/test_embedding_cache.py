@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from autogen_app.embedding_cache import CachedEmbeddings, EmbeddingCache, content_hash
+
+def test_formatting_only_changes_share_a_hash():
+    assert content_hash("SELECT *\n  FROM orders") == content_hash("SELECT * FROM orders")
+    assert content_hash("SELECT * FROM orders") != content_hash("SELECT * FROM users")
+
+def test_the_model_sees_the_original_text(embeddings):
+    cached = CachedEmbeddings(embeddings, "fake", EmbeddingCache())
+    ddl = "CREATE TABLE orders (\n    id INT,\n    total INT\n)"
+    cached.embed_documents([ddl])
+    cached.embed_query("def f():\n    return 1")
+    assert embeddings.embedded == [ddl, "def f():\n    return 1"]
+
+def test_only_unseen_texts_are_embedded(embeddings):
+    cached = CachedEmbeddings(embeddings, "fake", EmbeddingCache())
+    first = cached.embed_documents(["orders table", "users table", "orders table"])
+    assert embeddings.embedded == ["orders table", "users table"]
+    assert first[0] == first[2]
+    assert cached.embed_query("orders   table") == first[0]
+    assert cached.embed_documents(["users\ntable", "invoices"])[0] == first[1]
+    assert embeddings.embedded == ["orders table", "users table", "invoices"]
+
+def test_models_do_not_share_entries(embeddings):
+    cache = EmbeddingCache()
+    CachedEmbeddings(embeddings, "small", cache).embed_query("orders")
+    CachedEmbeddings(embeddings, "large", cache).embed_query("orders")
+    assert embeddings.embedded == ["orders", "orders"]
+
+def test_sqlite_tier_outlives_the_lru(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(max_entries=1, path=path)
+    cache.put_many("fake", {"a": [1.0, 2.0], "b": [3.0, 4.0]})
+    assert len(cache._lru) == 1
+    assert cache.get_many("fake", ["a", "b", "c"]) == {"a": [1.0, 2.0], "b": [3.0, 4.0]}
+    cache.close()
+    assert EmbeddingCache(path=path).get_many("fake", ["b"]) == {"b": [3.0, 4.0]}
@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from autogen_app.embedding_workers import ProcessPoolEmbeddings
+from autogen_app.registry import ResourceRegistry
+
+class FakePool:
+    """Runs tasks in order in this process, noting each batch sent to a worker."""
+
+    def __init__(self):
+        self.batches = []
+        self.shut_down = False
+
+    def map(self, func, batches):
+        for batch in batches:
+            self.batches.append(batch)
+            yield [[float(len(text))] for text in batch]
+
+    def shutdown(self):
+        self.shut_down = True
+
+def test_pool_starts_on_first_embed():
+    embeddings = ProcessPoolEmbeddings("all-MiniLM-L6-v2", processes=2)
+    assert embeddings._pool is None
+    embeddings.close()
+
+def test_texts_are_spread_over_workers_and_reassembled_in_order():
+    embeddings = ProcessPoolEmbeddings("all-MiniLM-L6-v2", processes=4, batch_size=3)
+    embeddings._pool = pool = FakePool()
+    texts = ["a" * n for n in range(1, 21)]
+    assert embeddings.embed_documents(texts) == [[float(n)] for n in range(1, 21)]
+    assert [len(batch) for batch in pool.batches] == [3] * 6 + [2]
+
+    pool.batches.clear()
+    # Small calls still use every worker
+    embeddings.embed_documents(texts[:8])
+    assert [len(batch) for batch in pool.batches] == [2, 2, 2, 2]
+    assert embeddings.embed_query("abc") == [3.0]
+    embeddings.close()
+    assert pool.shut_down and embeddings._pool is None
+
+def test_processes_default_to_cores_per_worker(monkeypatch):
+    monkeypatch.setattr("autogen_app.embedding_workers.os.cpu_count", lambda: 8)
+    assert ProcessPoolEmbeddings("m", threads_per_worker=2).processes == 4
+    assert ProcessPoolEmbeddings("m", threads_per_worker=16).processes == 1
+
+def test_registry_builds_worker_pools_per_settings():
+    registry = ResourceRegistry()
+    workers = registry.get_embeddings("m", workers_config={"processes": 2})
+    assert isinstance(workers, ProcessPoolEmbeddings)
+    assert registry.get_embeddings("m", workers_config={"processes": 2}) is workers
+    assert registry.get_embeddings("m", workers_config={"processes": 3}) is not workers
+    assert registry.get_embeddings("m") is not workers
+    registry.close()
@@ -0,0 +1,80 @@
+import pytest
+
+faiss = pytest.importorskip("faiss")
+pytest.importorskip("langchain")
+
+import numpy as np
+from langchain.schema import Document
+from autogen_app.faiss_index import (
+    INDEX_TYPES,
+    build_index,
+    current_version,
+    read_snapshot,
+    training_points,
+    write_snapshot
+)
+
+CONFIGS = {
+    "flat": {"type": "flat"},
+    "hnsw": {"type": "hnsw", "M": 8, "ef_search": 32},
+    "ivf_flat": {"type": "ivf_flat", "nlist": 4, "nprobe": 4},
+    "ivf_pq": {"type": "ivf_pq", "nlist": 4, "nprobe": 4, "pq_m": 4, "pq_nbits": 4}
+}
+
+def vectors(n=300, d=16, seed=0):
+    return np.random.default_rng(seed).random((n, d), dtype="float32")
+
+def snapshot(directory, kind, data, **manifest):
+    index = build_index(CONFIGS[kind], data)
+    index.add(data)
+    ids = {i: f"doc-{i}" for i in range(len(data))}
+    documents = {doc_id: Document(page_content=doc_id, metadata={"n": i}) for i, doc_id in ids.items()}
+    version = write_snapshot(directory, index, documents, ids, manifest={"index_type": kind, **manifest})
+    return index, version
+
+def test_training_points():
+    assert training_points(None) == 0
+    assert training_points({"type": "hnsw"}) == 0
+    assert training_points({"type": "ivf_flat", "nlist": 10}) == 390
+    assert training_points({"type": "ivf_pq", "nlist": 2, "pq_nbits": 8}) == 256
+    assert training_points({"type": "ivf_flat", "nlist": 100, "train_size": 500}) == 500
+    with pytest.raises(ValueError):
+        training_points({"type": "lsh"})
+
+def test_small_corpora_get_fewer_ivf_lists():
+    index = build_index({"type": "ivf_flat", "nlist": 1024}, vectors(100))
+    assert index.is_trained
+    assert faiss.extract_index_ivf(index).nlist == 10
+
+@pytest.mark.parametrize("kind", INDEX_TYPES)
+@pytest.mark.parametrize("mmap", [True, False])
+def test_snapshot_round_trip(tmp_path, kind, mmap):
+    data = vectors()
+    index, version = snapshot(tmp_path, kind, data)
+    assert current_version(tmp_path) == version == "v1"
+
+    loaded, documents, index_to_docstore_id, manifest = read_snapshot(tmp_path, mmap=mmap)
+    assert loaded.ntotal == len(data)
+    assert manifest["version"] == "v1"
+    assert manifest["index_type"] == kind
+    assert index_to_docstore_id[7] == "doc-7"
+    assert documents["doc-7"].metadata == {"n": 7}
+    queries = vectors(5, seed=1)
+    assert (loaded.search(queries, 4)[1] == index.search(queries, 4)[1]).all()
+
+def test_snapshots_without_an_index_type_still_load(tmp_path):
+    data = vectors()
+    index = faiss.IndexFlatL2(data.shape[1])
+    index.add(data)
+    write_snapshot(tmp_path, index, {"a": Document(page_content="a")}, {0: "a"}, manifest={})
+    loaded, *_ = read_snapshot(tmp_path)
+    assert loaded.ntotal == len(data)
+
+def test_old_versions_are_pruned(tmp_path):
+    data = vectors(50)
+    for _ in range(4):
+        snapshot(tmp_path, "flat", data)
+    assert current_version(tmp_path) == "v4"
+    assert sorted(p.name for p in tmp_path.glob("v*")) == ["v2", "v3", "v4"]
+    with pytest.raises(FileNotFoundError):
+        read_snapshot(tmp_path / "missing")
@@ -0,0 +1,82 @@
+import pytest
+
+pytest.importorskip("autogen")
+
+from autogen_app.history import SUMMARY_HEADER, HistoryManager
+
+def conversation(turns, topic="orders"):
+    messages = [{"role": "user", "content": "Task: answer questions"}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} about {topic}"})
+        messages.append({"role": "assistant", "content": f"answer {i} about {topic}"})
+    return messages
+
+def tool_turn(call_id, content):
+    return [
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "get_sql_schema", "arguments": '{"query": "x"}'}}
+        ]},
+        {"role": "tool", "tool_responses": [{"tool_call_id": call_id, "role": "tool", "content": content}], "content": content}
+    ]
+
+def test_short_history_is_unchanged():
+    manager = HistoryManager(history_length=10)
+    messages = conversation(3)
+    assert manager.process_messages(messages) == messages
+
+def test_older_messages_are_summarized_into_the_first():
+    manager = HistoryManager(history_length=4)
+    messages = conversation(6)
+    sent = manager.process_messages(messages)
+    assert len(sent) == 5
+    assert sent[1:] == messages[-4:]
+    first = sent[0]["content"]
+    assert first.startswith("Task: answer questions")
+    assert SUMMARY_HEADER in first
+    assert "user: question 0 about orders" in first
+    assert "assistant: answer 3 about orders" in first
+    assert "question 4 about orders" not in first
+    # The stored history is left alone
+    assert messages[0]["content"] == "Task: answer questions"
+
+def test_window_keeps_tool_results_with_their_call():
+    manager = HistoryManager(history_length=2)
+    messages = conversation(3) + tool_turn("call-1", "users table") + [
+        {"role": "assistant", "content": "done"}
+    ]
+    sent = manager.process_messages(messages)
+    assert sent[1].get("tool_calls")
+    assert sent[2]["role"] == "tool"
+
+def test_old_tool_results_are_shortened():
+    manager = HistoryManager(history_length=10, tool_result_chars=20)
+    long = "column " * 50
+    messages = conversation(1) + tool_turn("call-1", long) + tool_turn("call-2", long)
+    sent = manager.process_messages(messages)
+    assert len(sent[4]["content"]) < len(long)
+    assert len(sent[4]["tool_responses"][0]["content"]) < len(long)
+    # Results of the latest turn are sent whole
+    assert sent[6]["content"] == long
+
+def test_summaries_are_extended_not_rebuilt():
+    manager = HistoryManager(history_length=4)
+    messages = conversation(6)
+    manager.process_messages(messages)
+    messages += [{"role": "user", "content": "question 6"}, {"role": "assistant", "content": "answer 6"}]
+    sent = manager.process_messages(messages)
+    assert len(manager._summaries) == 1
+    assert "question 4 about orders" in sent[0]["content"]
+
+def test_summaries_do_not_leak_between_conversations():
+    manager = HistoryManager(history_length=4)
+    first = conversation(6, topic="orders")
+    second = conversation(6, topic="invoices")
+    manager.process_messages(first)
+    sent = manager.process_messages(second)
+    assert "orders" not in sent[0]["content"]
+    assert "invoices" in sent[0]["content"]
+    # The same task with a different earlier turn is a different conversation too
+    third = conversation(6, topic="orders")
+    third[1] = {"role": "user", "content": "question 0 about refunds"}
+    sent = manager.process_messages(third)
+    assert "refunds" in sent[0]["content"]
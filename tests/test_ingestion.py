@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+import pytest
+
+pytest.importorskip("langchain_text_splitters")
+
+from langchain.schema import Document
+from autogen_app.ingestion import batched, chunk_documents, ingest, iter_directory, iter_jsonl
+
+class RecordingStore:
+    """Collects written batches; ``delay`` makes writes slow."""
+
+    def __init__(self, embeddings, delay=0.0, fail_after=None):
+        self.document_embeddings = embeddings
+        self.delay = delay
+        self.fail_after = fail_after
+        self.batches = []
+        self.flushed = False
+
+    def add_embeddings(self, texts, embeddings, metadatas):
+        time.sleep(self.delay)
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise ConnectionError("database went away")
+        self.batches.append((texts, metadatas))
+
+    def flush(self):
+        self.flushed = True
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self.lock:
+            self.calls += 1
+        return [[float(len(text))] for text in texts]
+
+def documents(n, words=10):
+    return [
+        Document(page_content=" ".join(f"word{i}-{j}" for j in range(words)), metadata={"source": f"doc{i}.md"})
+        for i in range(n)
+    ]
+
+def test_readers(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "one.txt").write_text("first file")
+    (tmp_path / "two.txt").write_text("second file")
+    (tmp_path / "skip.md").write_text("not matched")
+    assert [(d.metadata["source"], d.page_content) for d in iter_directory(str(tmp_path))] == [
+        ("a/one.txt", "first file"), ("two.txt", "second file")
+    ]
+    export = tmp_path / "export.jsonl"
+    export.write_text(
+        json.dumps({"body": "page one", "space": "ENG"}) + "\n\n"
+        + json.dumps({"body": "page two", "metadata": {"source": "p2"}}) + "\n"
+    )
+    pages = list(iter_jsonl(str(export), text_key="body"))
+    assert [(d.page_content, d.metadata) for d in pages] == [("page one", {"space": "ENG"}), ("page two", {"source": "p2"})]
+
+def test_chunks_are_numbered_per_document():
+    chunks = list(chunk_documents(documents(2, words=60), chunk_size=200, chunk_overlap=20))
+    numbers = [(c.metadata["source"], c.metadata["chunk"]) for c in chunks]
+    assert numbers[0] == ("doc0.md", 0) and ("doc1.md", 0) in numbers
+    assert max(n for source, n in numbers if source == "doc0.md") >= 1
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+def test_ingest_writes_every_chunk_in_batches():
+    store = RecordingStore(CountingEmbeddings())
+    stats = ingest(store, documents(10), batch_size=4)
+    assert (stats.documents, stats.chunks, stats.batches) == (10, 10, 3)
+    assert [len(texts) for texts, _ in store.batches] == [4, 4, 2]
+    assert store.batches[0][1][0] == {"source": "doc0.md", "chunk": 0}
+    assert store.flushed
+
+def test_slow_writes_hold_back_embedding():
+    embeddings = CountingEmbeddings()
+    store = RecordingStore(embeddings, delay=0.02)
+    lead = []
+
+    def progress(stats):
+        lead.append(embeddings.calls - len(store.batches))
+    ingest(store, documents(20), batch_size=1, max_pending_batches=2, progress=progress)
+    # Queued batches plus the one being written, plus the one waiting to be queued
+    assert max(lead) <= 4
+    assert len(store.batches) == 20
+
+def test_write_errors_stop_the_run():
+    embeddings = CountingEmbeddings()
+    store = RecordingStore(embeddings, fail_after=1)
+    with pytest.raises(ConnectionError):
+        ingest(store, documents(50), batch_size=1, max_pending_batches=1)
+    assert embeddings.calls < 50
+    assert not store.flushed
+
+def test_incremental_runs_embed_only_changes(tmp_path, embeddings):
+    pytest.importorskip("faiss")
+    from autogen_app.memory_store import MemoryVectorStore
+    store = MemoryVectorStore({"collection_name": "kb", "embedding_model": "fake"})
+    assert ingest(store, documents(5), incremental=True).sync.added == 5
+
+    changed = documents(5)
+    changed[2].page_content = "rewritten"
+    embeddings.embedded.clear()
+    stats = ingest(store, changed[:4], incremental=True)
+    assert embeddings.embedded == ["rewritten"]
+    assert (stats.sync.updated, stats.sync.unchanged, stats.sync.deleted) == (1, 3, 1)
+    assert sorted(store.source_hashes()) == ["doc0.md", "doc1.md", "doc2.md", "doc3.md"]
@@ -0,0 +1,38 @@
+import pytest
+
+from autogen_app.lexical import BM25Index, reciprocal_rank_fusion, tokenize
+
+def test_identifiers_are_kept_whole_and_split():
+    assert tokenize("user_id") == ["user_id", "user", "id"]
+    assert tokenize("createUser(input)") == ["createuser", "create", "user", "input"]
+    assert tokenize("HTTPServer v2") == ["httpserver", "http", "server", "v2", "v", "2"]
+
+def test_exact_identifiers_rank_first():
+    index = BM25Index()
+    index.add_many([
+        ("users", "CREATE TABLE users (user_id INT, email TEXT)"),
+        ("orders", "CREATE TABLE orders (order_id INT, user INT, total INT)"),
+        ("docs", "every user has an id and an email address"),
+    ])
+    assert index.search("user_id", k=1)[0][0] == "users"
+    assert index.search("order_id total")[0][0] == "orders"
+    assert index.search("nothing matches") == []
+
+def test_removed_and_replaced_documents():
+    index = BM25Index()
+    index.add("a", "createUser mutation")
+    index.add("b", "deleteUser mutation")
+    index.add("a", "updateInvoice mutation")
+    assert len(index) == 2
+    assert [doc for doc, _ in index.search("createuser")] == []
+    index.remove(["b", "missing"])
+    assert [doc for doc, _ in index.search("mutation")] == ["a"]
+    index.clear()
+    assert index.search("mutation") == []
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert [doc for doc, _ in fused] == ["a", "c", "b"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+    weighted = reciprocal_rank_fusion([["a", "b"], ["b"]], weights=[1.0, 3.0])
+    assert weighted[0][0] == "b"
@@ -0,0 +1,94 @@
+import time
+import pytest
+from autogen_app.llm_balancer import LoadBalancer
+from autogen_app.streaming import _sink
+
+class ServiceUnavailable(Exception):
+    status_code = 503
+
+@pytest.fixture
+def balancer():
+    balancers = []
+
+    def make(names=("a", "b"), **kwargs):
+        balancer = LoadBalancer(list(names), strategy="latency", **kwargs)
+        # The latency strategy tries the fastest endpoint first
+        for i, endpoint in enumerate(balancer.endpoints):
+            endpoint.latency = 0.01 * (i + 1)
+        balancers.append(balancer)
+        return balancer
+    yield make
+    for balancer in balancers:
+        balancer.close()
+
+def fails(error):
+    def request():
+        raise error
+    return request
+
+def test_fails_over_to_the_next_endpoint(balancer):
+    lb = balancer()
+    assert lb.call([fails(ServiceUnavailable()), lambda: "b"]) == "b"
+    stats = lb.snapshot()
+    assert stats["a"]["errors"] == 1
+    assert stats["b"]["requests"] == 1
+    assert stats["a"]["outstanding"] == stats["b"]["outstanding"] == 0
+
+def test_request_errors_are_not_failed_over(balancer):
+    lb = balancer()
+    called = []
+    with pytest.raises(ValueError):
+        lb.call([fails(ValueError("bad request")), lambda: called.append("b")])
+    assert called == []
+
+def test_raises_the_last_error_when_every_endpoint_fails(balancer):
+    lb = balancer()
+    with pytest.raises(ServiceUnavailable):
+        lb.call([fails(ServiceUnavailable()), fails(ServiceUnavailable())])
+    assert all(endpoint["errors"] == 1 for endpoint in lb.snapshot().values())
+
+def test_ejects_failing_endpoint_until_cooldown(balancer):
+    lb = balancer(failure_threshold=2, cooldown_seconds=60)
+    for _ in range(2):
+        assert lb.call([fails(ServiceUnavailable()), lambda: "b"]) == "b"
+    assert not lb.snapshot()["a"]["healthy"]
+    assert lb.snapshot()["a"]["ejections"] == 1
+    # Ejected, so not tried first despite its lower latency
+    assert lb.call([fails(AssertionError("ejected endpoint called")), lambda: "b"]) == "b"
+    lb.endpoints[0].ejected_until = 0.0
+    assert lb.call([lambda: "a", lambda: "b"]) == "a"
+
+def slow(seconds, result):
+    def request():
+        time.sleep(seconds)
+        return result
+    return request
+
+def test_hedges_slow_requests_on_another_endpoint(balancer, tracer):
+    lb = balancer(hedge_percentile=95, hedge_min_seconds=0.05, min_samples=1)
+    lb.endpoints[0].latencies.append(0.01)
+    start = time.perf_counter()
+    assert lb.call([slow(1.0, "slow"), lambda: "fast"]) == "fast"
+    assert time.perf_counter() - start < 0.5
+    assert lb.snapshot()["a"]["hedges"] == 1
+
+    attempts = {span.attributes["endpoint"]: span for span in tracer.memory.spans("llm.endpoint")}
+    assert attempts["b"].attributes["hedge"] is True
+    time.sleep(1.0)
+    attempts = {span.attributes["endpoint"]: span for span in tracer.memory.spans("llm.endpoint")}
+    assert attempts["a"].attributes["hedge"] is False
+
+def test_does_not_hedge_without_enough_samples(balancer):
+    lb = balancer(hedge_percentile=95, hedge_min_seconds=0.05, min_samples=5)
+    lb.endpoints[0].latencies.append(0.01)
+    assert lb.call([slow(0.2, "slow"), lambda: "fast"]) == "slow"
+    assert lb.snapshot()["a"]["hedges"] == 0
+
+def test_does_not_hedge_streamed_requests(balancer):
+    lb = balancer(hedge_percentile=95, hedge_min_seconds=0.05, min_samples=1)
+    lb.endpoints[0].latencies.append(0.01)
+    token = _sink.set(object())
+    try:
+        assert lb.call([slow(0.2, "slow"), lambda: "fast"]) == "slow"
+    finally:
+        _sink.reset(token)
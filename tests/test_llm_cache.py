@@ -0,0 +1,48 @@
+import copy
+import time
+import pytest
+from autogen_app.llm_cache import SQLiteCompletionCache, get_completion_cache
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SQLiteCompletionCache(str(tmp_path), ttl_seconds=60, max_entries=3)
+    yield cache
+    cache.close()
+
+def test_round_trip(cache):
+    assert cache.get("key") is None
+    assert cache.get("key", "default") == "default"
+    cache.set("key", {"choices": ["answer"]})
+    with cache as entered:
+        assert entered.get("key") == {"choices": ["answer"]}
+    # Exiting the context (as AutoGen does after every lookup) keeps it open
+    assert cache.get("key") == {"choices": ["answer"]}
+
+def test_entries_expire_after_ttl(cache, monkeypatch):
+    cache.set("key", "value")
+    now = time.time()
+    monkeypatch.setattr("autogen_app.llm_cache.time.time", lambda: now + 61)
+    assert cache.get("key") is None
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for i in range(4):
+        cache.set(f"key{i}", i)
+        time.sleep(0.002)
+    cache.get("key0")
+    cache._evict(time.time())
+    remaining = [key for key in ("key0", "key1", "key2", "key3") if cache.get(key) is not None]
+    assert remaining == ["key0", "key2", "key3"]
+
+def test_persists_across_instances(tmp_path):
+    SQLiteCompletionCache(str(tmp_path)).set("key", "value")
+    assert SQLiteCompletionCache(str(tmp_path)).get("key") == "value"
+
+def test_copies_share_the_cache(cache):
+    assert copy.deepcopy(cache) is cache
+
+def test_factory(tmp_path):
+    assert get_completion_cache(None) is None
+    assert get_completion_cache({"backend": "none"}) is None
+    assert isinstance(get_completion_cache({"path": str(tmp_path)}), SQLiteCompletionCache)
+    with pytest.raises(ValueError):
+        get_completion_cache({"backend": "memcached"})
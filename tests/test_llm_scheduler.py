@@ -0,0 +1,180 @@
+import threading
+import time
+import pytest
+from benchmarks.llm_scheduler import complete, fake_endpoint
+from autogen_app.llm_scheduler import (
+    AdaptiveLimit,
+    LLMScheduler,
+    TokenBucket,
+    is_retryable,
+    is_throttle,
+    llm_priority,
+    retry_after
+)
+
+class ProviderError(Exception):
+    def __init__(self, status_code=None, headers=None, response=None):
+        super().__init__(f"provider error {status_code}")
+        self.status_code = status_code
+        self.headers = headers
+        self.response = response
+
+class RateLimitError(Exception):
+    pass
+
+class APIConnectionError(Exception):
+    pass
+
+def test_token_bucket_starts_full_and_queues_callers(clock):
+    bucket = TokenBucket(per_minute=60, burst_seconds=10)
+    assert bucket.reserve(10) == 0.0
+    # Each further unit is one second of refill, in arrival order
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+    clock.advance(2)
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+def test_token_bucket_caps_oversized_requests_at_capacity(clock):
+    bucket = TokenBucket(per_minute=60, burst_seconds=10)
+    assert bucket.reserve(100) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+def test_token_bucket_refund(clock):
+    bucket = TokenBucket(per_minute=60, burst_seconds=10)
+    bucket.reserve(10)
+    bucket.refund(5)
+    assert bucket.reserve(5) == 0.0
+    # A negative refund charges units the reservation underestimated
+    bucket.refund(-3)
+    assert bucket.reserve(1) == pytest.approx(4.0)
+
+def test_adaptive_limit_grows_by_one_per_window_of_successes():
+    limit = AdaptiveLimit(initial=4, maximum=6)
+    for _ in range(4):
+        limit.on_success()
+    assert limit.limit == 4
+    limit.on_success()
+    assert limit.limit == 5
+    for _ in range(50):
+        limit.on_success()
+    assert limit.limit == 6
+
+def test_adaptive_limit_halves_once_per_cooldown(clock):
+    limit = AdaptiveLimit(initial=16, minimum=2, cooldown=2.0)
+    limit.on_throttle()
+    limit.on_throttle()
+    assert limit.limit == 8
+    clock.advance(2)
+    limit.on_throttle()
+    assert limit.limit == 4
+    for _ in range(3):
+        clock.advance(2)
+        limit.on_throttle()
+    assert limit.limit == 2
+
+@pytest.mark.parametrize("error", [
+    ProviderError(429),
+    ProviderError(400, response={"Error": {"Code": "ThrottlingException"}, "ResponseMetadata": {"HTTPStatusCode": 400}}),
+    ProviderError(response={"Error": {"Code": "Other"}, "ResponseMetadata": {"HTTPStatusCode": 429}}),
+    RateLimitError("slow down"),
+])
+def test_throttles_are_retryable(error):
+    assert is_throttle(error)
+    assert is_retryable(error)
+
+@pytest.mark.parametrize("error", [
+    ProviderError(500),
+    ProviderError(503),
+    ProviderError(408),
+    TimeoutError(),
+    ConnectionResetError(),
+    APIConnectionError(),
+])
+def test_transient_failures_are_retryable(error):
+    assert not is_throttle(error)
+    assert is_retryable(error)
+
+@pytest.mark.parametrize("error", [ProviderError(400), ProviderError(404), ValueError("bad request")])
+def test_request_errors_are_not_retried(error):
+    assert not is_throttle(error)
+    assert not is_retryable(error)
+
+def test_retry_after():
+    assert retry_after(ProviderError(429, headers={"retry-after": "2.5"})) == 2.5
+    assert retry_after(ProviderError(429, headers={"Retry-After": "3"})) == 3.0
+    assert retry_after(ProviderError(429, headers={"retry-after": "soon"})) is None
+    assert retry_after(ProviderError(429)) is None
+
+@pytest.fixture
+def endpoint():
+    # Two requests per second with four in the burst
+    server = fake_endpoint(rpm=120, tpm=1_000_000, latency=0.0)
+    yield server, f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+def test_fake_endpoint_throttles_with_retry_after(endpoint):
+    import urllib.error
+    server, url = endpoint
+    params = {"messages": [{"role": "user", "content": "hi"}], "max_tokens": 5}
+    with pytest.raises(urllib.error.HTTPError) as raised:
+        for _ in range(10):
+            complete(url, params)
+    assert is_throttle(raised.value)
+    assert retry_after(raised.value) is not None
+
+def test_scheduler_retries_throttled_requests_after_retry_after(endpoint, tracer):
+    server, url = endpoint
+    scheduler = LLMScheduler(name="fake", max_retries=10, initial_concurrency=8)
+    params = {"messages": [{"role": "user", "content": "hi"}], "max_tokens": 5}
+    create = scheduler.wrap(lambda params: complete(url, params))
+    responses = [create(params) for _ in range(6)]
+
+    assert all(response.choices[0]["message"]["content"] == "ok" for response in responses)
+    assert scheduler.stats["throttled"] == server.throttled > 0
+    assert scheduler.stats["retries"] == scheduler.stats["throttled"]
+    assert scheduler.stats["failed"] == 0
+    assert scheduler.limit.limit < 8
+
+    requests = tracer.memory.spans("llm.request")
+    assert len(requests) == scheduler.stats["requests"]
+    assert {span.attributes["endpoint"] for span in requests} == {"fake"}
+    assert sum(span.error is not None for span in requests) == server.throttled
+    assert len(tracer.memory.spans("llm.queue")) == len(requests)
+
+def test_scheduler_raises_request_errors_at_once():
+    scheduler = LLMScheduler(max_retries=5)
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise ProviderError(400)
+    with pytest.raises(ProviderError):
+        scheduler.call(bad_request)
+    assert len(calls) == 1
+    assert scheduler.stats["failed"] == 1
+
+def test_scheduler_runs_interactive_requests_before_batch():
+    scheduler = LLMScheduler(initial_concurrency=1, min_concurrency=1, max_concurrency=1)
+    release = threading.Event()
+    order = []
+    blocker = threading.Thread(target=scheduler.call, args=(release.wait,))
+    blocker.start()
+    while scheduler.in_flight == 0:
+        time.sleep(0.001)
+
+    def send(priority, label):
+        with llm_priority(priority):
+            scheduler.call(lambda: order.append(label))
+    threads = [threading.Thread(target=send, args=("batch", "batch"))]
+    threads[0].start()
+    while len(scheduler._waiting) < 1:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=send, args=("interactive", "interactive")))
+    threads[1].start()
+    while len(scheduler._waiting) < 2:
+        time.sleep(0.001)
+    release.set()
+    for thread in [blocker] + threads:
+        thread.join()
+    assert order == ["interactive", "batch"]
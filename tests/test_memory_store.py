@@ -0,0 +1,94 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from langchain.schema import Document
+from autogen_app.faiss_index import INDEX_TYPES
+from autogen_app.memory_store import MemoryVectorStore
+
+INDEXES = {
+    "flat": {"type": "flat"},
+    "hnsw": {"type": "hnsw", "M": 8, "ef_search": 64},
+    "ivf_flat": {"type": "ivf_flat", "nlist": 2, "nprobe": 2, "train_size": 20},
+    "ivf_pq": {"type": "ivf_pq", "nlist": 2, "nprobe": 2, "pq_m": 4, "pq_nbits": 4, "train_size": 20}
+}
+
+def make_store(tmp_path, kind, **config):
+    return MemoryVectorStore({
+        "type": "memory",
+        "collection_name": "kb",
+        "embedding_model": "fake",
+        "index": INDEXES[kind],
+        "snapshot_dir": str(tmp_path),
+        **config
+    })
+
+def document(i, version=1):
+    return Document(
+        page_content=f"document {i} version {version} about topic{i} and words{i % 3}",
+        metadata={"source": f"doc{i}.md"}
+    )
+
+def contents(store):
+    """Every document a search returns, which should be every live one."""
+    return sorted(doc.page_content for doc in store.similarity_search("document about topic", k=100))
+
+@pytest.mark.parametrize("kind", INDEX_TYPES)
+def test_snapshot_loads_memory_mapped_and_takes_writes(tmp_path, embeddings, kind):
+    store = make_store(tmp_path, kind)
+    store.add_documents([document(i) for i in range(30)])
+    assert store.save() == "v1"
+
+    loaded = make_store(tmp_path, kind)
+    assert loaded.read_only
+    assert contents(loaded) == contents(store)
+
+    loaded.add_documents([document(i) for i in range(30, 35)])
+    assert not loaded.read_only
+    assert len(contents(loaded)) == 35
+    assert loaded.save() == "v2"
+    assert len(contents(make_store(tmp_path, kind))) == 35
+
+@pytest.mark.parametrize("kind", INDEX_TYPES)
+def test_hybrid_search_on_a_loaded_snapshot(tmp_path, embeddings, kind):
+    store = make_store(tmp_path, kind, hybrid={"enabled": True})
+    store.add_documents([document(i) for i in range(30)])
+    store.save()
+    loaded = make_store(tmp_path, kind, hybrid={"enabled": True})
+    assert loaded.similarity_search("topic7", k=1)[0].metadata["source"] == "doc7.md"
+
+@pytest.mark.parametrize("kind", INDEX_TYPES)
+@pytest.mark.parametrize("compact_ratio", [1.0, 0.0])
+def test_sync_updates_and_deletes(tmp_path, embeddings, kind, compact_ratio):
+    store = make_store(tmp_path, kind, compact_ratio=compact_ratio)
+    result = store.sync_documents([document(i) for i in range(30)])
+    assert result.added == 30
+
+    # Two sources change, one goes away
+    documents = [document(i, version=2 if i in (3, 17) else 1) for i in range(30) if i != 9]
+    result = store.sync_documents(documents)
+    assert (result.updated, result.deleted, result.unchanged) == (2, 1, 27)
+    expected = sorted(doc.page_content for doc in documents)
+    assert contents(store) == expected
+    assert store.source_hashes().keys() == {doc.metadata["source"] for doc in documents}
+
+    # Vectors added after the deletes line up with their documents too
+    store.add_documents([document(i) for i in range(30, 33)])
+    expected += [document(i).page_content for i in range(30, 33)]
+    assert contents(store) == sorted(expected)
+    assert store.similarity_search(document(31).page_content, k=1)[0].metadata["source"] == "doc31.md"
+
+    store.save()
+    assert contents(make_store(tmp_path, kind)) == sorted(expected)
+
+def test_hybrid_search_finds_exact_identifiers_and_forgets_deleted_sources(tmp_path, embeddings):
+    store = make_store(tmp_path, "flat", hybrid={"enabled": True})
+    store.add_documents([document(i) for i in range(30)] + [
+        Document(page_content="CREATE TABLE accounts (account_id INT)", metadata={"source_id": "accounts.sql"})
+    ])
+    assert store.similarity_search("accounts account_id", k=1)[0].metadata["source_id"] == "accounts.sql"
+    store.delete_sources(["accounts.sql"])
+    results = store.similarity_search("accounts account_id", k=5)
+    assert len(results) == 5
+    assert all(doc.metadata.get("source_id") != "accounts.sql" for doc in results)
@@ -0,0 +1,185 @@
+import uuid
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from sqlalchemy import Column, MetaData, String, Table
+from autogen_app import pgvector_store
+from autogen_app.pgvector_store import PGVectorStore
+from autogen_app.registry import ResourceRegistry
+
+COLLECTION = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+class FakeConnection:
+    """Records every statement; answers the collection id and row count lookups."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def execution_options(self, **options):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.engine.statements.append(sql)
+        if "FROM langchain_pg_collection" in sql:
+            return SimpleNamespace(scalar=lambda: COLLECTION)
+        if sql.startswith("SELECT count(*)"):
+            return SimpleNamespace(scalar=lambda: self.engine.rows)
+        return []
+
+class FakeEngine:
+    def __init__(self, rows=0):
+        self.rows = rows
+        self.statements = []
+
+    def connect(self):
+        return FakeConnection(self)
+
+    begin = connect
+
+class FakePGVector:
+    EmbeddingStore = SimpleNamespace(
+        __table__=Table("langchain_pg_embedding", MetaData(), Column("id", String, primary_key=True))
+    )
+
+    def __init__(self, **kwargs):
+        pass
+
+@pytest.fixture
+def engine(monkeypatch, embeddings):
+    engine = FakeEngine()
+    monkeypatch.setattr(ResourceRegistry, "get_engine", lambda self, url, **args: engine)
+    monkeypatch.setattr(pgvector_store, "PGVector", FakePGVector)
+    return engine
+
+def make_store(name="knowledge_base", **config):
+    return PGVectorStore({
+        "type": "pgvector",
+        "collection_name": name,
+        "embedding_model": "fake",
+        "dimensions": 32,
+        "host": "localhost",
+        "port": 5432,
+        "database": "vectors",
+        "user": "app",
+        "password": "secret",
+        **config
+    })
+
+def index_statements(engine, method):
+    return [sql for sql in engine.statements if f"USING {method}" in sql]
+
+def test_hnsw_index_is_created_with_the_store(engine):
+    make_store(index={"type": "hnsw", "m": 24})
+    [statement] = index_statements(engine, "hnsw")
+    assert statement.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_knowledge_base_embedding_hnsw ")
+    assert "((embedding::vector(32)) vector_cosine_ops) WITH (m = 24, ef_construction = 64)" in statement
+    assert statement.endswith(f"WHERE collection_id = '{COLLECTION}'::uuid")
+
+def test_ivfflat_is_left_to_maintenance(engine):
+    store = make_store(index={"type": "ivfflat", "lists": 10})
+    assert index_statements(engine, "ivfflat") == []
+    assert not any(sql.startswith("SELECT count(*)") for sql in engine.statements)
+
+    engine.rows = 10 * 39 - 1
+    store.ensure_index()
+    assert index_statements(engine, "ivfflat") == []
+
+    engine.rows = 10 * 39
+    store.ensure_index()
+    [statement] = index_statements(engine, "ivfflat")
+    assert "WITH (lists = 10)" in statement
+
+def test_auto_create_can_be_turned_off(engine):
+    make_store(index={"type": "hnsw", "auto_create": False})
+    assert engine.statements == []
+
+def test_hybrid_search_gets_a_full_text_index(engine):
+    make_store(hybrid={"enabled": True, "text_search_config": "english"})
+    assert any(
+        "USING gin (to_tsvector('english', document))" in sql for sql in engine.statements
+    )
+    store = make_store("other", hybrid={"enabled": True, "text_search_config": "english'; DROP TABLE x; --"})
+    with pytest.raises(ValueError):
+        store.similarity_search("orders")
+
+def test_search_filters_on_the_collection_and_sets_parameters(engine):
+    store = make_store(index={"type": "hnsw", "ef_search": 80})
+    engine.statements.clear()
+    assert store.similarity_search("orders", k=3) == []
+    settings, search = engine.statements
+    assert settings == "SET LOCAL hnsw.ef_search = 80"
+    assert f"WHERE collection_id = '{COLLECTION}'::uuid ORDER BY embedding::vector(32) <=>" in search
+    assert search.endswith("LIMIT :k")
+
+def test_batched_searches_share_one_statement(engine):
+    first = make_store(index={"type": "ivfflat", "probes": 4})
+    second = make_store("graphql_schema", index={"type": "ivfflat", "probes": 10}, hybrid={"enabled": True})
+    engine.statements.clear()
+    assert PGVectorStore.search_batch([(first, "orders", 2), (second, "orders", 5)]) == [[], []]
+    settings, search = engine.statements
+    assert settings == "SET LOCAL ivfflat.probes = 10"
+    assert search.count("UNION ALL SELECT 1 AS search") == 1
+    assert ":k_0" in search and ":k_1" in search and ":query_1" in search
+    assert search.endswith("ORDER BY search, distance")
+
+def test_writes_bump_the_collection_version(engine):
+    store = make_store()
+    engine.statements.clear()
+    store.add_embeddings(["orders"], [[0.0] * 32], [{"source_id": "a.md"}])
+    store.delete_sources(["a.md"])
+    bumps = [sql for sql in engine.statements if sql.startswith("UPDATE langchain_pg_collection")]
+    assert len(bumps) == 2
+    assert "jsonb_build_object('version'" in bumps[0]
+
+def test_pool_and_timeout_settings():
+    args = pgvector_store.engine_args({"pool_size": 3, "statement_timeout_ms": 5000})
+    assert args["pool_size"] == 3 and args["max_overflow"] == 10
+    assert args["connect_args"] == {"options": "-c statement_timeout=5000"}
+    args = pgvector_store.engine_args({"statement_timeout_ms": 5000}, is_async=True)
+    assert args["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+    args = pgvector_store.engine_args({"statement_timeout_ms": 5000, "async_driver": "psycopg"}, is_async=True)
+    assert args["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+def test_collections_share_one_engine(monkeypatch, embeddings):
+    created = []
+    monkeypatch.setattr("sqlalchemy.create_engine", lambda url, **args: created.append(url) or FakeEngine())
+    monkeypatch.setattr(pgvector_store, "PGVector", FakePGVector)
+    first = make_store(index={"type": "hnsw", "auto_create": False})
+    second = make_store("graphql_schema", index={"type": "hnsw", "auto_create": False})
+    assert first.engine is second.engine
+    assert len(created) == 1
+    assert first.batch_key() == second.batch_key()
+    with pytest.raises(ValueError):
+        make_store(async_driver="aiopg").async_engine
+
+class FakeAsyncConnection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        return FakeConnection(self.engine).execute(statement, params)
+
+def test_async_search_runs_on_the_async_engine(engine, monkeypatch):
+    import asyncio
+    store = make_store(index={"type": "hnsw", "ef_search": 40})
+    async_engine = FakeEngine()
+    async_engine.begin = lambda: FakeAsyncConnection(async_engine)
+    monkeypatch.setattr(ResourceRegistry, "get_async_engine", lambda self, url, **args: async_engine)
+    assert asyncio.run(store.asimilarity_search("orders", k=2)) == []
+    assert async_engine.statements[0] == "SET LOCAL hnsw.ef_search = 40"
+    assert "LIMIT :k" in async_engine.statements[1]
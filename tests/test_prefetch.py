@@ -0,0 +1,78 @@
+import threading
+import pytest
+
+pytest.importorskip("numpy")
+
+from autogen_app.prefetch import Prefetcher, prefetched, serve_prefetched
+from autogen_app.tracing import span
+
+def make_tools(calls=None, gate=None):
+    calls = [] if calls is None else calls
+
+    def search(name):
+        def tool(query):
+            calls.append((name, query))
+            if gate is not None:
+                gate.wait()
+            with span("vector_store.search", collection=name):
+                return f"{name}: {query}"
+        return tool
+    return {name: search(name) for name in ("retrieve_knowledge", "get_sql_schema")}
+
+def test_matching_queries_are_served_from_the_batch():
+    calls = []
+    tools = serve_prefetched(make_tools(calls))
+    prefetcher = Prefetcher(tools, match="exact")
+    with prefetcher.prefetch("Orders  table") as batch:
+        assert tools["get_sql_schema"]("orders table") == "get_sql_schema: Orders  table"
+        assert tools["retrieve_knowledge"]("refund policy") == "retrieve_knowledge: refund policy"
+    assert (batch.hits, batch.misses) == (1, 1)
+    assert prefetcher.stats == {"requests": 1, "hits": 1, "misses": 1}
+    # Prefetched searches ran once each; the miss searched directly
+    assert sorted(calls) == [
+        ("get_sql_schema", "Orders  table"),
+        ("retrieve_knowledge", "Orders  table"),
+        ("retrieve_knowledge", "refund policy")
+    ]
+    assert prefetched("get_sql_schema", "orders table") is None
+    prefetcher.close()
+
+def test_semantic_matching_uses_the_threshold(embeddings):
+    prefetcher = Prefetcher(make_tools(), match="semantic", threshold=0.7, embeddings=embeddings)
+    with prefetcher.prefetch("columns of the orders table"):
+        assert prefetched("get_sql_schema", "orders table columns") is not None
+        assert prefetched("retrieve_knowledge", "refund policy for invoices") is None
+    prefetcher.close()
+    with pytest.raises(ValueError):
+        Prefetcher(make_tools(), match="semantic")
+
+def test_each_call_is_looked_up_once(embeddings):
+    prefetcher = Prefetcher(make_tools(), match="semantic", threshold=0.99, embeddings=embeddings)
+    with prefetcher.prefetch("columns of the orders table") as batch:
+        # The batch hook and the tool it falls back to ask for the same call
+        assert prefetched("get_sql_schema", "users table") is None
+        assert prefetched("get_sql_schema", "users table") is None
+    assert batch.misses == 1
+    assert embeddings.embedded.count("users table") == 1
+    prefetcher.close()
+
+def test_slow_searches_fall_back_to_the_tool():
+    gate = threading.Event()
+    prefetcher = Prefetcher(make_tools(gate=gate), match="any", timeout=0.05)
+    with prefetcher.prefetch("orders") as batch:
+        assert prefetched("get_sql_schema", "orders") is None
+    gate.set()
+    assert batch.misses == 1
+    prefetcher.close()
+
+def test_searches_keep_the_request_span_as_parent(tracer):
+    prefetcher = Prefetcher(make_tools(), match="any")
+    with span("request") as request:
+        with prefetcher.prefetch("orders"):
+            assert prefetched("get_sql_schema", "orders") == "get_sql_schema: orders"
+            assert prefetched("retrieve_knowledge", "orders") == "retrieve_knowledge: orders"
+    searches = tracer.memory.spans("vector_store.search")
+    assert len(searches) == 2
+    assert {s.parent_id for s in searches} == {request.span_id}
+    assert {s.trace_id for s in searches} == {request.trace_id}
+    prefetcher.close()
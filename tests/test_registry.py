@@ -0,0 +1,83 @@
+import threading
+import pytest
+
+from autogen_app.registry import ResourceRegistry, get_registry, reset_registry
+
+class Resource:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+def test_resources_are_created_once_across_threads():
+    registry = ResourceRegistry()
+    created = []
+
+    def factory():
+        created.append(Resource())
+        return created[-1]
+    barrier = threading.Barrier(8)
+    results = []
+
+    def get():
+        barrier.wait()
+        results.append(registry._get_or_create(("thing",), factory))
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
+
+def test_close_releases_everything_and_later_calls_recreate():
+    registry = ResourceRegistry()
+    first = registry._get_or_create(("thing",), Resource)
+    registry.close()
+    assert first.closed
+    assert registry._get_or_create(("thing",), Resource) is not first
+
+def test_reset_registry_starts_a_new_one():
+    registry = get_registry()
+    assert get_registry() is registry
+    resource = registry._get_or_create(("thing",), Resource)
+    reset_registry()
+    assert resource.closed
+    assert get_registry() is not registry
+    reset_registry()
+
+def test_embedding_models_load_on_first_embed():
+    pytest.importorskip("langchain_core")
+    registry = ResourceRegistry()
+    embeddings = registry.get_embeddings("all-MiniLM-L6-v2")
+    assert registry.get_embeddings("all-MiniLM-L6-v2") is embeddings
+    assert registry.get_embeddings("other-model") is not embeddings
+    assert not embeddings.loaded
+
+def test_cached_embeddings_share_the_model_and_the_cache(embeddings, tmp_path):
+    pytest.importorskip("langchain_core")
+    registry = get_registry()
+    cache_config = {"max_entries": 10, "path": str(tmp_path / "embeddings.sqlite")}
+    first = registry.get_embeddings("fake", cache_config)
+    assert registry.get_embeddings("fake", cache_config) is first
+    assert first.embeddings is embeddings
+    assert registry.get_embeddings("other", cache_config).cache is first.cache
+
+def test_engines_are_keyed_by_url_and_pool_settings(monkeypatch):
+    pytest.importorskip("sqlalchemy")
+    from sqlalchemy.engine import URL
+    registry = ResourceRegistry()
+    created = []
+    monkeypatch.setattr("sqlalchemy.create_engine", lambda url, **args: created.append((url, args)) or Resource())
+
+    def url(password):
+        return URL.create("postgresql+psycopg2", username="app", password=password, host="db", database="vectors")
+    engine = registry.get_engine(url("a"), pool_size=5)
+    assert registry.get_engine(url("a"), pool_size=5) is engine
+    # The rendered URL hides passwords, the key must not
+    assert registry.get_engine(url("b"), pool_size=5) is not engine
+    assert registry.get_engine(url("a"), pool_size=10) is not engine
+    assert len(created) == 3
+    registry.close()
+    assert engine.closed
@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from autogen_app.router import SUPERVISOR, EmbeddingRouter
+
+EXAMPLES = {
+    "get_sql_schema": ["columns of the orders table", "which table stores customers", "orders table primary key"],
+    "get_graphql_schema": ["fields of the invoice graphql type", "graphql mutation for invoices"],
+    SUPERVISOR: ["compare the orders table with the invoice graphql type"]
+}
+
+@pytest.mark.parametrize("method", ["centroid", "knn"])
+def test_single_domain_questions_are_routed(embeddings, method):
+    router = EmbeddingRouter(embeddings, EXAMPLES, method=method, threshold=0.6, margin=0.05, k=2)
+    decision = router.route("columns of the customers table")
+    assert decision.route == "get_sql_schema"
+    assert decision.score == max(decision.scores.values())
+    assert router.route("which table stores orders").route == "get_sql_schema"
+    assert router.stats["routed"] == 2
+    if method == "centroid":
+        assert router.route("fields of the graphql invoice type").route == "get_graphql_schema"
+
+def test_unsure_and_supervisor_questions_fall_back(embeddings):
+    router = EmbeddingRouter(embeddings, EXAMPLES, threshold=0.6, margin=0.05)
+    assert not router.route("compare the orders table with the invoice graphql type").routed
+    assert not router.route("refund policy for enterprise plans").routed
+    strict = EmbeddingRouter(embeddings, EXAMPLES, threshold=0.99)
+    assert not strict.route("columns of the customers table").routed
+    assert router.stats["fallback"] == 2
+
+def test_outcomes_feed_accuracy(embeddings):
+    router = EmbeddingRouter(embeddings, EXAMPLES, threshold=0.6)
+    assert router.accuracy is None
+    routed = router.route("columns of the customers table")
+    router.record_outcome(routed, "get_sql_schema")
+    router.record_outcome(routed, None)
+    router.record_outcome(router.route("refund policy"), "get_sql_schema")
+    assert (router.stats["correct"], router.stats["incorrect"]) == (1, 1)
+    assert router.accuracy == 0.5
+
+def test_evaluate_reports_coverage_and_accuracy(embeddings):
+    router = EmbeddingRouter(embeddings, EXAMPLES, threshold=0.6)
+    report = router.evaluate([
+        ("columns of the customers table", "get_sql_schema"),
+        ("fields of the graphql invoice type", "get_sql_schema"),
+        ("refund policy", SUPERVISOR),
+        ("which table stores orders", "get_sql_schema")
+    ])
+    assert report == {"queries": 4, "coverage": 0.75, "accuracy": pytest.approx(2 / 3)}
+
+def test_unknown_methods_are_rejected(embeddings):
+    with pytest.raises(ValueError):
+        EmbeddingRouter(embeddings, EXAMPLES, method="svm")
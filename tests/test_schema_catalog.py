@@ -0,0 +1,124 @@
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+from autogen_app.schema_catalog import SchemaCatalog, parse_ddl, parse_sdl
+
+DDL = """
+CREATE TABLE IF NOT EXISTS customers (
+    id INT PRIMARY KEY,
+    email TEXT NOT NULL,
+    created_at TIMESTAMP
+);
+CREATE TABLE sales.orders (
+    order_id INT,
+    customer_id INT,
+    total DECIMAL(10, 2),
+    status VARCHAR(20) CHECK (status IN ('new', 'paid')),
+    PRIMARY KEY (order_id),
+    CONSTRAINT fk_customer FOREIGN KEY (customer_id) REFERENCES customers (id)
+);
+CREATE TABLE `order_items` (
+    `order_id` INT REFERENCES sales.orders(order_id),
+    sku TEXT,
+    created_at TIMESTAMP
+);
+CREATE TABLE audit_log (id INT, status TEXT, created_at TIMESTAMP
+"""
+
+SDL = '''
+"""A customer account"""
+type User {
+  id: ID!
+  # internal only
+  orders(first: Int): [Order!]!
+}
+type Order { id: ID! total: Float status: OrderStatus }
+enum OrderStatus { NEW PAID }
+union SearchResult = User | Order
+scalar DateTime
+type Query { user(id: ID!): User orders: [Order] }
+type Mutation { createUser(email: String!): User }
+'''
+
+def sql_catalog(**kwargs):
+    catalog = SchemaCatalog("sql", **kwargs)
+    catalog.add_document(Document(page_content=DDL, metadata={"source_id": "schema.sql"}))
+    return catalog
+
+def graphql_catalog():
+    catalog = SchemaCatalog("graphql")
+    catalog.add_document(Document(page_content=SDL, metadata={"source_id": "schema.graphql"}))
+    return catalog
+
+def test_parse_ddl():
+    customers, orders, items = parse_ddl(DDL)
+    assert customers.primary_key == ["id"]
+    assert [(c.name, c.type) for c in orders.columns] == [
+        ("order_id", "INT"), ("customer_id", "INT"), ("total", "DECIMAL(10,2)"), ("status", "VARCHAR(20)")
+    ]
+    assert orders.name == "sales.orders"
+    assert orders.primary_key == ["order_id"]
+    assert orders.references == {"customers"}
+    assert items.name == "order_items"
+    assert items.columns[0].references == ("sales.orders", "order_id")
+    # The cut-off audit_log statement is skipped rather than half-parsed
+
+def test_parse_sdl():
+    types = {t.name: t for t in parse_sdl(SDL)}
+    assert [str(f) for f in types["User"].fields] == ["id: ID!", "orders(first: Int): [Order!]!"]
+    assert types["User"].fields[1].type_name == "Order"
+    assert [f.name for f in types["OrderStatus"].fields] == ["NEW", "PAID"]
+    assert types["SearchResult"].kind == "union"
+    assert types["DateTime"].kind == "scalar"
+
+def test_named_tables_answer_with_their_neighbours():
+    match = sql_catalog().lookup("what does an order hold")
+    assert match.strong
+    assert match.text.startswith("CREATE TABLE sales.orders")
+    assert "-- related\nCREATE TABLE IF NOT EXISTS customers" in match.text
+    assert "-- related\nCREATE TABLE `order_items`" in match.text
+    # With no expansion only the named tables are rendered
+    match = sql_catalog(expand_depth=0).lookup("how is an order linked to its customer")
+    assert "CREATE TABLE sales.orders" in match.text
+    assert "CREATE TABLE IF NOT EXISTS customers" in match.text
+    assert "order_items" not in match.text
+
+def test_shared_columns_are_weak_matches():
+    catalog = sql_catalog()
+    match = catalog.lookup("rows with a created_at")
+    assert match is None
+    match = catalog.lookup("where is the sku stored")
+    assert not match.strong
+    assert match.score == 1.0
+    assert catalog.lookup("revenue forecast") is None
+
+def test_operations_list_their_fields_and_return_types():
+    catalog = graphql_catalog()
+    match = catalog.lookup("which mutations are there")
+    assert match.strong
+    assert match.text.startswith("type Mutation {\n  createUser(email: String!): User\n}")
+    match = catalog.lookup("how do I call createUser")
+    assert "type User {" in match.text
+    assert "# related\ntype Order" in match.text
+
+def test_sources_are_replaced_and_removed():
+    catalog = sql_catalog()
+    catalog.add_document(Document(page_content="CREATE TABLE invoices (id INT)", metadata={"source_id": "schema.sql"}))
+    assert sorted(catalog.tables) == ["invoices"]
+    catalog.remove_sources(["schema.sql"])
+    assert len(catalog) == 0
+    assert catalog.lookup("invoices") is None
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "catalog.json"
+    sql_catalog(path=str(path)).save()
+    loaded = SchemaCatalog("sql", path=str(path))
+    assert sorted(loaded.tables) == ["customers", "order_items", "sales.orders"]
+    assert loaded.tables["order_items"].columns[0].references == ("sales.orders", "order_id")
+    assert loaded.lookup("customers").strong
+
+def test_unknown_kinds_are_rejected():
+    with pytest.raises(ValueError):
+        SchemaCatalog("protobuf")
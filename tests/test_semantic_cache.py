@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip("faiss")
+
+from autogen_app.semantic_cache import SemanticAnswerCache
+
+class FakeStore:
+    """A store written to by another process, seen only through ``data_version``."""
+
+    def __init__(self):
+        self.version = "1"
+        self.listeners = []
+
+    def on_change(self, callback):
+        self.listeners.append(callback)
+
+    def data_version(self):
+        return self.version
+
+@pytest.mark.parametrize("index", [{"type": "flat"}, {"type": "hnsw"}])
+def test_paraphrases_hit_and_other_questions_miss(embeddings, index):
+    cache = SemanticAnswerCache(embeddings, threshold=0.9, index=index)
+    assert cache.lookup("how many orders were placed") is None
+    cache.store("how many orders were placed", "42", collections=["databricks_schema"])
+    hit = cache.lookup("How many orders were placed")
+    assert hit.answer == "42"
+    assert hit.score == pytest.approx(1.0)
+    assert cache.lookup("which graphql type holds invoices") is None
+
+def test_old_and_least_recently_used_answers_go(embeddings):
+    cache = SemanticAnswerCache(embeddings, max_entries=2, ttl_seconds=60)
+    cache.store("first question", "1")
+    cache.store("second question", "2")
+    assert cache.lookup("first question").answer == "1"
+    cache.store("third question", "3")
+    assert cache.lookup("second question") is None
+    assert cache.lookup("first question").answer == "1"
+
+    cache.lookup("first question").created_at -= 120
+    assert cache.lookup("first question") is None
+
+def test_invalidation_is_per_collection(embeddings):
+    cache = SemanticAnswerCache(embeddings)
+    cache.store("orders table columns", "sql", collections=["databricks_schema"])
+    cache.store("invoice type fields", "graphql", collections=["graphql_schema"])
+    cache.invalidate(["graphql_schema"])
+    assert cache.lookup("invoice type fields") is None
+    assert cache.lookup("orders table columns").answer == "sql"
+    cache.invalidate()
+    assert cache.lookup("orders table columns") is None
+
+def test_writes_in_this_process_invalidate(embeddings):
+    cache = SemanticAnswerCache(embeddings)
+    store = FakeStore()
+    cache.watch(store, "knowledge_base")
+    cache.store("what is a refund", "money back", collections=["knowledge_base"])
+    for callback in store.listeners:
+        callback(store, [], ["refunds.md"])
+    assert cache.lookup("what is a refund") is None
+
+def test_writes_by_other_processes_invalidate_after_the_check_interval(embeddings, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("autogen_app.semantic_cache.time.monotonic", lambda: now[0])
+    cache = SemanticAnswerCache(embeddings, version_check_seconds=5)
+    store = FakeStore()
+    cache.watch(store, "knowledge_base")
+    cache.store("what is a refund", "money back", collections=["knowledge_base"])
+    cache.store("orders table columns", "sql", collections=["databricks_schema"])
+
+    store.version = "2"
+    assert cache.lookup("what is a refund").answer == "money back"
+    now[0] += 5
+    assert cache.lookup("what is a refund") is None
+    assert cache.lookup("orders table columns").answer == "sql"
+
+def test_unreadable_versions_keep_the_cache(embeddings, monkeypatch):
+    cache = SemanticAnswerCache(embeddings, version_check_seconds=0)
+    store = FakeStore()
+    cache.watch(store, "knowledge_base")
+    cache.store("what is a refund", "money back", collections=["knowledge_base"])
+
+    def unavailable():
+        raise ConnectionError("database is down")
+    monkeypatch.setattr(store, "data_version", unavailable)
+    assert cache.lookup("what is a refund").answer == "money back"
@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+import autogen_app
+
+HEAVY = ["autogen", "faiss", "boto3", "google.generativeai", "sentence_transformers", "torch"]
+
+def heavy_modules_loaded(module):
+    """The heavy dependencies a fresh interpreter has loaded after ``import module``."""
+    program = f"import json, sys; import {module}; print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    output = subprocess.run(
+        [sys.executable, "-c", program],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    ).stdout
+    return json.loads(output)
+
+def test_package_import_is_light():
+    assert heavy_modules_loaded("autogen_app") == []
+
+@pytest.mark.parametrize("module", ["autogen_app.maintenance", "autogen_app.vector_store"])
+def test_submodule_imports_are_light(module):
+    pytest.importorskip("langchain")
+    assert heavy_modules_loaded(module) == []
+
+def test_package_exports_resolve_on_access():
+    assert "create_agents" in dir(autogen_app)
+    with pytest.raises(AttributeError):
+        autogen_app.missing
+
+def test_memory_store_keeps_its_old_import_path():
+    pytest.importorskip("faiss")
+    pytest.importorskip("langchain_community")
+    from autogen_app import memory_store, vector_store
+    assert vector_store.MemoryVectorStore is memory_store.MemoryVectorStore
+    with pytest.raises(AttributeError):
+        vector_store.missing
+
+class FakeModel:
+    def embed_documents(self, texts):
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+def test_lazy_embeddings_load_on_first_embed():
+    pytest.importorskip("langchain_core")
+    from autogen_app.lazy import LazyEmbeddings
+    built = []
+    embeddings = LazyEmbeddings(lambda: built.append(1) or FakeModel(), name="fake")
+    assert not embeddings.loaded and built == []
+    assert embeddings.embed_query("orders") == [6.0]
+    assert embeddings.embed_documents(["a", "bb"]) == [[1.0], [2.0]]
+    assert embeddings.loaded and built == [1]
+    embeddings.close()
+    assert not embeddings.loaded
+
+def test_registry_embeddings_defer_the_model(monkeypatch):
+    pytest.importorskip("langchain_community")
+    from langchain_community import embeddings as community
+    from autogen_app.registry import ResourceRegistry
+    created = []
+    monkeypatch.setattr(community, "HuggingFaceEmbeddings", lambda model_name: created.append(model_name) or FakeModel())
+    embeddings = ResourceRegistry().get_embeddings("all-MiniLM-L6-v2")
+    assert created == []
+    assert embeddings.embed_query("orders") == [6.0]
+    assert created == ["all-MiniLM-L6-v2"]
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("autogen")
+
+from autogen_app.runner import SupervisorRunner
+from autogen_app.streaming import EventSink, StreamingBedrockRuntime, StreamingIOStream, emit, streaming
+from autogen_app.tools import ParallelToolExecutor
+
+def collect(work):
+    """Run ``work`` in a thread with an active sink; the events it emitted."""
+    async def main():
+        queue = asyncio.Queue()
+        sink = EventSink(asyncio.get_running_loop(), queue)
+
+        def run():
+            with sink.activate():
+                work()
+            sink.close()
+        thread = threading.Thread(target=run)
+        thread.start()
+        events = []
+        while (event := await queue.get()) is not None:
+            events.append(event)
+        thread.join()
+        return events, sink
+    return asyncio.run(main())
+
+def test_events_reach_the_sink_only_inside_a_stream():
+    assert not streaming()
+    emit("token", text="ignored")
+
+    def work():
+        assert streaming()
+        emit("token", text="Hel")
+        emit("token", text="lo")
+        emit("message", content="Hello")
+    events, sink = collect(work)
+    assert [(e["type"], e.get("text")) for e in events] == [("token", "Hel"), ("token", "lo"), ("message", None)]
+    assert events[0]["elapsed"] <= events[-1]["elapsed"]
+    assert sink.first_token == events[0]["elapsed"]
+    assert not streaming()
+
+def test_autogen_stream_deltas_become_tokens():
+    def work():
+        io = StreamingIOStream(SimpleNamespace(emit=emit))
+        io.print("console output")
+        io.send(SimpleNamespace(type="stream", content=SimpleNamespace(content="Hi")))
+        io.send(SimpleNamespace(type="text", content=SimpleNamespace(content="not a delta")))
+    events, _ = collect(work)
+    assert [(e["type"], e["text"]) for e in events] == [("token", "Hi")]
+
+class FakeRuntime:
+    def __init__(self, stream, fail=False):
+        self.stream = stream
+        self.fail = fail
+
+    def converse(self, **request):
+        return {"output": "whole"}
+
+    def converse_stream(self, **request):
+        def events():
+            yield from self.stream
+            if self.fail:
+                raise ConnectionError("stream dropped")
+        return {"stream": events(), "ResponseMetadata": {"RequestId": "r1"}}
+
+STREAM = [
+    {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": "Let me "}}},
+    {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": "look."}}},
+    {"contentBlockStart": {"contentBlockIndex": 1, "start": {"toolUse": {"toolUseId": "t1", "name": "search"}}}},
+    {"contentBlockDelta": {"contentBlockIndex": 1, "delta": {"toolUse": {"input": '{"query": '}}}},
+    {"contentBlockDelta": {"contentBlockIndex": 1, "delta": {"toolUse": {"input": '"orders"}'}}}},
+    {"messageStop": {"stopReason": "tool_use"}},
+    {"metadata": {"usage": {"inputTokens": 10, "outputTokens": 5, "totalTokens": 15}}}
+]
+
+def test_bedrock_streams_and_rebuilds_the_converse_response():
+    runtime = StreamingBedrockRuntime(FakeRuntime(STREAM))
+    assert runtime.converse(modelId="m") == {"output": "whole"}
+    responses = []
+    events, _ = collect(lambda: responses.append(runtime.converse(modelId="m")))
+    assert [e["text"] for e in events] == ["Let me ", "look."]
+    [response] = responses
+    assert response["output"]["message"]["content"] == [
+        {"text": "Let me look."},
+        {"toolUse": {"toolUseId": "t1", "name": "search", "input": {"query": "orders"}}}
+    ]
+    assert response["stopReason"] == "tool_use"
+    assert response["usage"]["totalTokens"] == 15
+    assert response["ResponseMetadata"] == {"RequestId": "r1"}
+
+def test_a_stream_failing_midway_voids_its_tokens():
+    runtime = StreamingBedrockRuntime(FakeRuntime(STREAM[:1], fail=True))
+
+    def work():
+        with pytest.raises(ConnectionError):
+            runtime.converse(modelId="m")
+    events, _ = collect(work)
+    assert [e["type"] for e in events] == ["token", "reset"]
+
+def test_tool_calls_and_results_are_emitted():
+    executor = ParallelToolExecutor({"search": lambda query: f"results for {query}"})
+    events, _ = collect(lambda: executor.run([("search", {"query": "a"}), ("missing", {})]))
+    executor.close()
+    assert [(e["type"], e["name"]) for e in events] == [
+        ("tool_call", "search"), ("tool_call", "missing"), ("tool_result", "search"), ("tool_result", "missing")
+    ]
+    assert events[0]["arguments"] == {"query": "a"}
+    assert events[2]["content"] == "results for a"
+    assert events[3]["content"].startswith("Error")
+
+class FakeRunner:
+    """Stands in for ``SupervisorRunner``: ``run`` streams two tokens, or fails
+    on the query "fail"."""
+    router = None
+    prefetcher = None
+    astream = SupervisorRunner.astream
+
+    def __init__(self, agents=None, config=None):
+        pass
+
+    def run(self, query, user_proxy=None, clear_history=True):
+        if query == "fail":
+            raise RuntimeError("model unavailable")
+        emit("token", text="An ")
+        emit("token", text="answer")
+        return SimpleNamespace(answer="An answer", cached=False, route=None, collections=["knowledge_base"])
+
+    def create_session_proxy(self, name):
+        return name
+
+    def end_session(self, user_proxy):
+        pass
+
+def test_astream_ends_with_the_answer_or_the_error():
+    async def events(query):
+        return [event async for event in FakeRunner().astream(query)]
+    *tokens, answer = asyncio.run(events("orders"))
+    assert [e["text"] for e in tokens] == ["An ", "answer"]
+    assert answer["type"] == "answer"
+    assert answer["answer"] == "An answer" and answer["collections"] == ["knowledge_base"]
+    assert 0 < answer["time_to_first_token"] <= answer["elapsed"]
+    [error] = asyncio.run(events("fail"))
+    assert (error["type"], error["error"]) == ("error", "model unavailable")
+
+def sse_events(text):
+    """``(event name, data)`` of each server-sent event in a response body."""
+    events = []
+    for message in filter(None, text.split("\n\n")):
+        name, data = message.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def test_server_sends_the_events_as_sse(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    from autogen_app import agents, runner
+    from autogen_app.server import create_app
+    supervisor = SimpleNamespace(llm_provider=SimpleNamespace(stats=dict), tool_executor=SimpleNamespace(close=lambda: None))
+    monkeypatch.setattr(agents, "create_agents", lambda: {"supervisor": supervisor})
+    monkeypatch.setattr(runner, "SupervisorRunner", FakeRunner)
+
+    with TestClient(create_app({"server": {"max_concurrency": 2}})) as client:
+        response = client.post("/query/stream", json={"query": "orders", "session_id": "s1"})
+        assert response.headers["content-type"].startswith("text/event-stream")
+        names, events = zip(*sse_events(response.text))
+        assert names == ("session", "token", "token", "answer")
+        assert events[0] == {"type": "session", "session_id": "s1"}
+        assert events[-1]["answer"] == "An answer"
+
+        response = client.post("/query/stream", json={"query": "fail"})
+        assert [name for name, _ in sse_events(response.text)] == ["session", "error"]
+
+        stats = client.get("/stats").json()
+        assert stats["time_to_first_token"]["p50"] == events[-1]["time_to_first_token"]
+        assert stats["running"] == stats["waiting"] == 0
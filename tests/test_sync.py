@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+from autogen_app.embedding_cache import content_hash
+from autogen_app.sync import SyncPlan
+
+class FakeStore:
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.deleted = []
+
+    def source_hashes(self):
+        return dict(self.hashes)
+
+    def delete_sources(self, source_ids, keep_hashes=None):
+        self.deleted.append((sorted(source_ids), keep_hashes))
+
+def test_only_changed_documents_pass():
+    store = FakeStore({"a.md": content_hash("old a"), "b.md": content_hash("b"), "c.md": content_hash("c")})
+    plan = SyncPlan(store)
+    documents = [
+        Document(page_content="new a", metadata={"source": "a.md"}),
+        Document(page_content="b", metadata={"source": "b.md"}),
+        Document(page_content="d", metadata={"source": "d.md"}),
+    ]
+    changed = list(plan.filter(documents))
+    assert [d.metadata["source_id"] for d in changed] == ["a.md", "d.md"]
+    assert changed[0].metadata["content_hash"] == content_hash("new a")
+    assert (plan.result.added, plan.result.updated, plan.result.unchanged) == (1, 1, 1)
+
+def test_old_chunks_are_deleted_only_on_finish():
+    store = FakeStore({"a.md": content_hash("old a"), "c.md": content_hash("c")})
+    plan = SyncPlan(store)
+    list(plan.filter([Document(page_content="new a", metadata={"source": "a.md"})]))
+    assert store.deleted == []
+
+    result = plan.finish()
+    # Replaced sources keep the chunks of their new version
+    assert store.deleted == [(["a.md"], {"a.md": content_hash("new a")}), (["c.md"], None)]
+    assert result.deleted == 1
+    assert sorted(result.changed_sources) == ["a.md", "c.md"]
+
+def test_finish_can_keep_missing_sources():
+    store = FakeStore({"c.md": content_hash("c")})
+    plan = SyncPlan(store)
+    list(plan.filter([]))
+    assert plan.finish(delete_missing=False).deleted == 0
+    assert store.deleted == []
+
+def test_documents_without_a_source_are_keyed_by_content():
+    plan = SyncPlan(FakeStore({}))
+    changed = list(plan.filter([Document(page_content="orphan text")]))
+    assert changed[0].metadata["source_id"] == content_hash("orphan text")
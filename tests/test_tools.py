@@ -0,0 +1,91 @@
+import json
+import threading
+import time
+import pytest
+
+pytest.importorskip("autogen")
+
+from autogen_app.tools import ParallelToolExecutor
+
+def tool_call(call_id, name, arguments):
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+
+def test_calls_run_concurrently_and_return_in_order():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def search(query):
+        # Only returns once all three calls are running at the same time
+        barrier.wait()
+        return f"results for {query}"
+    executor = ParallelToolExecutor({"search": search}, max_workers=3)
+    calls = [("search", {"query": q}) for q in ("a", "b", "c")]
+    assert executor.run(calls) == ["results for a", "results for b", "results for c"]
+    executor.close()
+
+def test_failures_become_error_results():
+    def slow(query):
+        time.sleep(1)
+        return "late"
+
+    def broken(query):
+        raise RuntimeError("index unavailable")
+    executor = ParallelToolExecutor(
+        {"slow": slow, "broken": broken, "fine": lambda query: "ok"}, timeout=5, timeouts={"slow": 0.05}
+    )
+    results = executor.run([
+        ("slow", {"query": "x"}), ("broken", {"query": "x"}), ("missing", {}), ("fine", {"query": "x"})
+    ])
+    assert results == [
+        "Error: slow timed out after 0.05s",
+        "Error: index unavailable",
+        "Error: Function missing not found.",
+        "ok"
+    ]
+    executor.close()
+
+def test_reply_answers_every_tool_call_of_the_message():
+    executor = ParallelToolExecutor({"echo": lambda query: query.upper()})
+    message = {"role": "assistant", "content": None, "tool_calls": [
+        tool_call("1", "echo", json.dumps({"query": "orders"})),
+        tool_call("2", "echo", "{not json"),
+        tool_call("3", "echo", json.dumps({"query": "users"}))
+    ]}
+    final, reply = executor.generate_tool_calls_reply(None, messages=[message])
+    assert final
+    responses = reply["tool_responses"]
+    assert [r["tool_call_id"] for r in responses] == ["1", "2", "3"]
+    assert responses[0]["content"] == "ORDERS"
+    assert responses[1]["content"].startswith("Error: invalid arguments for echo")
+    assert responses[2]["content"] == "USERS"
+    assert executor.generate_tool_calls_reply(None, messages=[{"role": "assistant", "content": "done"}]) == (False, None)
+    executor.close()
+
+def test_batch_hook_answers_what_it_can_and_the_rest_run_alone():
+    ran = []
+
+    def search(query):
+        ran.append(query)
+        return f"alone: {query}"
+
+    def batch(calls):
+        return {i: f"together: {arguments['query']}" for i, (name, arguments) in enumerate(calls) if name == "pg"}
+    executor = ParallelToolExecutor({"pg": search, "memory": search}, batch=batch)
+    results = executor.run([("pg", {"query": "a"}), ("memory", {"query": "b"}), ("pg", {"query": "c"})])
+    assert results == ["together: a", "alone: b", "together: c"]
+    assert ran == ["b"]
+    # A single call needs no batching
+    assert executor.run([("pg", {"query": "d"})]) == ["alone: d"]
+    executor.close()
+
+def test_failed_or_slow_batches_fall_back_to_separate_calls():
+    def broken(calls):
+        raise RuntimeError("connection reset")
+
+    def slow(calls):
+        time.sleep(1)
+        return {0: "late", 1: "late"}
+    calls = [("pg", {"query": "a"}), ("pg", {"query": "b"})]
+    for batch in (broken, slow):
+        executor = ParallelToolExecutor({"pg": lambda query: query}, batch=batch, timeouts={"pg": 0.1})
+        assert executor.run(calls) == ["a", "b"]
+        executor.close()
@@ -0,0 +1,136 @@
+import contextvars
+import threading
+from types import SimpleNamespace
+import pytest
+
+from autogen_app.tracing import Tracer, get_tracer, record, span, trace_client
+
+def traced_tool():
+    with span("tool.search"):
+        pass
+
+def test_spans_nest_within_a_trace_across_threads(tracer):
+    with span("query") as query:
+        with span("llm.supervisor") as llm:
+            pass
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(traced_tool,))
+        thread.start()
+        thread.join()
+        record("tool.batched", 0.5, batched=True)
+    with span("query") as other:
+        pass
+
+    assert query.parent_id is None
+    assert llm.parent_id == query.span_id and llm.trace_id == query.trace_id
+    assert len(query.trace_id) == 32 and len(query.span_id) == 16
+    [tool] = tracer.memory.spans("tool.search")
+    assert tool.parent_id == query.span_id
+    [batched] = tracer.memory.spans("tool.batched")
+    assert batched.parent_id == query.span_id
+    assert (batched.duration, batched.attributes) == (0.5, {"batched": True})
+    assert other.trace_id != query.trace_id
+    names = {s.name for s in tracer.memory.spans(trace_id=query.trace_id)}
+    assert names == {"query", "llm.supervisor", "tool.search", "tool.batched"}
+    assert query.duration >= llm.duration >= 0
+
+def test_failed_spans_record_the_error(tracer):
+    with pytest.raises(KeyError):
+        with span("tool.search"):
+            raise KeyError("orders")
+    [failed] = tracer.memory.spans("tool.search")
+    assert failed.error == "KeyError"
+    assert tracer.histogram("tool.search")["errors"] == 1
+
+def test_nothing_is_recorded_with_tracing_off():
+    assert get_tracer() is None
+    with span("query") as current:
+        assert current is None
+    record("tool.search", 1.0)
+
+def test_histograms_report_percentiles_and_tokens():
+    tracer = Tracer(window=100)
+    for seconds in range(1, 101):
+        tracer.record("llm.supervisor", float(seconds), prompt_tokens=10, completion_tokens=2)
+    histogram = tracer.histogram("llm.supervisor")
+    assert histogram == {
+        "count": 100,
+        "errors": 0,
+        "mean": 50.5,
+        "p50": 51.0,
+        "p95": 96.0,
+        "p99": 100.0,
+        "prompt_tokens": 1000,
+        "completion_tokens": 200
+    }
+    assert tracer.histogram("missing") is None
+
+def test_percentiles_cover_the_recent_window():
+    tracer = Tracer(window=10)
+    for seconds in range(1, 21):
+        tracer.record("vector_store.search", float(seconds))
+    histogram = tracer.histogram("vector_store.search")
+    assert histogram["count"] == 20
+    assert (histogram["p50"], histogram["p99"]) == (16.0, 20.0)
+
+def test_snapshot_and_reset():
+    tracer = Tracer.from_config({"memory_exporter": False})
+    assert tracer.memory is None
+    tracer.record("vector_store.search", 0.1)
+    tracer.record("vector_store.embed", 0.2)
+    assert list(tracer.snapshot()) == ["vector_store.embed", "vector_store.search"]
+    tracer.reset()
+    assert tracer.snapshot() == {}
+
+def test_a_failing_exporter_does_not_lose_the_span():
+    broken = SimpleNamespace(export=lambda span: 1 / 0)
+    tracer = Tracer(exporters=[broken])
+    with tracer.span("query"):
+        pass
+    assert tracer.histogram("query")["count"] == 1
+
+def test_llm_clients_are_traced_with_their_token_usage(tracer):
+    usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30)
+    client = SimpleNamespace(create=lambda **config: SimpleNamespace(usage=usage))
+    trace_client(client, "supervisor")
+    create = client.create
+    trace_client(client, "supervisor")
+    assert client.create is create
+    client.create(messages=[])
+    [llm] = tracer.memory.spans("llm.supervisor")
+    assert llm.attributes == {"prompt_tokens": 120, "completion_tokens": 30}
+    trace_client(None, "supervisor")
+
+def test_batched_tools_get_spans_under_the_batch(tracer):
+    pytest.importorskip("autogen")
+    from autogen_app.tools import ParallelToolExecutor
+
+    def batch(calls):
+        return {i: "together" for i, (name, _) in enumerate(calls) if name == "pg"}
+    executor = ParallelToolExecutor({"pg": lambda query: "alone", "memory": lambda query: "alone"}, batch=batch)
+    with span("query") as query:
+        executor.run([("pg", {"query": "a"}), ("memory", {"query": "b"}), ("pg", {"query": "c"})])
+    executor.close()
+    [batch_span] = tracer.memory.spans("tool.batch")
+    assert batch_span.parent_id == query.span_id
+    assert batch_span.attributes == {"calls": 3}
+    batched = tracer.memory.spans("tool.pg")
+    assert len(batched) == 2
+    assert all(s.parent_id == batch_span.span_id and s.attributes == {"batched": True} for s in batched)
+    [alone] = tracer.memory.spans("tool.memory")
+    assert alone.parent_id == query.span_id
+
+def test_vector_store_searches_time_embedding_and_search_apart(tracer, embeddings):
+    pytest.importorskip("faiss")
+    pytest.importorskip("langchain_community")
+    from langchain.schema import Document
+    from autogen_app.memory_store import MemoryVectorStore
+    store = MemoryVectorStore({"type": "memory", "collection_name": "kb", "embedding_model": "fake"})
+    store.add_documents([Document(page_content="refund policy"), Document(page_content="orders table")])
+    with span("tool.retrieve_knowledge") as tool:
+        store.similarity_search("refunds", k=1)
+    [embed] = tracer.memory.spans("vector_store.embed")
+    [search] = tracer.memory.spans("vector_store.search")
+    assert embed.parent_id == search.parent_id == tool.span_id
+    assert embed.attributes == {"collection": "kb"}
+    assert search.attributes == {"collection": "kb", "k": 1}
+    assert set(tracer.snapshot()) == {"tool.retrieve_knowledge", "vector_store.embed", "vector_store.search"}
@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+from autogen_app.vector_store import VectorStore, similarity_search_many
+
+class FakeStore(VectorStore):
+    batches = []
+
+    def __init__(self, name, key=None):
+        super().__init__({"collection_name": name})
+        self.key = key
+
+    def add_documents(self, documents):
+        pass
+
+    def similarity_search(self, query, k=4):
+        return [Document(page_content=f"{self.collection_name}: {query}")] * k
+
+    def batch_key(self):
+        return self.key
+
+    @classmethod
+    def search_batch(cls, searches):
+        cls.batches.append([store.collection_name for store, _, _ in searches])
+        return super().search_batch(searches)
+
+def test_searches_sharing_a_batch_key_go_together():
+    FakeStore.batches = []
+    sql = FakeStore("sql", key="db")
+    graphql = FakeStore("graphql", key="db")
+    other = FakeStore("other", key="elsewhere")
+    memory = FakeStore("memory")
+    results = similarity_search_many([
+        (sql, "orders", 1), (memory, "refunds", 2), (graphql, "invoices", 1), (other, "users", 1)
+    ])
+    assert [[d.page_content for d in docs] for docs in results] == [
+        ["sql: orders"], ["memory: refunds"] * 2, ["graphql: invoices"], ["other: users"]
+    ]
+    assert sorted(FakeStore.batches) == [["memory"], ["other"], ["sql", "graphql"]]